@@ -1,5 +1,11 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+import os, sys
+sys.path.insert(0, SPECPATH)
+import static_assets
+
+# 정적 파일 .gz/.br 를 빌드 때 만들어서 같이 묶음 (exe 는 실행마다 임시 폴더에 풀리므로 기동 시 압축하지 않음)
+static_assets.precompress(os.path.join(SPECPATH, 'dist'))
 
 a = Analysis(
     ['server.py'],
@@ -10,7 +16,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['tkinter'],  # 서버에는 불필요 -> 압축 해제량/기동 시간 감소
     noarchive=False,
     optimize=0,
 )
@@ -26,7 +32,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False,  # UPX 압축 DLL 은 실행할 때마다 풀어야 해서 기동이 느려짐
     upx_exclude=[],
     runtime_tmpdir=None,
     console=True,
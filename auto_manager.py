@@ -6,6 +6,9 @@ import requests
 import json
 import sys
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from bid_scheduler import BidScheduler, decide_bid, REASONS, TARGET_RANK, MAX_BID_CAP, MIN_BID_CAP, PROBE_LIMIT, BID_STEP
 
 # ==========================================
 # 1. 사용자 설정 (필수 입력)
@@ -21,11 +24,10 @@ BASE_URL = "https://api.searchad.naver.com"
 # 2. 전략 및 안전 설정
 # ==========================================
 DRY_RUN = False         # True: 시뮬레이션(로그만 출력), False: 실제 반영
-TARGET_RANK = 3.0      # 목표 순위
-MAX_BID_CAP = 10000    # 입찰가 상한선
-MIN_BID_CAP = 70       # 최소 입찰가
-PROBE_LIMIT = 3000     # 탐색 입찰 한계값 (이 금액 이상은 순위 0이어도 인상 안 함)
-BID_STEP = 300         # 입찰가 조정 단위
+# 목표 순위 / 입찰가 상·하한 / 탐색 한계 / 조정 단위는 bid_scheduler (backtest 와 같은 값을 씀)
+ADAPTIVE_BUDGET = 200  # [적응형] 한 번에 확인할 최대 키워드 수 (급한 순)
+KEYWORD_REFRESH_SEC = 1800  # [적응형] 키워드 목록 / 최근 지출 다시 읽는 주기
+PARALLEL_CALLS = 5     # [소재 관리] 동시에 보내는 조회/ON·OFF 요청 수 (네이버 초당 제한을 넘지 않게 작게)
 
 # ==========================================
 # 3. API 유틸리티 (서버 통신용)
@@ -174,38 +176,10 @@ def run_auto_bidder(target_id):
             source = "(G)" if k.get('useGroupBidAmt', False) else ""
             
             cur_rank = ranks.get(kid, 0.0)
-            new_bid = cur_bid
-            action = "유지"
-            reason = ""
+            new_bid, code = decide_bid(cur_bid, cur_rank)
+            reason = REASONS[code].format(rank=cur_rank)
             
-            # [알고리즘]
-            if cur_rank == 0.0:
-                if cur_bid < PROBE_LIMIT:
-                    new_bid = cur_bid + BID_STEP
-                    action = "❓탐색"
-                    reason = "노출유도"
-                else:
-                    new_bid = cur_bid
-                    action = "유지"
-                    reason = "데이터지연"
-            elif cur_rank > TARGET_RANK:
-                new_bid = cur_bid + BID_STEP
-                action = "🔺인상"
-                reason = f"순위밀림({cur_rank})"
-            elif cur_rank < TARGET_RANK:
-                if cur_bid > MIN_BID_CAP:
-                    new_bid = cur_bid - BID_STEP
-                    action = "🔻인하"
-                    reason = f"과잉노출({cur_rank})"
-                else:
-                    reason = "최소금액"
-
-            # 안전장치
-            if new_bid > MAX_BID_CAP: new_bid = MAX_BID_CAP
-            if new_bid < MIN_BID_CAP: new_bid = MIN_BID_CAP
-            if new_bid == cur_bid: action = "유지"
-            
-            if action != "유지":
+            if new_bid != cur_bid:
                 arrow = "🔼" if new_bid > cur_bid else "🔽"
                 print(f"   {kname:<15} | {cur_rank:^5.1f} | {cur_bid:>8,}{source:<1} | {new_bid:>8,} | {arrow} {reason}", end="")
                 
@@ -222,6 +196,71 @@ def run_auto_bidder(target_id):
     
     print(f"\n🏁 입찰 종료. 총 {total_changed}건 변경됨.")
 
+def get_recent_spend(keyword_ids, days=7):
+    # 최근 N일(어제까지) 비용/노출 -> {id: (비용, 노출)} (적응형 주기 상한 계산용)
+    out = {}
+    tr = json.dumps({"since": (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d"),
+                     "until": (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")})
+    for i in range(0, len(keyword_ids), 50):
+        data = call_api("/stats", params={'ids': ",".join(keyword_ids[i:i + 50]), 'fields': '["impCnt","salesAmt"]', 'timeRange': tr})
+        for item in (data or {}).get('data', []):
+            out[item['id']] = (item.get('salesAmt') or 0, item.get('impCnt') or 0)
+    return out
+
+def load_target_keywords(target_id):
+    # 캠페인/그룹 ID -> {keywordId: 키워드 (그룹 기본가는 _gbid)}
+    groups = get_adgroups_in_campaign(target_id) if "cmp-" in target_id else [g for g in [get_adgroup_detail(target_id)] if g]
+    out = {}
+    for grp in groups:
+        for k in get_keywords(grp['nccAdgroupId']):
+            k['_gbid'] = grp.get('bidAmt', 0)
+            out[k['nccKeywordId']] = k
+    return out
+
+def run_adaptive_bidder(target_id, budget=ADAPTIVE_BUDGET, refresh_sec=KEYWORD_REFRESH_SEC):
+    # run_auto_bidder 를 계속 돌리되 키워드마다 확인 주기를 다르게 (bid_scheduler) - Ctrl+C 로 종료
+    #   돈 쓰는 / 순위가 흔들리는 키워드는 자주, 노출 0 키워드는 BID_SCHED_MAX 마다 한 번
+    sched = BidScheduler()
+    kw, refresh_at = {}, 0
+    print(f"\n🔁 적응형 입찰 시작 (목표: {TARGET_RANK}위 | 1회 최대 {budget}개) - Ctrl+C 로 종료")
+    try:
+        while True:
+            now = time.time()
+            if now >= refresh_at:
+                kw = load_target_keywords(target_id)
+                if not kw:
+                    print("❌ 조회된 대상이 없습니다.")
+                    return
+                spend = get_recent_spend(list(kw))
+                for kid in sched.ids() - kw.keys(): sched.remove(kid)
+                for kid in kw: sched.upsert(kid, *spend.get(kid, (0, 0)))
+                refresh_at = now + refresh_sec
+                print(f"🔄 키워드 {len(kw):,}개 갱신 | 주기 분포 {sched.summary()}")
+
+            due = sched.pop_due(limit=budget)
+            if due:
+                ranks = get_current_ranks(due)
+                changed = failed = 0
+                for kid in due:
+                    k, rank = kw[kid], ranks.get(kid, 0.0)
+                    cur_bid = k['_gbid'] if k.get('useGroupBidAmt', False) else k['bidAmt']
+                    new_bid, code = decide_bid(cur_bid, rank)
+                    applied = False  # 실제로 반영된 경우만 (시뮬레이션 / 실패는 변경 아님)
+                    if new_bid != cur_bid:
+                        print(f"   {k['keyword']:<15} | {rank:^5.1f} | {cur_bid:>8,} -> {new_bid:>8,} | {REASONS[code].format(rank=rank)}"
+                              + (" (Sim)" if DRY_RUN else ""))
+                        if not DRY_RUN:
+                            applied = bool(update_keyword_bid(kid, new_bid))
+                            if applied: k['bidAmt'], k['useGroupBidAmt'] = new_bid, False
+                            else: failed += 1
+                    changed += applied
+                    sched.report(kid, rank=rank or None, changed=applied)
+                print(f"[{datetime.now():%H:%M:%S}] 확인 {len(due)}개 / 변경 {changed}개" + (f" / 실패 {failed}개" if failed else "")
+                      + f" | 다음 확인 {sched.next_due_in():.0f}초 후 | {sched.summary()}")
+            time.sleep(min(30, max(1, sched.next_due_in())))
+    except KeyboardInterrupt:
+        print("\n⏹ 적응형 입찰 종료")
+
 # ==========================================
 # 6. [기능 2] 그룹 기본 입찰가 일괄 변경
 # ==========================================
@@ -257,8 +296,9 @@ def manage_creatives_grouped(campaign_id):
     creative_map = {}
     total_ads_count = 0
     
-    for grp in groups:
-        ads = get_ads(grp['nccAdgroupId'])
+    with ThreadPoolExecutor(max_workers=PARALLEL_CALLS) as ex:
+        group_ads = list(ex.map(lambda g: get_ads(g['nccAdgroupId']), groups))
+    for grp, ads in zip(groups, group_ads):
         for ad in ads:
             inspect = ad.get('ad', {})
             headline = inspect.get('headline', '제목없음')
@@ -274,7 +314,6 @@ def manage_creatives_grouped(campaign_id):
                 'status': ad['userLock']
             })
             total_ads_count += 1
-        time.sleep(0.05)
 
     print(f"✅ 총 {total_ads_count}개의 소재를 {len(creative_map)}가지 유형으로 분류했습니다.\n")
 
@@ -306,18 +345,18 @@ def manage_creatives_grouped(campaign_id):
 
     if input(f"⚠️ 실제 {len(target_ads)}개 소재를 {status_str} 하시겠습니까? (y/n): ") != 'y': return
 
-    success_cnt = 0
-    for item in target_ads:
-        if item['status'] == target_lock: continue
-        print(f"   - {item['group']} 소재 변경 중...", end="")
-        res = call_api(f"/ncc/ads/{item['id']}", method="PUT", params={'fields': 'userLock'}, body={'userLock': target_lock})
-        if res:
-            print(" 성공")
-            success_cnt += 1
-        else:
-            print(" 실패")
-        time.sleep(0.1)
-    print(f"\n🏁 {success_cnt}개 소재 상태 변경 완료.")
+    # 이미 그 상태인 소재는 건너뛰고 나머지는 동시에 (429 등으로 실패하면 잠시 쉬고 2번까지 다시)
+    todo = [item for item in target_ads if item['status'] != target_lock]
+    def set_lock(item):
+        for attempt in range(3):
+            if call_api(f"/ncc/ads/{item['id']}", method="PUT", params={'fields': 'userLock'}, body={'userLock': target_lock}):
+                return True
+            time.sleep(0.5 * (attempt + 1))
+        print(f"   - {item['group']} 소재 변경 실패")
+        return False
+    with ThreadPoolExecutor(max_workers=PARALLEL_CALLS) as ex:
+        success_cnt = sum(ex.map(set_lock, todo))
+    print(f"\n🏁 {success_cnt}개 소재 상태 변경 완료. (이미 {status_str}: {len(target_ads) - len(todo)}개)")
 
 # ==========================================
 # 8. 메인 메뉴
@@ -330,6 +369,7 @@ def main():
     print("1. 🚀 스마트 자동 입찰 (순위기반 + 탐색)")
     print("2. 💰 그룹 기본 입찰가 일괄 변경")
     print("3. 🎨 소재(Creative) 그룹핑 일괄 관리")
+    print("4. 🔁 적응형 연속 입찰 (키워드별 확인 주기)")
     print("0. 종료")
     
     menu = input("👉 메뉴 선택: ")
@@ -340,6 +380,8 @@ def main():
 
     if menu == "1":
         run_auto_bidder(target_id)
+    elif menu == "4":
+        run_adaptive_bidder(target_id)
     elif menu == "2":
         if "cmp-" not in target_id:
             print("❌ 캠페인 ID가 필요합니다.")
@@ -0,0 +1,251 @@
+# ==========================================
+# 입찰 전략 백테스트 / 파라미터 스윕 (오프라인, API 호출 없음)
+# ==========================================
+# auto_manager 의 DRY_RUN 은 실제 API 를 부르면서 키워드마다 출력만 함 -> TARGET_RANK / BID_STEP / PROBE_LIMIT 튜닝이 감.
+# 저장된 과거 데이터 (stats_warehouse 일별 실적 + bid_history 입찰 변경 + dims 현재 입찰가) 로 키워드별 반응 모델을 만들고
+# run_auto_bidder 와 같은 판단 (bid_scheduler.decide_bid) 을 하루 1회씩 재생 -> 설정별 예상 비용 / 순위.
+#   반응 모델 (키워드별, 노출 있던 날 기준):
+#     순위 = a + b * ln(입찰가)   (입찰가가 2가지 이상이면 최소제곱, 아니면 b = DEFAULT_SLOPE)
+#     클릭 = 일평균 클릭 * (평균 순위 / 순위) ^ CTR_DECAY,  CPC = 입찰가 * (평균 CPC / 평균 입찰가)
+#     순위 > MAX_RANK 면 노출 없음 (순위 0 -> 탐색 입찰). 노출 기록이 아예 없는 키워드는 비용 0 으로 판단만 재생
+# 입찰가가 정해지면 다음 날 순위도 정해짐 -> 같은 입찰가로 돌아오면 그 뒤는 주기 반복이라 남은 날짜는 곱셈으로 계산.
+# 그리드 스윕은 ProcessPoolExecutor (BACKTEST_WORKERS, 기본 CPU 수) - 모델 배열은 워커마다 1번만 전달
+#   python backtest.py --customer 1000000 --days 30 --target-rank 2,3,4,5 --bid-step 100,200,300,500 --probe-limit 1000,3000
+import os
+import sys
+import math
+import time
+import itertools
+import argparse
+from array import array
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+import bid_scheduler
+from stats_warehouse import day_range
+
+BACKTEST_WORKERS = int(os.environ.get("BACKTEST_WORKERS", str(os.cpu_count() or 1)))
+MAX_RANK = 15.0
+DEFAULT_SLOPE = -2.5  # 입찰가 2배 -> 약 1.7계단 상승
+CTR_DECAY = 1.0
+PARAMS = ("target_rank", "bid_step", "probe_limit", "min_bid", "max_bid")
+
+
+class Models:
+    # 키워드별 반응 모델 (컬럼 배열 -> 프로세스 간 전달이 가벼움)
+    __slots__ = ("ids", "bid0", "rank0", "a", "b", "clk", "imp", "rank", "cpc_ratio", "cvr", "vpc", "days", "actual")
+
+    def __init__(self):
+        self.ids = []
+        self.bid0 = array("i")
+        self.rank0, self.a, self.b, self.clk, self.imp, self.rank = (array("d") for _ in range(6))
+        self.cpc_ratio, self.cvr, self.vpc = array("d"), array("d"), array("d")
+        self.days = 0
+        self.actual = {"spend": 0, "clicks": 0, "impressions": 0, "conversions": 0, "convAmt": 0, "rankImp": 0.0}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, kid, bid0, rank0, a=0.0, b=0.0, clk=0.0, imp=0.0, rank=0.0, cpc_ratio=0.0, cvr=0.0, vpc=0.0):
+        self.ids.append(kid)
+        self.bid0.append(int(bid0))
+        for col, v in ((self.rank0, rank0), (self.a, a), (self.b, b), (self.clk, clk), (self.imp, imp), (self.rank, rank),
+                       (self.cpc_ratio, cpc_ratio), (self.cvr, cvr), (self.vpc, vpc)):
+            col.append(v)
+
+
+def _bid_on(changes, day, current):
+    # changes: 시간순 [(day, old, new)] -> 그 날 마지막으로 적용된 입찰가
+    if not changes: return current
+    last = None
+    for d, old, new in changes:
+        if d > day: return last if last is not None else old
+        last = new
+    return last
+
+
+def fit(models, kid, rows, changes, current_bid):
+    # rows: 날짜순 (day, imp, clk, cost, conv, conv_amt, rnk) -> models 에 1개 추가
+    bid0 = _bid_on(changes, rows[0][0], current_bid) if rows else current_bid
+    if not bid0: return False
+    xs, ys, n = [], [], 0
+    imp = clk = cost = conv = amt = 0
+    rank_imp = bid_clk = 0.0
+    for day, i, c, s, cv, ca, r in rows:
+        imp += i; clk += c; cost += s; conv += cv; amt += ca
+        if not i or not r: continue
+        bid = _bid_on(changes, day, current_bid) or bid0
+        n += 1
+        xs.append(math.log(bid)); ys.append(r)
+        rank_imp += r * i; bid_clk += bid * c
+    act = models.actual
+    act["spend"] += cost; act["clicks"] += clk; act["impressions"] += imp; act["conversions"] += conv; act["convAmt"] += amt
+    act["rankImp"] += rank_imp
+    rank0 = rows[0][6] if rows and rows[0][1] else 0.0
+    if not n:
+        models.add(kid, bid0, rank0)  # 노출 기록 없음 -> 판단만 재생
+        return True
+    mx, my = sum(xs) / n, sum(ys) / n
+    var = sum((x - mx) ** 2 for x in xs)
+    b = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var if var > 1e-9 else DEFAULT_SLOPE
+    b = min(-0.1, max(-10.0, b))  # 관측 데이터는 "순위 밀림 -> 인상" 때문에 기울기가 뒤집힐 수 있음
+    base_rank = rank_imp / imp if imp else my
+    cpc_ratio = min(1.0, (cost / clk) / (bid_clk / clk)) if clk and bid_clk else 0.7
+    models.add(kid, bid0, rank0, my - b * mx, b, clk / n, imp / n, base_rank, cpc_ratio,
+               conv / clk if clk else 0.0, amt / conv if conv else 0.0)
+    return True
+
+
+def load_models(wh, customer, since, until, timeline=None):
+    # 저장소 일별 실적 (키워드 순서로 스트리밍) + 입찰 변경 이력 -> Models
+    timeline = timeline or {}
+    conn = wh._conn()
+    dims = {r[0]: (r[1], r[2]) for r in conn.execute("SELECT id, keyword, bid FROM dims WHERE customer=?", (customer,))}
+    models = Models()
+    models.days = len(day_range(since, until))
+    rows = conn.execute("SELECT id, day, imp, clk, cost, conv, conv_amt, rnk FROM daily WHERE customer=? AND day BETWEEN ? AND ? "
+                        "ORDER BY id, day", (customer, since, until))
+    seen = set()
+    for kid, grp in itertools.groupby(rows, key=lambda r: r[0]):
+        seen.add(kid)
+        kw, bid = dims.get(kid, (None, None))
+        fit(models, kid, [tuple(r)[1:] for r in grp], timeline.get(kid) or timeline.get(kw), bid)
+    for kid, (kw, bid) in dims.items():
+        if kid not in seen: fit(models, kid, [], timeline.get(kid) or timeline.get(kw), bid)
+    return models
+
+
+def simulate(m, days, target_rank, bid_step, probe_limit, min_bid=bid_scheduler.MIN_BID_CAP, max_bid=bid_scheduler.MAX_BID_CAP):
+    decide, log = bid_scheduler.decide_bid, math.log
+    tot = [0.0] * 8  # spend, clicks, imp, rank*imp, conv, conv_amt, 목표 달성 일수, 입찰 변경 수
+    for i in range(len(m.ids)):
+        bid, obs = m.bid0[i], m.rank0[i]
+        a, b, clk0, imp, r0, ratio, cvr, vpc = m.a[i], m.b[i], m.clk[i], m.imp[i], m.rank[i], m.cpc_ratio[i], m.cvr[i], m.vpc[i]
+        sp = ck = im = ri = cv = amt = on = ch = 0.0
+        seen, cum, extra = {}, [(0.0,) * 8], None  # cum: 날짜별 누적 합계
+        t = 0
+        while t < days:
+            if t and bid in seen:
+                # 같은 입찰가로 돌아옴 -> 이후는 주기 반복 (남은 날짜는 주기 합계 x 반복 횟수)
+                s0 = seen[bid]
+                full, part = divmod(days - t, t - s0)
+                extra = [full * (x1 - x0) + (xp - x0) for x0, x1, xp in zip(cum[s0], cum[t], cum[s0 + part])]
+                break
+            if t: seen[bid] = t  # 첫날 순위는 실제 기록이라 상태에서 제외
+            nb = decide(bid, obs, target_rank, bid_step, probe_limit, min_bid, max_bid)[0]
+            if nb != bid: ch += 1; bid = nb
+            r = a + b * log(bid) if imp else MAX_RANK + 1
+            if r > MAX_RANK:
+                obs = 0.0
+            else:
+                if r < 1.0: r = 1.0
+                c = clk0 * (r0 / r) ** CTR_DECAY
+                sp += c * ratio * bid; ck += c; im += imp; ri += r * imp; cv += c * cvr; amt += c * cvr * vpc
+                if r <= target_rank: on += 1
+                obs = int(r * 10 + 0.5) / 10  # avgRnk 처럼 소수 1자리
+            cum.append((sp, ck, im, ri, cv, amt, on, ch))
+            t += 1
+        last = cum[-1]
+        for k in range(8): tot[k] += last[k] + (extra[k] if extra else 0)
+    spend, clicks, imps, rank_imp, conv, amt, on_target, changes = tot
+    return {"spend": round(spend), "clicks": round(clicks), "impressions": round(imps), "conversions": round(conv, 1),
+            "convAmt": round(amt), "avgRank": round(rank_imp / imps, 2) if imps else 0,
+            "roas": round(amt / spend * 100) if spend else 0, "cpc": round(spend / clicks) if clicks else 0,
+            "onTargetPct": round(on_target / (len(m.ids) * days) * 100, 1) if m.ids and days else 0, "bidChanges": int(changes)}
+
+
+def grid(**axes):
+    # grid(target_rank=[2, 3], bid_step=[100, 300]) -> 설정 dict 목록 (빠진 축은 bid_scheduler 기본값)
+    base = {"target_rank": bid_scheduler.TARGET_RANK, "bid_step": bid_scheduler.BID_STEP, "probe_limit": bid_scheduler.PROBE_LIMIT,
+            "min_bid": bid_scheduler.MIN_BID_CAP, "max_bid": bid_scheduler.MAX_BID_CAP}
+    keys = [k for k in PARAMS if axes.get(k)]
+    return [{**base, **dict(zip(keys, combo))} for combo in itertools.product(*(axes[k] for k in keys))]
+
+
+_models, _days = None, 0
+
+
+def _init(models, days):
+    global _models, _days
+    _models, _days = models, days
+
+
+def _run(params):
+    return {**params, **simulate(_models, _days, **params)}
+
+
+def sweep(models, settings, days=None, workers=BACKTEST_WORKERS):
+    # 설정 목록 -> 설정별 결과 (입력 순서 그대로)
+    days = days or models.days
+    # 패키징된 exe 는 자식 프로세스를 띄우면 exe 전체(서버)가 다시 실행됨 -> 단일 프로세스
+    workers = 1 if getattr(sys, "frozen", False) else max(1, min(workers, len(settings)))
+    if workers > 1:
+        try:
+            import multiprocessing
+            ctx = multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init, initargs=(models, days)) as ex:
+                return list(ex.map(_run, settings, chunksize=max(1, len(settings) // (workers * 4))))
+        except Exception as e:
+            print(f"[Backtest] 프로세스 풀 사용 불가 -> 단일 프로세스: {e}")
+    _init(models, days)
+    return [_run(p) for p in settings]
+
+
+def actual_summary(models):
+    a = models.actual
+    return {"spend": a["spend"], "clicks": a["clicks"], "impressions": a["impressions"], "conversions": a["conversions"],
+            "convAmt": a["convAmt"], "avgRank": round(a["rankImp"] / a["impressions"], 2) if a["impressions"] else 0,
+            "roas": round(a["convAmt"] / a["spend"] * 100) if a["spend"] else 0}
+
+
+def run(wh, customer, since, until, axes, timeline=None, workers=BACKTEST_WORKERS, sort="roas"):
+    t0 = time.perf_counter()
+    models = load_models(wh, customer, since, until, timeline)
+    t1 = time.perf_counter()
+    rows = sweep(models, grid(**axes), workers=workers)
+    rows.sort(key=lambda r: r.get(sort, 0), reverse=sort not in ("spend", "cpc", "avgRank"))
+    return {"since": since, "until": until, "keywords": len(models), "days": models.days, "settings": len(rows),
+            "actual": actual_summary(models), "results": rows,
+            "loadMs": round((t1 - t0) * 1000), "sweepMs": round((time.perf_counter() - t1) * 1000)}
+
+
+def _floats(s):
+    return [float(x) for x in s.split(",")] if s else None
+
+
+def _ints(s):
+    return [int(x) for x in s.split(",")] if s else None
+
+
+def main():
+    import stats_warehouse
+    p = argparse.ArgumentParser(description="입찰 전략 백테스트 (저장소 데이터)")
+    p.add_argument("--customer", required=True)
+    p.add_argument("--days", type=int, default=30)
+    p.add_argument("--target-rank", default="2,3,4,5")
+    p.add_argument("--bid-step", default="100,200,300,500")
+    p.add_argument("--probe-limit", default="1000,3000")
+    p.add_argument("--max-bid", default=None)
+    p.add_argument("--workers", type=int, default=BACKTEST_WORKERS)
+    p.add_argument("--sort", default="roas")
+    p.add_argument("--top", type=int, default=20)
+    a = p.parse_args()
+
+    until = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    since = (datetime.now() - timedelta(days=a.days)).strftime("%Y-%m-%d")
+    res = run(stats_warehouse.get_warehouse(), a.customer, since, until,
+              {"target_rank": _floats(a.target_rank), "bid_step": _ints(a.bid_step), "probe_limit": _ints(a.probe_limit),
+               "max_bid": _ints(a.max_bid)}, workers=a.workers, sort=a.sort)
+    act = res["actual"]
+    print(f"\n📈 백테스트 {since} ~ {until} | 키워드 {res['keywords']:,}개 | 설정 {res['settings']}개 "
+          f"| 로드 {res['loadMs']}ms, 스윕 {res['sweepMs']}ms ({a.workers} workers)")
+    print(f"   실제: 비용 {act['spend']:,}원 / 클릭 {act['clicks']:,} / 평균순위 {act['avgRank']} / ROAS {act['roas']}%")
+    print(f"{'순위':>5} {'단위':>6} {'탐색한도':>8} {'비용':>14} {'클릭':>9} {'평균순위':>8} {'ROAS':>6} {'목표%':>6} {'변경':>8}")
+    print("-" * 84)
+    for r in res["results"][:a.top]:
+        print(f"{r['target_rank']:>5} {r['bid_step']:>6} {r['probe_limit']:>8} {r['spend']:>14,} {r['clicks']:>9,} "
+              f"{r['avgRank']:>8} {r['roas']:>6} {r['onTargetPct']:>6} {r['bidChanges']:>8,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# ==========================================
+# 백테스트 스윕 벤치마크 (가짜 이력 -> 임시 저장소 -> 100개 설정 스윕)
+# ==========================================
+# 키워드 N개 x D일 일별 실적 + 입찰 변경 이력을 만들어서 backtest.run 과 같은 경로로 측정:
+#   로드 (SQLite -> 키워드별 모델 적합) / 스윕 (단일 프로세스 vs 프로세스 풀)
+#   python bench_backtest.py --keywords 20000 --days 30 --workers 1,4
+import os
+import math
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+import backtest
+from stats_warehouse import StatsWarehouse
+
+
+def make_history(wh, customer, n, days, seed=1):
+    # 키워드마다 "순위 = a + b ln(입찰가)" 를 정해두고 입찰가가 며칠에 한 번씩 바뀌는 이력 생성
+    rnd = random.Random(seed)
+    end = datetime.now() - timedelta(days=1)
+    day_list = [(end - timedelta(days=d)).strftime("%Y-%m-%d") for d in range(days - 1, -1, -1)]
+    dims, rows, timeline = [], [], {}
+    for i in range(n):
+        kid = f"nkw-bench-{i:08d}"
+        b = rnd.uniform(-4, -1.5)
+        a = rnd.uniform(3, 9) - b * math.log(500)
+        base_imp, ctr, cvr = rnd.randint(50, 3000), rnd.uniform(0.005, 0.05), rnd.uniform(0, 0.1)
+        bid, changes = rnd.randrange(100, 3000, 10), []
+        for day in day_list:
+            if rnd.random() < 0.2:
+                new = max(70, bid + rnd.choice((-300, -100, 100, 300)))
+                changes.append((day, bid, new))
+                bid = new
+            r = a + b * math.log(bid) + rnd.gauss(0, 0.3)
+            if r > backtest.MAX_RANK:
+                rows.append((kid, day, 0, 0, 0, 0, 0, 0.0))
+                continue
+            r = max(1.0, r)
+            imp = int(base_imp * rnd.uniform(0.7, 1.3))
+            clk = int(imp * ctr * (5 / r))
+            conv = int(clk * cvr)
+            rows.append((kid, day, imp, clk, int(clk * bid * 0.7), conv, conv * 30000, round(r, 1)))
+        dims.append((kid, f"키워드{i}", "grp-bench", "cmp-bench", bid))
+        if changes: timeline[kid] = changes
+    wh.upsert_dims(customer, dims)
+    wh.insert_rows(customer, rows)
+    return day_list[0], day_list[-1], timeline
+
+
+def main():
+    p = argparse.ArgumentParser(description="백테스트 스윕 벤치마크")
+    p.add_argument("--keywords", type=int, default=20000)
+    p.add_argument("--days", type=int, default=30)
+    p.add_argument("--workers", default=f"1,{os.cpu_count() or 1}")
+    a = p.parse_args()
+
+    wh = StatsWarehouse(os.path.join(tempfile.mkdtemp(), "bench_stats.db"))
+    t0 = time.perf_counter()
+    since, until, timeline = make_history(wh, "bench", a.keywords, a.days)
+    print(f"\n🧪 키워드 {a.keywords:,}개 x {a.days}일 이력 생성 {time.perf_counter() - t0:.1f}s")
+
+    axes = {"target_rank": [1.5, 2, 3, 4, 5], "bid_step": [50, 100, 200, 300, 500], "probe_limit": [1000, 2000, 3000, 5000]}
+    t0 = time.perf_counter()
+    models = backtest.load_models(wh, "bench", since, until, timeline)
+    load = time.perf_counter() - t0
+    settings = backtest.grid(**axes)
+    print(f"   모델 적합 {load * 1000:.0f}ms | 설정 {len(settings)}개 (CPU {os.cpu_count()}개)")
+    print(f"{'workers':>8} {'스윕(s)':>9} {'설정당(ms)':>11} {'키워드-일/s':>14}")
+    print("-" * 46)
+    for w in (int(x) for x in a.workers.split(",")):
+        t0 = time.perf_counter()
+        rows = backtest.sweep(models, settings, workers=w)
+        el = time.perf_counter() - t0
+        print(f"{w:>8} {el:>9.2f} {el / len(settings) * 1000:>11.1f} {len(settings) * len(models) * models.days / el:>14,.0f}")
+    best = max(rows, key=lambda r: r["roas"])
+    print(f"   ROAS 최고: 목표 {best['target_rank']}위 / 단위 {best['bid_step']} / 탐색 {best['probe_limit']} "
+          f"-> 비용 {best['spend']:,} ROAS {best['roas']}% 평균순위 {best['avgRank']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# ==========================================
+# DB 백엔드별 쓰기 부하 벤치마크
+# ==========================================
+# 쓰기 위주 라우트 (/api/track/visit, /users/me/keys, /auth/register) 를 동시 요청으로 측정.
+# 백엔드마다 별도 프로세스로 server.py 를 띄움 (DB 엔진은 import 시점에 결정되므로).
+#   python bench_db.py                                   # SQLite 만
+#   python bench_db.py --postgres postgresql+psycopg2://user:pw@127.0.0.1/naver_bench
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bench_load import free_port, serve_in_thread, percentile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_backend(n, concurrency):
+    # (자식 프로세스) 현재 DATABASE_URL 로 서버를 띄우고 라우트별 결과를 JSON 으로 출력
+    sys.path.insert(0, BASE_DIR)
+    import server
+    port = free_port()
+    serve_in_thread(server.app, port)
+    url = f"http://127.0.0.1:{port}"
+    session = requests.Session()
+
+    requests.post(f"{url}/auth/register", json={"username": "admin", "password": "pw", "name": "a", "phone": "-"})
+    token = requests.post(f"{url}/auth/token", data={"username": "admin", "password": "pw"}).json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    run_id = int(time.time())
+
+    cases = {
+        "POST /api/track/visit": lambda i: session.post(f"{url}/api/track/visit", json={"url": f"https://example.com/?n_keyword=kw{i}", "referrer": ""}),
+        "PUT /users/me/keys": lambda i: session.put(f"{url}/users/me/keys", headers=auth, json={"naver_access_key": f"k{i}", "naver_secret_key": "s", "naver_customer_id": "1"}),
+        "POST /auth/register": lambda i: session.post(f"{url}/auth/register", json={"username": f"u{run_id}_{i}", "password": "pw", "name": "n", "phone": "-"}),
+    }
+    out = []
+    for name, fn in cases.items():
+        lat, errors = [], 0
+
+        def one(i):
+            t0 = time.perf_counter()
+            r = fn(i)
+            return time.perf_counter() - t0, r.status_code
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as ex:
+            for dt, code in ex.map(one, range(n)):
+                lat.append(dt)
+                if code != 200: errors += 1
+        wall = time.perf_counter() - t0
+        out.append({"route": name, "rps": n / wall, "p50_ms": percentile(lat, 50) * 1000,
+                    "p99_ms": percentile(lat, 99) * 1000, "errors": errors})
+    print("BENCH_RESULT " + json.dumps(out))
+
+
+def main():
+    p = argparse.ArgumentParser(description="DB 백엔드별 쓰기 라우트 벤치마크")
+    p.add_argument("--requests", type=int, default=300)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--postgres", help="PostgreSQL URL (지정 시 함께 측정)")
+    p.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    a = p.parse_args()
+
+    if a.child:
+        return run_backend(a.requests, a.concurrency)
+
+    backends = [("sqlite", "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="bench_db_"), "bench.db"))]
+    if a.postgres: backends.append(("postgresql", a.postgres))
+
+    print(f"\n📊 DB 쓰기 벤치마크 (라우트당 {a.requests}회 x 동시성 {a.concurrency})")
+    print(f"{'backend':<12} {'route':<24} {'req/s':>8} {'p50(ms)':>9} {'p99(ms)':>9} {'err':>5}")
+    print("-" * 72)
+    for label, url in backends:
+        env = dict(os.environ, DATABASE_URL=url)
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child",
+                               "--requests", str(a.requests), "--concurrency", str(a.concurrency)],
+                              env=env, cwd=tempfile.mkdtemp(prefix="bench_db_"), capture_output=True, text=True, encoding="utf-8")
+        line = next((l for l in proc.stdout.splitlines() if l.startswith("BENCH_RESULT ")), None)
+        if not line:
+            print(f"{label:<12} ❌ 실행 실패\n{proc.stderr[-500:]}")
+            continue
+        for r in json.loads(line[len("BENCH_RESULT "):]):
+            print(f"{label:<12} {r['route']:<24} {r['rps']:>8.1f} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['errors']:>5}")
+
+
+if __name__ == "__main__":
+    main()
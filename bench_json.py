@@ -0,0 +1,122 @@
+# ==========================================
+# 목록 응답 직렬화 벤치마크 (키워드 1만개 기준)
+# ==========================================
+# 같은 네이버 응답(모의 데이터)으로 응답 모양 만들기 + 직렬화 시간을 비교. 네트워크/DB 없음.
+#   기존        : {**x, "stats": ...} / 키워드마다 새 stats dict -> jsonable_encoder -> JSONResponse
+#   fast(json)  : 받은 dict 에 stats 부착 + 빈 실적 공유 -> FastJSONResponse (stdlib)
+#   fast(orjson): 위와 같음, orjson (설치 시)
+#   python bench_json.py --keywords 10000 --runs 7
+import os
+import sys
+import time
+import random
+import argparse
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import fast_json
+from bench_load import percentile
+from mock_naver import fake_stat
+
+
+def make_payload(n, seed=1):
+    rnd = random.Random(seed)
+    keywords, stats = [], {}
+    for i in range(n):
+        kid = f"nkw-a001-01-{i:016d}"
+        keywords.append({
+            "nccKeywordId": kid, "nccAdgroupId": "grp-a001-01-00000000001", "nccCampaignId": "cmp-a001-01-00000000001",
+            "customerId": 1000000, "keyword": f"키워드{i}", "bidAmt": rnd.randint(70, 5000), "useGroupBidAmt": False,
+            "userLock": False, "status": "ELIGIBLE", "statusReason": "ELIGIBLE", "inspectStatus": "APPROVED",
+            "regTm": "2024-01-01T00:00:00.000Z", "editTm": "2024-01-01T00:00:00.000Z",
+            "links": {"pc": {"final": "https://example.com"}, "mobile": {"final": "https://m.example.com"}},
+        })
+        if rnd.random() < 0.3: stats[kid] = fake_stat(kid, "2024-01-01", "2024-01-01")  # 실적 있는 키워드는 일부
+    return keywords, stats
+
+
+format_stats = None  # main() 에서 server.format_stats 로 교체
+
+
+def old_format_stats(s):
+    return dict(format_stats(s))  # 예전처럼 키워드마다 새 dict
+
+
+def new_format_stats(s):
+    return format_stats(s)
+
+
+def shape_keywords(k, s, fmt):
+    return [{
+        "nccKeywordId": x['nccKeywordId'], "nccAdGroupId": x['nccAdgroupId'], "keyword": x['keyword'],
+        "bidAmt": x['bidAmt'], "status": x['status'], "managedStatus": "ON" if x['status'] == 'ELIGIBLE' else "OFF",
+        "stats": fmt(s.get(x['nccKeywordId']))
+    } for x in k]
+
+
+def case_old_keywords(k, s):
+    return JSONResponse(jsonable_encoder(shape_keywords(k, s, old_format_stats))).body
+
+
+def case_old_full(k, s):
+    # list_camps / list_groups 방식 (원본 필드 전부 + stats)
+    return JSONResponse(jsonable_encoder([{**x, "stats": old_format_stats(s.get(x['nccKeywordId']))} for x in k])).body
+
+
+def case_fast_keywords(dumps):
+    return lambda k, s: dumps(shape_keywords(k, s, new_format_stats))
+
+
+def case_fast_full(dumps):
+    def run(k, s):
+        for x in k: x["stats"] = new_format_stats(s.get(x['nccKeywordId']))
+        return dumps(k)
+    return run
+
+
+def measure(fn, n, runs):
+    times, size = [], 0
+    for _ in range(runs):
+        k, s = make_payload(n)  # 매 회 새 데이터 (in-place 변경 영향 제거)
+        t0 = time.perf_counter()
+        size = len(fn(k, s))
+        times.append((time.perf_counter() - t0) * 1000)
+    return percentile(times, 50), min(times), size
+
+
+def main():
+    p = argparse.ArgumentParser(description="목록 응답 직렬화 벤치마크")
+    p.add_argument("--keywords", type=int, default=10000)
+    p.add_argument("--runs", type=int, default=7)
+    a = p.parse_args()
+
+    global format_stats
+    import io, contextlib
+    with contextlib.redirect_stdout(io.StringIO()): import server  # 시작 배너 숨김
+    format_stats = server.format_stats
+
+    cases = [
+        ("keywords 기존", case_old_keywords),
+        ("keywords fast(json)", case_fast_keywords(fast_json._dumps_std)),
+        ("full 기존", case_old_full),
+        ("full fast(json)", case_fast_full(fast_json._dumps_std)),
+    ]
+    if fast_json.orjson:
+        cases.insert(2, ("keywords fast(orjson)", case_fast_keywords(fast_json._dumps_orjson)))
+        cases.append(("full fast(orjson)", case_fast_full(fast_json._dumps_orjson)))
+
+    print(f"\n📦 직렬화 벤치마크 (키워드 {a.keywords:,}개, {a.runs}회)  keywords=/api/keywords 모양, full=원본 필드+stats")
+    print(f"{'case':<24} {'p50(ms)':>9} {'min(ms)':>9} {'bytes':>11}")
+    print("-" * 56)
+    for name, fn in cases:
+        p50, best, size = measure(fn, a.keywords, a.runs)
+        print(f"{name:<24} {p50:>9.1f} {best:>9.1f} {size:>11,}")
+    if not fast_json.orjson: print("ℹ️  orjson 미설치 - pip install orjson 후 다시 실행하면 orjson 결과도 표시")
+
+
+if __name__ == "__main__":
+    main()
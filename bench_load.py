@@ -0,0 +1,122 @@
+# ==========================================
+# 엔드투엔드 부하 벤치마크 (FastAPI 앱 + 모의 네이버 API)
+# ==========================================
+# 실 API 를 전혀 호출하지 않음. 모의 서버와 server.py 를 각각 로컬 포트로 띄우고
+# 라우트별 처리량 / p50 / p99 / 요청당 upstream 호출 수를 출력.
+#   python bench_load.py --requests 200 --concurrency 16 --latency-ms 50 --rps 50
+import os
+import sys
+import time
+import socket
+import tempfile
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_in_thread(app, port):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error", log_config=None))
+    t = threading.Thread(target=server.run, daemon=True)
+    t.start()
+    while not server.started: time.sleep(0.05)
+    return server
+
+
+def percentile(values, p):
+    if not values: return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))]
+
+
+def run_route(api_url, mock_url, headers, path, n, concurrency):
+    requests.post(f"{mock_url}/_mock/reset")
+    lat, errors = [], 0
+    session = requests.Session()
+
+    def one(_):
+        t0 = time.perf_counter()
+        r = session.get(api_url + path, headers=headers)
+        return time.perf_counter() - t0, r.status_code
+
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        for dt, code in ex.map(one, range(n)):
+            lat.append(dt)
+            if code != 200: errors += 1
+    wall = time.perf_counter() - t_start
+    stats = requests.get(f"{mock_url}/_mock/stats").json()
+    upstream = sum(v for k, v in stats.items() if k != "429")
+    return {
+        "route": path, "n": n, "errors": errors, "rps": n / wall if wall else 0,
+        "p50_ms": percentile(lat, 50) * 1000, "p99_ms": percentile(lat, 99) * 1000,
+        "upstream_per_req": upstream / n, "upstream_429": stats.get("429", 0),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="라우트별 부하 벤치마크 (모의 네이버 API 사용)")
+    p.add_argument("--requests", type=int, default=100, help="라우트당 요청 수")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--campaigns", type=int, default=3)
+    p.add_argument("--groups", type=int, default=10)
+    p.add_argument("--keywords", type=int, default=100)
+    p.add_argument("--latency-ms", type=float, default=30)
+    p.add_argument("--jitter-ms", type=float, default=10)
+    p.add_argument("--rps", type=float, default=0, help="모의 서버 고객별 초당 호출 제한 (0=무제한)")
+    p.add_argument("--routes", nargs="*", help="측정할 라우트만 지정 (예: /api/campaigns)")
+    a = p.parse_args()
+
+    from mock_naver import MockConfig, create_mock_app
+    mock_port, api_port = free_port(), free_port()
+    mock_url, api_url = f"http://127.0.0.1:{mock_port}", f"http://127.0.0.1:{api_port}"
+    cfg = MockConfig(a.campaigns, a.groups, a.keywords, 3, 2, a.latency_ms, a.jitter_ms, a.rps)
+    serve_in_thread(create_mock_app(cfg), mock_port)
+
+    # server.py 는 import 시점에 BASE_URL / DB 를 잡으므로 임시 디렉터리에서 import
+    os.environ["NAVER_API_BASE_URL"] = mock_url
+    sys.path.insert(0, BASE_DIR)
+    os.chdir(tempfile.mkdtemp(prefix="bench_"))
+    import server
+    serve_in_thread(server.app, api_port)
+
+    # 첫 가입자 = 관리자 (승인 없이 API 사용 가능)
+    requests.post(f"{api_url}/auth/register", json={"username": "bench", "password": "bench", "name": "bench", "phone": "-"})
+    token = requests.post(f"{api_url}/auth/token", data={"username": "bench", "password": "bench"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    requests.put(f"{api_url}/users/me/keys", headers=headers,
+                 json={"naver_access_key": "mock-key", "naver_secret_key": "mock-secret", "naver_customer_id": "1000000"})
+
+    camps = requests.get(f"{api_url}/api/campaigns", headers=headers).json()
+    cmp_id = camps[0]["nccCampaignId"]
+    grp_id = requests.get(f"{api_url}/api/adgroups?campaign_id={cmp_id}", headers=headers).json()[0]["nccAdgroupId"]
+    routes = a.routes or [
+        "/api/campaigns",
+        f"/api/adgroups?campaign_id={cmp_id}",
+        f"/api/keywords?adgroup_id={grp_id}",
+        f"/api/ads?campaign_id={cmp_id}",
+        f"/api/extensions?campaign_id={cmp_id}",
+        "/api/tool/ip-exclusion",
+    ]
+
+    print(f"\n📊 부하 벤치마크 (요청 {a.requests}회 x 동시성 {a.concurrency}, upstream 지연 {a.latency_ms}±{a.jitter_ms}ms, 제한 {a.rps or '∞'}rps)")
+    print(f"{'route':<45} {'req/s':>8} {'p50(ms)':>9} {'p99(ms)':>9} {'up/req':>7} {'429':>5} {'err':>4}")
+    print("-" * 92)
+    for path in routes:
+        r = run_route(api_url, mock_url, headers, path, a.requests, a.concurrency)
+        label = path.split("?")[0] + ("?…" if "?" in path else "")
+        print(f"{label:<45} {r['rps']:>8.1f} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['upstream_per_req']:>7.1f} {r['upstream_429']:>5} {r['errors']:>4}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# ==========================================
+# 키워드 10만개 메모리 사용량 비교 (dict vs KeywordTable)
+# ==========================================
+# 네이버 응답 JSON 을 파싱해서 들고 있을 때 남는 메모리(tracemalloc)를 측정.
+#   dict  : 파싱한 키워드 dict + 키워드마다 format_stats dict (기존 방식)
+#   table : KeywordTable.from_api 로 키워드 + 실적을 1회 변환 후 원본은 버림 (입찰 계산에 필요한 컬럼만)
+#   python bench_memory.py --keywords 100000
+import gc
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+from keyword_table import KeywordTable
+
+
+def make_json(n, seed=1):
+    # GET /ncc/keywords + /stats 응답 모양 (바이트) - 파싱 결과가 실제와 같은 문자열 객체가 되도록
+    rnd = random.Random(seed)
+    groups = max(1, n // 200)
+    kws, stats = [], []
+    for i in range(n):
+        kid = f"nkw-a001-01-{i:016d}"
+        kws.append({
+            "nccKeywordId": kid, "nccAdgroupId": f"grp-a001-01-{i % groups:011d}",
+            "nccCampaignId": "cmp-a001-01-00000000001", "customerId": 1000000, "keyword": f"키워드{i}",
+            "bidAmt": rnd.randint(70, 5000), "useGroupBidAmt": False, "userLock": False, "status": "ELIGIBLE",
+            "statusReason": "ELIGIBLE", "inspectStatus": "APPROVED",
+            "regTm": "2024-01-01T00:00:00.000Z", "editTm": "2024-01-01T00:00:00.000Z",
+        })
+        imp = rnd.randint(0, 5000)
+        clk = rnd.randint(0, imp // 20 + 1)
+        stats.append({"id": kid, "impCnt": imp, "clkCnt": clk, "salesAmt": clk * rnd.randint(70, 900),
+                      "ccnt": rnd.randint(0, clk // 10 + 1), "avgRnk": round(rnd.uniform(1, 15), 1), "convAmt": rnd.randint(0, 50000)})
+    return json.dumps(kws).encode(), json.dumps({"data": stats}).encode()
+
+
+def format_stats(s):
+    # server.format_stats 와 같은 변환 (server import 없이 측정)
+    imp, clk, cost, conv, c_amt = int(s['impCnt']), int(s['clkCnt']), int(s['salesAmt']), int(s['ccnt']), int(s['convAmt'])
+    return {"impressions": imp, "clicks": clk, "cost": cost, "ctr": round(clk / imp * 100, 2) if imp > 0 else 0,
+            "cpc": round(cost / clk, 0) if clk > 0 else 0, "conversions": conv, "cpa": round(cost / conv, 0) if conv > 0 else 0,
+            "roas": round(c_amt / cost * 100, 0) if cost > 0 else 0, "convAmt": c_amt}
+
+
+def build_dicts(kw_json, st_json):
+    kws = json.loads(kw_json)
+    stats = {s["id"]: s for s in json.loads(st_json)["data"]}
+    for k in kws: k["stats"] = format_stats(stats[k["nccKeywordId"]])
+    return kws
+
+
+def build_table(kw_json, st_json):
+    return KeywordTable.from_api(json.loads(kw_json), {s["id"]: s for s in json.loads(st_json)["data"]})
+
+
+def measure(build, *args):
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    obj = build(*args)
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, retained - base, peak - base, elapsed
+
+
+def main():
+    p = argparse.ArgumentParser(description="키워드 메모리 표현 비교")
+    p.add_argument("--keywords", type=int, default=100000)
+    a = p.parse_args()
+
+    kw_json, st_json = make_json(a.keywords)
+    print(f"\n🧮 키워드 {a.keywords:,}개 (응답 JSON {len(kw_json) + len(st_json):,} bytes)")
+    print(f"{'표현':<8} {'유지(MB)':>10} {'키워드당(B)':>12} {'최대(MB)':>10} {'변환(ms)':>10}")
+    print("-" * 56)  # 변환 시간은 tracemalloc 오버헤드 포함 (상대 비교용)
+    for name, build in (("dict", build_dicts), ("table", build_table)):
+        obj, retained, peak, elapsed = measure(build, kw_json, st_json)
+        print(f"{name:<8} {retained / 2**20:>10.1f} {retained / a.keywords:>12.0f} {peak / 2**20:>10.1f} {elapsed * 1000:>10.0f}")
+        if isinstance(obj, KeywordTable):
+            print(f"         (숫자 컬럼 {obj.nbytes() / 2**20:.1f} MB, 나머지는 id 문자열 + 인덱스)")
+        del obj
+
+
+if __name__ == "__main__":
+    main()
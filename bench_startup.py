@@ -0,0 +1,117 @@
+# ==========================================
+# 서버 기동 시간 벤치마크 (import -> 첫 응답)
+# ==========================================
+# 매 회 새 프로세스로 측정 (import 캐시 영향 없음, .pyc 는 첫 회에 생성됨)
+#   cold : python server.py 실행 ~ GET / 첫 200 응답까지 (사용자가 체감하는 시간)
+#   split: 같은 프로세스 안에서 import / lifespan(DB 초기화) / 첫 응답 구간별 시간
+#   python bench_startup.py --runs 5
+#   python bench_startup.py --importtime 15     # import 가 느린 모듈 상위 15개
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import subprocess
+import urllib.request
+
+from bench_load import free_port, percentile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER = os.path.join(BASE_DIR, "server.py")
+
+
+def run_split():
+    # (자식 프로세스) 구간별 시간을 JSON 으로 출력
+    t0 = time.perf_counter()
+    sys.path.insert(0, BASE_DIR)
+    import server
+    t1 = time.perf_counter()
+    from fastapi.testclient import TestClient
+    t2 = time.perf_counter()
+    with TestClient(server.app) as c:
+        t3 = time.perf_counter()
+        code = c.get("/").status_code
+        t4 = time.perf_counter()
+    print("BENCH_RESULT " + json.dumps({"import_ms": (t1 - t0) * 1000, "lifespan_ms": (t3 - t2) * 1000,
+                                        "first_ms": (t4 - t3) * 1000, "status": code}))
+
+
+def child_env():
+    d = tempfile.mkdtemp(prefix="bench_startup_")
+    return d, dict(os.environ, DATABASE_URL="sqlite:///" + os.path.join(d, "app.db"), PYTHONIOENCODING="utf-8")
+
+
+def run_cold(timeout=30):
+    cwd, env = child_env()
+    port = free_port()
+    env["PORT"] = str(port)
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, SERVER], cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - t0 < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as r:
+                    if r.status == 200: return (time.perf_counter() - t0) * 1000
+            except OSError:
+                if proc.poll() is not None: return None
+                time.sleep(0.005)
+        return None
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def run_importtime(top):
+    cwd, env = child_env()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, {BASE_DIR!r}); import server"],
+                          cwd=cwd, env=env, capture_output=True, text=True, encoding="utf-8")
+    # 출력은 자식 -> 부모 순서. 들여쓰기 1단계(직속 import)를 모아두다가 server 줄에서 확정
+    rows, pending = [], []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        _, cum, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        if level == 1: pending.append((int(cum), name.strip()))
+        elif level == 0:
+            if name.strip() == "server": rows = pending + [(int(cum), "server (합계)")]
+            pending = []
+    print(f"\n📦 server import 상위 {top}개 (누적, ms)")
+    for cum, name in sorted(rows, reverse=True)[:top]: print(f"{cum / 1000:>9.1f}  {name}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="server.py 기동 시간 벤치마크")
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--importtime", type=int, default=0, help="import 가 느린 모듈 상위 N개 출력")
+    p.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    a = p.parse_args()
+
+    if a.child:
+        return run_split()
+
+    cold, split = [], []
+    for _ in range(a.runs):
+        ms = run_cold()
+        if ms is not None: cold.append(ms)
+        cwd, env = child_env()
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"], cwd=cwd, env=env,
+                              capture_output=True, text=True, encoding="utf-8")
+        line = next((l for l in proc.stdout.splitlines() if l.startswith("BENCH_RESULT ")), None)
+        if line: split.append(json.loads(line[len("BENCH_RESULT "):]))
+        else: print(f"❌ 실행 실패\n{proc.stderr[-500:]}")
+
+    print(f"\n⏱️  기동 시간 ({a.runs}회, 프로세스 새로 띄움)")
+    print(f"{'구간':<28} {'p50(ms)':>9} {'max(ms)':>9}")
+    print("-" * 48)
+    rows = [("cold: 실행 ~ 첫 200 응답", cold)]
+    for key, label in (("import_ms", "import server"), ("lifespan_ms", "lifespan (DB 초기화)"), ("first_ms", "첫 응답 (GET /)")):
+        rows.append((label, [s[key] for s in split]))
+    for label, vals in rows:
+        if vals: print(f"{label:<28} {percentile(vals, 50):>9.1f} {max(vals):>9.1f}")
+        else: print(f"{label:<28} {'실패':>9}")
+    if a.importtime: run_importtime(a.importtime)
+
+
+if __name__ == "__main__":
+    main()
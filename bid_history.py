@@ -0,0 +1,179 @@
+# ==========================================
+# 입찰 변경 이력 저장소 (append-only, 배치 쓰기, 키워드/시간 인덱스)
+# ==========================================
+# 예전: 요청마다 일별 CSV 를 열어 append -> "이 키워드 입찰가 왜 바뀌었지?" = CSV grep
+# 지금: bid_changes 테이블 (day 컬럼으로 일 단위 분할 + 보존기간 지나면 일 단위 삭제)
+#   - append() 는 메모리 버퍼에만 넣고, 백그라운드 스레드가 FLUSH_SEC 마다 bulk insert
+#   - 조회 전에는 flush() 로 버퍼를 비워서 방금 들어온 이력도 보이게 함
+#   - insert 가 실패하면 행을 버퍼 앞에 되돌려 다음 주기에 다시 시도 (BUFFER_MAX 넘으면 오래된 것부터 버림)
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, Integer, String, DateTime, Index, insert, func, case
+
+from database import Base, SessionLocal
+
+FLUSH_SEC = float(os.environ.get("BID_HISTORY_FLUSH_SEC", "1.0"))
+FLUSH_ROWS = int(os.environ.get("BID_HISTORY_FLUSH_ROWS", "500"))
+RETENTION_DAYS = int(os.environ.get("BID_HISTORY_RETENTION_DAYS", "180"))
+BUFFER_MAX = int(os.environ.get("BID_HISTORY_BUFFER_MAX", "50000"))
+
+
+class BidChange(Base):
+    __tablename__ = "bid_changes"
+    id = Column(Integer, primary_key=True)
+    ts = Column(DateTime, default=datetime.now, nullable=False)
+    day = Column(String(10), nullable=False)
+    user_id = Column(Integer, nullable=True)
+    keyword_id = Column(String, nullable=True)
+    keyword = Column(String, nullable=True)
+    adgroup_id = Column(String, nullable=True)
+    old_bid = Column(Integer)
+    new_bid = Column(Integer)
+    delta = Column(Integer)
+    reason = Column(String, nullable=True)
+    source = Column(String, nullable=True)
+    client_time = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_bid_changes_keyword_ts", "keyword", "ts"),
+        Index("ix_bid_changes_keyword_id_ts", "keyword_id", "ts"),
+        Index("ix_bid_changes_user_day", "user_id", "day"),
+    )
+
+
+class BidHistoryWriter:
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._buf = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._last_purge_day = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="bid-history-writer", daemon=True)
+            self._thread.start()
+
+    def append(self, rows):
+        now = datetime.now()
+        prepared = []
+        for r in rows:
+            old, new, ts = r.get("old_bid"), r.get("new_bid"), r.get("ts") or now
+            prepared.append({
+                "ts": ts, "day": ts.strftime("%Y-%m-%d"), "user_id": r.get("user_id"),
+                "keyword_id": r.get("keyword_id"), "keyword": r.get("keyword"), "adgroup_id": r.get("adgroup_id"),
+                "old_bid": old, "new_bid": new, "delta": (new - old) if old is not None and new is not None else None,
+                "reason": r.get("reason"), "source": r.get("source"), "client_time": r.get("client_time"),
+            })
+        with self._lock:
+            self._buf.extend(prepared)
+            full = len(self._buf) >= FLUSH_ROWS
+        if full: self._wake.set()
+        return len(prepared)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buf = self._buf, []
+            if not rows: return 0
+            try:
+                with self.session_factory() as db:
+                    db.execute(insert(BidChange), rows)
+                    db.commit()
+            except Exception:
+                with self._lock:
+                    self._buf[:0] = rows  # 그 사이 들어온 행보다 앞에 (순서 유지)
+                    dropped = len(self._buf) - BUFFER_MAX
+                    if dropped > 0:
+                        del self._buf[:dropped]
+                        print(f"[BidHistory] 버퍼 {BUFFER_MAX}행 초과 -> 오래된 {dropped}행 버림")
+                raise
+            self._maybe_purge()
+            return len(rows)
+
+    def _maybe_purge(self):
+        # 일 단위 회전: 하루 한 번 보존기간 지난 day 삭제
+        today = datetime.now().strftime("%Y-%m-%d")
+        if self._last_purge_day == today or RETENTION_DAYS <= 0: return
+        self._last_purge_day = today
+        cutoff = (datetime.now() - timedelta(days=RETENTION_DAYS)).strftime("%Y-%m-%d")
+        with self.session_factory() as db:
+            db.query(BidChange).filter(BidChange.day < cutoff).delete(synchronize_session=False)
+            db.commit()
+
+    def _run(self):
+        while True:
+            self._wake.wait(FLUSH_SEC)
+            self._wake.clear()
+            try: self.flush()
+            except Exception as e: print(f"[BidHistory] flush 실패 (다음 주기에 재시도, 대기 {len(self._buf)}행): {e}")
+
+
+writer = BidHistoryWriter()
+
+
+# ==========================================
+# 조회
+# ==========================================
+def _scoped(q, user):
+    # 관리자는 전체, 일반 사용자는 본인 이력만
+    return q if user.is_superuser else q.filter(BidChange.user_id == user.id)
+
+
+def row_to_dict(r):
+    return {"id": r.id, "ts": r.ts.strftime("%Y-%m-%d %H:%M:%S"), "keywordId": r.keyword_id, "keyword": r.keyword,
+            "adGroupId": r.adgroup_id, "oldBid": r.old_bid, "newBid": r.new_bid, "delta": r.delta,
+            "reason": r.reason, "source": r.source}
+
+
+def keyword_history(db, user, keyword=None, keyword_id=None, since=None, until=None, limit=500):
+    q = _scoped(db.query(BidChange), user)
+    if keyword_id: q = q.filter(BidChange.keyword_id == keyword_id)
+    if keyword: q = q.filter(BidChange.keyword == keyword)
+    if since: q = q.filter(BidChange.day >= since)
+    if until: q = q.filter(BidChange.day <= until)
+    return [row_to_dict(r) for r in q.order_by(BidChange.ts.desc()).limit(limit)]
+
+
+def daily_summary(db, user, since, until):
+    q = _scoped(db.query(
+        BidChange.day,
+        func.count(BidChange.id),
+        func.sum(case((BidChange.delta > 0, 1), else_=0)),
+        func.sum(case((BidChange.delta < 0, 1), else_=0)),
+        func.coalesce(func.sum(BidChange.delta), 0),
+        func.count(func.distinct(func.coalesce(BidChange.keyword_id, BidChange.keyword))),
+    ), user).filter(BidChange.day >= since, BidChange.day <= until)
+    return [{"day": d, "changes": n, "raised": up or 0, "lowered": down or 0, "netDelta": int(net or 0), "keywords": kw}
+            for d, n, up, down, net, kw in q.group_by(BidChange.day).order_by(BidChange.day)]
+
+
+def bid_timeline(db, user, since):
+    # since 이후 변경 -> {keywordId 또는 키워드: [(day, old, new), ...]} (시간순) - backtest 일별 입찰가 복원용
+    out = {}
+    q = _scoped(db.query(BidChange.keyword_id, BidChange.keyword, BidChange.day, BidChange.old_bid, BidChange.new_bid), user)
+    for kid, kw, day, old, new in q.filter(BidChange.day >= since).order_by(BidChange.ts):
+        out.setdefault(kid or kw, []).append((day, old, new))
+    return out
+
+
+def iter_csv(db, user, since, until, chunk=2000):
+    # CSV 스트리밍 (엑셀 호환 BOM) - 전체를 메모리에 올리지 않음
+    import csv
+    import io
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    yield "﻿"
+    w.writerow(["시간", "키워드", "키워드ID", "그룹ID", "기존", "변경", "변동", "사유", "출처"])
+    q = _scoped(db.query(BidChange), user).filter(BidChange.day >= since, BidChange.day <= until)
+    for i, r in enumerate(q.order_by(BidChange.ts).yield_per(chunk)):
+        w.writerow([r.ts.strftime("%Y-%m-%d %H:%M:%S"), r.keyword, r.keyword_id, r.adgroup_id,
+                    r.old_bid, r.new_bid, r.delta, r.reason, r.source])
+        if i % 500 == 0:
+            yield buf.getvalue()
+            buf.seek(0); buf.truncate()
+    yield buf.getvalue()
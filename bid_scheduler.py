@@ -0,0 +1,157 @@
+# ==========================================
+# 키워드별 적응형 입찰 주기 (다음 확인 시각 기준 우선순위 큐)
+# ==========================================
+# 매 사이클 전체 키워드를 다시 보면 노출 0 키워드와 상위 지출 키워드가 같은 API 예산을 나눠 씀.
+# 키워드마다 "다음 확인 시각"을 두고 heapq 로 가장 급한 것부터 꺼냄 (한 번에 예산만큼):
+#   상한 주기 : 최근 지출이 클수록 짧게 MAX / (1 + 비용/COST_UNIT), 순위 변동(EWMA)이 클수록 더 짧게
+#               노출도 비용도 0 이면 MAX (휴면)
+#   확인 결과 : 순위가 움직였거나 입찰가를 바꿨으면 주기 절반 (MIN 까지), 그대로면 1.5배 (상한 주기까지)
+# -> 예산은 움직이는/돈 쓰는 키워드에 몰리고, 휴면 키워드는 MAX 마다 한 번만 확인.
+# client_master.loop_bid (추정가 변화) / auto_manager.run_adaptive_bidder (순위 변화) 가 같이 씀 - 표준 라이브러리만 사용.
+# 순위 -> 다음 입찰가 판단 (decide_bid) 도 여기: auto_manager 와 backtest 가 같은 함수/기본값을 씀
+# (backtest 는 서버에서도 돌아서 requests / API 키가 있는 auto_manager 를 import 하지 않음)
+#   BID_SCHED_MIN / BID_SCHED_MAX : 최소/최대 주기 초 (기본 60 / 3600)
+#   BID_SCHED_COST_UNIT           : 상한 주기를 절반으로 만드는 최근 7일 지출 (기본 10000원)
+import os
+import time
+import heapq
+import itertools
+
+BID_SCHED_MIN = float(os.environ.get("BID_SCHED_MIN", "60"))
+BID_SCHED_MAX = float(os.environ.get("BID_SCHED_MAX", "3600"))
+BID_SCHED_COST_UNIT = float(os.environ.get("BID_SCHED_COST_UNIT", "10000"))
+TARGET_RANK = 3.0      # 목표 순위
+MAX_BID_CAP = 10000    # 입찰가 상한선
+MIN_BID_CAP = 70       # 최소 입찰가
+PROBE_LIMIT = 3000     # 탐색 입찰 한계값 (이 금액 이상은 순위 0이어도 인상 안 함)
+BID_STEP = 300         # 입찰가 조정 단위
+RANK_MOVE = 0.5   # 이 이상 바뀌면 "움직임"
+VOL_ALPHA = 0.3   # 순위 변동 EWMA 가중치
+GROW, SHRINK = 1.5, 0.5
+
+
+class _Entry:
+    __slots__ = ("interval", "due", "rank", "vol", "cost", "imp", "ver")
+
+    def __init__(self):
+        self.interval = self.due = 0.0
+        self.rank = None
+        self.vol = 0.0
+        self.cost = self.imp = 0
+        self.ver = 0
+
+
+class BidScheduler:
+    def __init__(self, min_interval=BID_SCHED_MIN, max_interval=BID_SCHED_MAX, cost_unit=BID_SCHED_COST_UNIT, clock=time.time):
+        self.min_interval, self.max_interval, self.cost_unit = min_interval, max_interval, cost_unit
+        self.clock = clock
+        self._entries = {}
+        self._heap = []  # (due, seq, kid, ver) - 일정이 바뀌면 새로 넣고 예전 것은 꺼낼 때 버림
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, kid):
+        return kid in self._entries
+
+    def ids(self):
+        return set(self._entries)
+
+    def ceiling(self, e):
+        if not e.cost and not e.imp: return self.max_interval
+        c = self.max_interval / (1 + e.cost / self.cost_unit) / (1 + e.vol)
+        return max(self.min_interval, min(self.max_interval, c))
+
+    def _push(self, kid, e, due):
+        e.due, e.ver = due, e.ver + 1
+        heapq.heappush(self._heap, (due, next(self._seq), kid, e.ver))
+
+    def upsert(self, kid, cost=0, imp=0, now=None):
+        # 새 키워드는 바로 확인 대상. 기존 키워드는 지출만 갱신하고, 상한이 줄었으면 일정을 당김
+        now = self.clock() if now is None else now
+        e = self._entries.get(kid)
+        if e is None:
+            e = self._entries[kid] = _Entry()
+            e.cost, e.imp = cost, imp
+            e.interval = self.ceiling(e)
+            self._push(kid, e, now)
+            return
+        e.cost, e.imp = cost, imp
+        cap = self.ceiling(e)
+        if e.interval > cap:
+            e.interval = cap
+            if e.due > now + cap: self._push(kid, e, now + cap)
+
+    def remove(self, kid):
+        self._entries.pop(kid, None)
+
+    def pop_due(self, limit=None, now=None):
+        # 확인할 때가 된 키워드 (급한 순). 꺼낸 키워드는 현재 주기로 다시 예약 -> report() 가 없어도 빠지지 않음
+        now = self.clock() if now is None else now
+        out = []
+        while self._heap and self._heap[0][0] <= now and (limit is None or len(out) < limit):
+            _, _, kid, ver = heapq.heappop(self._heap)
+            e = self._entries.get(kid)
+            if e is None or e.ver != ver: continue
+            self._push(kid, e, now + e.interval)
+            out.append(kid)
+        return out
+
+    def report(self, kid, rank=None, changed=False, now=None):
+        # 확인 결과 반영 -> 다음 주기(초)
+        e = self._entries.get(kid)
+        if e is None: return None
+        now = self.clock() if now is None else now
+        moved = False
+        if rank is not None:
+            if e.rank is not None:
+                delta = abs(rank - e.rank)
+                e.vol = (1 - VOL_ALPHA) * e.vol + VOL_ALPHA * delta
+                moved = delta >= RANK_MOVE
+            e.rank = rank
+        if changed or moved: e.interval = max(self.min_interval, e.interval * SHRINK)
+        else: e.interval = min(self.ceiling(e), e.interval * GROW)
+        self._push(kid, e, now + e.interval)
+        return e.interval
+
+    def next_due_in(self, now=None):
+        now = self.clock() if now is None else now
+        while self._heap:
+            due, _, kid, ver = self._heap[0]
+            e = self._entries.get(kid)
+            if e is not None and e.ver == ver: return max(0.0, due - now)
+            heapq.heappop(self._heap)
+        return self.max_interval
+
+    def summary(self):
+        # 주기 구간별 키워드 수 (상태 표시용)
+        bands = {"≤5분": 0, "≤30분": 0, "30분+": 0}
+        for e in self._entries.values():
+            bands["≤5분" if e.interval <= 300 else "≤30분" if e.interval <= 1800 else "30분+"] += 1
+        return bands
+
+
+# [알고리즘] 순위 -> 다음 입찰가. backtest.py 가 같은 함수로 과거 데이터를 재생하므로 부수효과 없이 숫자만
+PROBE, WAIT, RAISE, LOWER, AT_MIN, KEEP = range(6)
+REASONS = ("노출유도", "데이터지연", "순위밀림({rank})", "과잉노출({rank})", "최소금액", "")
+
+
+def decide_bid(cur_bid, cur_rank, target_rank=TARGET_RANK, bid_step=BID_STEP, probe_limit=PROBE_LIMIT,
+               min_bid=MIN_BID_CAP, max_bid=MAX_BID_CAP):
+    """(새 입찰가, 판단 코드) - 순위 0 은 노출 데이터 없음"""
+    if cur_rank == 0.0:
+        if cur_bid >= probe_limit: return cur_bid, WAIT
+        new_bid, code = cur_bid + bid_step, PROBE
+    elif cur_rank > target_rank:
+        new_bid, code = cur_bid + bid_step, RAISE
+    elif cur_rank < target_rank:
+        if cur_bid <= min_bid: return cur_bid, AT_MIN
+        new_bid, code = cur_bid - bid_step, LOWER
+    else:
+        return cur_bid, KEEP
+
+    # 안전장치
+    if new_bid > max_bid: new_bid = max_bid
+    if new_bid < min_bid: new_bid = min_bid
+    return new_bid, code
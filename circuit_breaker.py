@@ -0,0 +1,161 @@
+# ==========================================
+# 네이버 API 서킷 브레이커 (고객별 + 전체) + 복구 확인 프로브
+# ==========================================
+# 429 / 연결 끊김이 시작되면 call_api_sync 가 모든 사용자 요청마다 재시도 -> 차단이 더 길어짐.
+# 최근 CB_WINDOW 초 동안의 실패율로 상태 전환:
+#   closed    : 정상. 실패율 >= CB_ERROR_RATE (최소 CB_MIN_CALLS 건) 이면 open
+#   open      : 호출하지 않고 바로 UpstreamUnavailable (-> 503 + Retry-After). 입찰 작업도 시작 전에 멈춤
+#   half_open : 쿨다운이 지나면 백그라운드 프로브가 /ncc/campaigns 1회 노크 (check_door.knock_knock 과 같은 호출)
+#               성공 -> closed, 실패 -> 다시 open (쿨다운 2배씩, 최대 CB_MAX_COOLDOWN)
+# 범위: "cust:{고객ID}" (그 고객의 429/오류) + "global" (연결 끊김/5xx - IP 단위 차단)
+# 상태는 shared_state 저장소 -> 워커 여러 개여도 한 워커가 열면 같이 멈춤. 실패율 집계는 워커별.
+# 상태 키는 TTL (until + CB_MAX_COOLDOWN) -> 프로브가 돌지 못해도 영구히 막히지 않음.
+# 프로브 auth 는 이 워커가 최근 쓴 것, 없으면 auth_for(고객ID) 로 DB 에서 (재기동 / 연 워커가 죽은 경우).
+import os
+import time
+import threading
+from collections import deque
+
+import metrics
+import shared_state
+
+CB_WINDOW = float(os.environ.get("CB_WINDOW", "30"))
+CB_MIN_CALLS = int(os.environ.get("CB_MIN_CALLS", "10"))
+CB_ERROR_RATE = float(os.environ.get("CB_ERROR_RATE", "0.5"))
+CB_COOLDOWN = float(os.environ.get("CB_COOLDOWN", "15"))
+CB_MAX_COOLDOWN = float(os.environ.get("CB_MAX_COOLDOWN", "300"))
+CB_PROBE_INTERVAL = float(os.environ.get("CB_PROBE_INTERVAL", "5"))
+GLOBAL = "global"
+
+SHORT_CIRCUITS = metrics.REGISTRY.register(metrics.Counter(
+    "naver_api_short_circuit_total", "서킷 브레이커로 호출 없이 실패한 수", ("scope",)))
+CIRCUIT_OPEN = metrics.REGISTRY.register(metrics.Gauge(
+    "naver_circuit_open", "서킷 브레이커 상태 (0=closed, 1=open, 0.5=half_open)", ("scope",)))
+
+
+class UpstreamUnavailable(Exception):
+    def __init__(self, scope, retry_after):
+        super().__init__(f"네이버 API 일시 차단 중 ({scope}) - {retry_after:.0f}초 후 다시 시도")
+        self.scope, self.retry_after = scope, retry_after
+
+
+def knock(base_url, headers, timeout=5):
+    # 가장 가벼운 조회 1회 (캠페인 목록) -> (성공 여부, 상태코드 또는 "reset"/"error", 응답 본문 또는 예외 내용)
+    import requests
+    try:
+        res = requests.get(base_url + "/ncc/campaigns", headers=headers, timeout=timeout)
+        return res.status_code == 200, res.status_code, res.text
+    except requests.exceptions.ConnectionError as e:
+        return False, "reset", str(e)
+    except Exception as e:
+        return False, "error", str(e)
+
+
+class CircuitBreaker:
+    def __init__(self, store=None, window=CB_WINDOW, min_calls=CB_MIN_CALLS, error_rate=CB_ERROR_RATE,
+                 cooldown=CB_COOLDOWN, max_cooldown=CB_MAX_COOLDOWN):
+        self._store = store
+        self.window, self.min_calls, self.error_rate = window, min_calls, error_rate
+        self.cooldown, self.max_cooldown = cooldown, max_cooldown
+        self._calls = {}  # scope -> deque[(ts, 실패 여부)]  (워커별)
+        self._auth = {}   # 고객ID -> 최근 auth (프로브용)
+        self.auth_for = None  # 고객ID(global 이면 None) -> auth. 이 워커가 모르는 고객을 프로브할 때
+        self._mu = threading.Lock()
+        self._thread = None
+
+    @property
+    def store(self):
+        return self._store or shared_state.store
+
+    # --- 핫패스 ---
+    def check(self, customer):
+        # 열려 있으면(half_open 포함) UpstreamUnavailable. 정상일 때는 저장소 조회 1회 (키 없음)
+        states = self.store.get_many([f"cb:{GLOBAL}", f"cb:cust:{customer}"])
+        if not states: return
+        st = states.get(f"cb:{GLOBAL}") or states[f"cb:cust:{customer}"]
+        SHORT_CIRCUITS.inc(st["scope"])
+        raise UpstreamUnavailable(st["scope"], max(1.0, st["until"] - time.time()) if st["state"] == "open" else 1.0)
+
+    def is_open(self, customer):
+        return bool(self.store.get_many([f"cb:{GLOBAL}", f"cb:cust:{customer}"]))
+
+    def record(self, customer, auth, kind):
+        # kind: "ok" / "throttled"(429, 고객만) / "error"(연결 끊김, 5xx -> 고객 + 전체)
+        now = time.time()
+        trip = []
+        with self._mu:
+            if auth: self._auth[customer] = auth
+            for scope, failed in ((f"cust:{customer}", kind != "ok"), (GLOBAL, kind == "error")):
+                q = self._calls.get(scope)
+                if q is None: q = self._calls[scope] = deque()
+                q.append((now, failed))
+                while q[0][0] < now - self.window: q.popleft()
+                if failed and len(q) >= self.min_calls and sum(f for _, f in q) / len(q) >= self.error_rate:
+                    trip.append(scope)
+                    q.clear()
+        for scope in trip: self.open(scope, kind)
+
+    # --- 상태 전환 ---
+    def open(self, scope, reason):
+        now = time.time()
+        with self.store.lock("cb"):
+            cur = self.store.get(f"cb:{scope}")
+            if cur and cur["state"] == "open": return
+            trips = (cur or {}).get("trips", 0) + 1  # half_open 에서 다시 열리면 쿨다운 2배
+            cooldown = min(self.max_cooldown, self.cooldown * 2 ** (trips - 1))
+            self.store.set(f"cb:{scope}", {"scope": scope, "state": "open", "reason": reason, "since": (cur or {}).get("since", now),
+                                           "until": now + cooldown, "trips": trips}, ttl=cooldown + self.max_cooldown)
+            scopes = set(self.store.get("cb:scopes") or [])
+            if scope not in scopes: self.store.set("cb:scopes", sorted(scopes | {scope}))
+        CIRCUIT_OPEN.set(scope, value=1)
+        print(f"🔌 [CircuitBreaker] {scope} 차단 ({reason}) - {cooldown:.0f}초 후 확인")
+
+    def close(self, scope):
+        with self.store.lock("cb"):
+            self.store.delete(f"cb:{scope}")
+            scopes = set(self.store.get("cb:scopes") or [])
+            if scope in scopes: self.store.set("cb:scopes", sorted(scopes - {scope}))
+        with self._mu: self._calls.pop(scope, None)
+        CIRCUIT_OPEN.set(scope, value=0)
+        print(f"✅ [CircuitBreaker] {scope} 복구")
+
+    # --- 복구 확인 ---
+    def probe_once(self, knock_fn):
+        # 쿨다운 지난 open 범위마다 half_open 으로 바꾸고 노크 1회 (여러 워커 중 하나만)
+        for scope in self.store.get("cb:scopes") or []:
+            customer = scope[5:] if scope.startswith("cust:") else None
+            with self._mu: auth = self._auth.get(customer) if customer else next(iter(self._auth.values()), None)
+            if not auth and self.auth_for: auth = self.auth_for(customer)
+            if not auth: continue  # 키를 찾을 수 없음 -> TTL 이 지나면 저절로 풀림
+            now = time.time()
+            with self.store.lock("cb"):
+                st = self.store.get(f"cb:{scope}")
+                if not st:
+                    self.store.set("cb:scopes", [s for s in self.store.get("cb:scopes") or [] if s != scope])
+                    continue
+                if st["until"] > now: continue
+                self.store.set(f"cb:{scope}", {**st, "state": "half_open", "until": now + 30}, ttl=30 + self.max_cooldown)
+            CIRCUIT_OPEN.set(scope, value=0.5)
+            if knock_fn(auth): self.close(scope)
+            else: self.open(scope, "probe")
+
+    def start(self, knock_fn, auth_for=None, interval=CB_PROBE_INTERVAL):
+        if self._thread: return
+        self.auth_for = auth_for
+        def loop():
+            while True:
+                time.sleep(interval)
+                try: self.probe_once(knock_fn)
+                except Exception as e: print(f"[CircuitBreaker] 프로브 오류: {e}")
+        self._thread = threading.Thread(target=loop, name="circuit-probe", daemon=True)
+        self._thread.start()
+
+    def snapshot(self):
+        now = time.time()
+        with self._mu:
+            windows = {s: {"calls": len(q), "failures": sum(f for t, f in q if t >= now - self.window)} for s, q in self._calls.items()}
+        scopes = self.store.get("cb:scopes") or []
+        states = self.store.get_many([f"cb:{s}" for s in scopes]) if scopes else {}
+        return {"open": [{**st, "retryAfter": max(0, round(st["until"] - now))} for st in states.values()], "window": windows,
+                "config": {"window": self.window, "minCalls": self.min_calls, "errorRate": self.error_rate,
+                           "cooldown": self.cooldown, "maxCooldown": self.max_cooldown}}
@@ -1,15 +1,29 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import requests, time, hmac, hashlib, base64, urllib.parse, threading, json, re
+import requests, time, hmac, hashlib, base64, urllib.parse, threading, json, re, queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+from bid_scheduler import BidScheduler
 
 # [설정] 본부 서버 주소 (대표님 AWS 서버 IP 유지)
 SERVER_URL = "http://3.36.126.16:8000"
 NAVER_BASE_URL = "https://api.searchad.naver.com"
+BID_BUDGET = 500             # [적응형 입찰] 한 번에 확인할 최대 키워드 수 (급한 순)
+KEYWORD_REFRESH_SEC = 1800   # [적응형 입찰] 키워드 목록 / 최근 지출 다시 읽는 주기
 
 class NaverClient:
+    # [최적화] 호출마다 새 연결 -> Session 1개 + 연결 풀 (워커 수만큼 keep-alive 재사용, 여러 스레드에서 같이 씀)
+    POOL_SIZE = 8
+    TIMEOUT = 30
+
     def __init__(self, ak, sk, cid, logger):
         self.ak = ak.strip(); self.sk = sk.strip(); self.cid = cid.strip()
         self.log = logger
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=self.POOL_SIZE))
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=self.POOL_SIZE))
 
     def call(self, method, uri, params=None, body=None):
         url = NAVER_BASE_URL + uri
@@ -20,33 +34,122 @@ class NaverClient:
         headers = {"Content-Type": "application/json", "X-Timestamp": ts, "X-API-KEY": self.ak, "X-Customer": self.cid, "X-Signature": sign}
 
         try:
-            if method in ["POST", "PUT"]: resp = requests.request(method, url, json=body, headers=headers)
-            else: resp = requests.get(url, headers=headers)
+            if method in ["POST", "PUT"]: resp = self.session.request(method, url, json=body, headers=headers, timeout=self.TIMEOUT)
+            else: resp = self.session.get(url, headers=headers, timeout=self.TIMEOUT)
             
             if resp.status_code == 429: self.log("⚠️ 속도제한! 2초 대기..."); time.sleep(2); return None
             if resp.status_code >= 400: self.log(f"❌ 오류[{resp.status_code}]: {resp.text[:100]}"); return None
             return resp.json()
         except Exception as e: self.log(f"⚡ 통신오류: {e}"); return None
 
+class LogShipper:
+    # [최적화] 로그 1줄마다 스레드+HTTP 요청을 만들던 것을 -> 전송 스레드 1개 + 배치 전송
+    # requests.Session 으로 연결 재사용 (keep-alive), 최대 BATCH 줄 또는 FLUSH_SEC 마다 전송
+    BATCH = 200
+    FLUSH_SEC = 2.0
+    MAX_PENDING = 5000
+
+    def __init__(self, token_getter):
+        self.token_getter = token_getter
+        self.q = queue.Queue(maxsize=self.MAX_PENDING)
+        self.session = requests.Session()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def push(self, msg):
+        try: self.q.put_nowait({"action": "LOG", "details": msg})
+        except queue.Full: pass  # 서버가 느리면 오래 쌓인 로그는 버림
+
+    def _run(self):
+        while True:
+            batch = [self.q.get()]
+            deadline = time.time() + self.FLUSH_SEC
+            while len(batch) < self.BATCH:
+                remain = deadline - time.time()
+                if remain <= 0: break
+                try: batch.append(self.q.get(timeout=remain))
+                except queue.Empty: break
+            token = self.token_getter()
+            if not token: continue
+            try: self.session.post(f"{SERVER_URL}/api/client/log", json={"items": batch}, headers={"Authorization": f"Bearer {token}"}, timeout=10)
+            except: pass
+
+class Engine:
+    # [UI 응답성] 작업은 크기 고정 워커 풀에서, 위젯 갱신은 메인 스레드에서만:
+    #   워커 -> emit(종류, ...) -> 스레드 안전 큐 -> root.after 로 DRAIN_MS 마다 꺼내서 handlers[종류] 호출
+    # 같은 이름의 작업은 동시에 1개만 (입찰 버튼 연타 -> 스레드 여러 개 방지)
+    WORKERS = 4
+    DRAIN_MS = 100
+    DRAIN_MAX = 500  # 한 번에 처리할 이벤트 수 (나머지는 다음 틱 -> 화면이 멈추지 않음)
+
+    def __init__(self, root, handlers):
+        self.root, self.handlers = root, handlers
+        self.pool = ThreadPoolExecutor(max_workers=self.WORKERS, thread_name_prefix="worker")
+        self.events = queue.SimpleQueue()
+        self.jobs = {}
+        self.root.after(self.DRAIN_MS, self._drain)
+
+    def emit(self, kind, *payload):
+        self.events.put((kind, payload))
+
+    def submit(self, name, fn, *args):
+        # 메인 스레드에서 호출. 이미 실행 중이면 False
+        if name in self.jobs and not self.jobs[name].done(): return False
+        f = self.jobs[name] = self.pool.submit(fn, *args)
+        f.add_done_callback(lambda f: f.exception() and self.emit("log", f"❌ [{name}] 작업 오류: {f.exception()}"))
+        return True
+
+    def running(self, name):
+        return name in self.jobs and not self.jobs[name].done()
+
+    def _drain(self):
+        for _ in range(self.DRAIN_MAX):
+            try: kind, payload = self.events.get_nowait()
+            except queue.Empty: break
+            try: self.handlers[kind](*payload)
+            except Exception as e: print(f"[UI] {kind} 처리 오류: {e}")
+        self.root.after(self.DRAIN_MS, self._drain)
+
+class LogView:
+    # [메모리] 로그 창 최대 MAX_LINES 줄 (오래된 줄부터 삭제) + 한 틱에 들어온 줄은 insert 1번으로
+    MAX_LINES = 1000
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.lines = deque(maxlen=self.MAX_LINES)
+        self.pending = []
+
+    def add(self, line):
+        self.lines.append(line)
+        if not self.pending: self.widget.after_idle(self._flush)
+        self.pending.append(line)
+
+    def _flush(self):
+        if not self.pending: return
+        self.widget.insert(tk.END, "\n".join(self.pending[-self.MAX_LINES:]) + "\n"); self.pending = []
+        excess = int(self.widget.index("end-1c").split(".")[0]) - 1 - self.MAX_LINES
+        if excess > 0: self.widget.delete("1.0", f"{excess + 1}.0")
+        self.widget.see(tk.END)
+
 class FullApp:
     def __init__(self, root):
         self.root = root; self.root.title("Naver Ad Manager Pro (Client)"); self.root.geometry("1000x700")
-        self.token = None; self.api = None; self.is_running = False
+        self.token = None; self.api = None; self.stop_event = threading.Event()
+        self.shipper = LogShipper(lambda: self.token)
+        self.http = requests.Session()  # 본부 서버 호출용 (연결 재사용)
         
         # UI 구성
         self.setup_login()
         self.setup_main()
+        self.logview = LogView(self.log_box)
+        self.engine = Engine(root, {"log": self.logview.add, "status": self.status.set,
+                                    "login_ok": self.on_login_ok, "error": lambda t, m: messagebox.showerror(t, m)})
 
     def log(self, msg):
-        timestamp = time.strftime('%H:%M:%S')
-        self.log_box.insert(tk.END, f"[{timestamp}] {msg}\n"); self.log_box.see(tk.END)
-        # [서버로 로그 전송]
-        if self.token:
-            threading.Thread(target=self.send_log_to_server, args=(f"[{timestamp}] {msg}",), daemon=True).start()
-
-    def send_log_to_server(self, msg):
-        try: requests.post(f"{SERVER_URL}/api/client/log", json={"action":"LOG", "details":msg}, headers={"Authorization": f"Bearer {self.token}"})
-        except: pass
+        # 어느 스레드에서 불러도 됨 (위젯은 건드리지 않고 이벤트만 넣음)
+        line = f"[{time.strftime('%H:%M:%S')}] {msg}"
+        self.engine.emit("log", line)
+        # [서버로 로그 전송] 배치 전송 큐에 넣기만 함
+        if self.token: self.shipper.push(line)
 
     def setup_login(self):
         self.f_login = tk.Frame(self.root)
@@ -57,18 +160,23 @@ class FullApp:
         self.f_login.pack(fill="both", expand=True)
 
     def login(self):
+        self.engine.submit("login", self._login_logic, self.e_id.get(), self.e_pw.get())
+
+    def _login_logic(self, uid, pw):
         try:
-            res = requests.post(f"{SERVER_URL}/auth/token", data={"username": self.e_id.get(), "password": self.e_pw.get()})
+            res = self.http.post(f"{SERVER_URL}/auth/token", data={"username": uid, "password": pw}, timeout=10)
             if res.status_code == 200:
                 self.token = res.json()["access_token"]
-                if self.check_license():
-                    self.f_login.pack_forget(); self.f_main.pack(fill="both", expand=True)
-                    self.log("✅ 로그인 성공. API 정보를 입력하세요.")
-            else: messagebox.showerror("실패", "계정 정보 확인")
-        except: messagebox.showerror("오류", "서버 연결 불가")
+                if self.check_license(): self.engine.emit("login_ok")
+            else: self.engine.emit("error", "실패", "계정 정보 확인")
+        except: self.engine.emit("error", "오류", "서버 연결 불가")
+
+    def on_login_ok(self):
+        self.f_login.pack_forget(); self.f_main.pack(fill="both", expand=True)
+        self.log("✅ 로그인 성공. API 정보를 입력하세요.")
 
     def check_license(self):
-        try: return requests.get(f"{SERVER_URL}/api/license/check", headers={"Authorization": f"Bearer {self.token}"}).status_code == 200
+        try: return self.http.get(f"{SERVER_URL}/api/license/check", headers={"Authorization": f"Bearer {self.token}"}, timeout=10).status_code == 200
         except: return False
 
     def setup_main(self):
@@ -93,12 +201,17 @@ class FullApp:
         self.setup_clone_ui()
         self.setup_smart_ui()
 
+        self.status = tk.StringVar(value="대기 중")
+        tk.Label(self.f_main, textvariable=self.status, anchor="w").pack(fill="x")
         self.log_box = scrolledtext.ScrolledText(self.f_main, height=10); self.log_box.pack(fill="x")
 
     def connect(self):
         self.api = NaverClient(self.ak.get(), self.sk.get(), self.cid.get(), self.log)
-        if self.api.call("GET", "/ncc/campaigns"): self.log("✅ API 연결 성공")
-        else: self.log("❌ API 연결 실패")
+        self.engine.submit("connect", lambda api: self.log("✅ API 연결 성공" if api.call("GET", "/ncc/campaigns") else "❌ API 연결 실패"), self.api)
+
+    def require_api(self):
+        if self.api: return True
+        messagebox.showwarning("API", "먼저 API 연결을 해주세요"); return False
 
     # --- 1. 자동 입찰 (기능) ---
     def setup_bid_ui(self):
@@ -108,35 +221,75 @@ class FullApp:
         tk.Button(f, text="▶ 입찰 시작", command=self.start_bid, bg="green", fg="white").pack(pady=10)
         tk.Button(f, text="⏹ 중지", command=self.stop_bid, bg="red", fg="white").pack()
 
-    def start_bid(self): self.is_running=True; threading.Thread(target=self.loop_bid, daemon=True).start()
-    def stop_bid(self): self.is_running=False; self.log("중지 요청")
-
-    def loop_bid(self):
-        self.log("🚀 입찰 로직 가동")
-        while self.is_running:
-            if not self.check_license(): self.is_running=False; break
-            camps = self.api.call("GET", "/ncc/campaigns") or []
-            for c in camps:
-                if not self.is_running: break
-                grps = self.api.call("GET", "/ncc/adgroups", {"nccCampaignId": c['nccCampaignId']}) or []
-                for g in grps:
-                    kwds = self.api.call("GET", "/ncc/keywords", {"nccAdgroupId": g['nccAdgroupId']}) or []
-                    self.log(f"그룹 [{g['name']}] - 키워드 {len(kwds)}개 처리 중")
-                    
-                    ids = [k['nccKeywordId'] for k in kwds]
-                    for i in range(0, len(ids), 50):
-                        if not self.is_running: break
-                        chunk = ids[i:i+50]
-                        est = self.api.call("POST", "/estimate/average-position-bid/id", body={"device":"MOBILE", "items":[{"key":k, "position":int(self.bid_rank.get())} for k in chunk]})
-                        if est:
-                            for e in est.get('estimate', []):
-                                kid = e.get('nccKeywordId') or e.get('keywordId')
-                                bid = e.get('bid', 0)
-                                curr = next((k for k in kwds if k['nccKeywordId'] == kid), None)
-                                if curr and curr['bidAmt'] != bid:
-                                    self.api.call("PUT", f"/ncc/keywords/{kid}", params={"fields":"bidAmt"}, body={"nccAdgroupId": g['nccAdgroupId'], "bidAmt": bid, "useGroupBidAmt": False})
-                                    time.sleep(0.05)
-            time.sleep(10)
+    def start_bid(self):
+        # 목표 순위는 여기(메인 스레드)에서 한 번 읽어서 넘김 -> 워커는 위젯을 읽지 않음
+        if not self.require_api(): return
+        try: rank = int(self.bid_rank.get())
+        except ValueError: messagebox.showerror("입력 오류", "목표 순위는 숫자"); return
+        self.stop_event.clear()
+        if not self.engine.submit("bid", self.loop_bid, rank): self.log("이미 입찰 중")
+    def stop_bid(self): self.stop_event.set(); self.log("중지 요청")
+
+    def _load_keywords(self, stop):
+        # 전체 캠페인 -> 그룹 -> 키워드 {keywordId: 키워드} + 최근 7일 비용/노출 {keywordId: (비용, 노출)}
+        kwds = {}
+        for c in self.api.call("GET", "/ncc/campaigns") or []:
+            for g in self.api.call("GET", "/ncc/adgroups", {"nccCampaignId": c['nccCampaignId']}) or []:
+                if stop.is_set(): return kwds, {}
+                for k in self.api.call("GET", "/ncc/keywords", {"nccAdgroupId": g['nccAdgroupId']}) or []:
+                    kwds[k['nccKeywordId']] = k
+        ids, spend = list(kwds), {}
+        tr = json.dumps({"since": time.strftime("%Y-%m-%d", time.localtime(time.time() - 7 * 86400)),
+                         "until": time.strftime("%Y-%m-%d", time.localtime(time.time() - 86400))})
+        for i in range(0, len(ids), 50):
+            if stop.is_set(): break
+            res = self.api.call("GET", "/stats", {"ids": ",".join(ids[i:i+50]), "fields": '["impCnt","salesAmt"]', "timeRange": tr})
+            for s in (res or {}).get('data', []): spend[s['id']] = (s.get('salesAmt') or 0, s.get('impCnt') or 0)
+        return kwds, spend
+
+    def loop_bid(self, rank):
+        # [적응형] 매 사이클 전체를 보지 않고 "확인할 때가 된" 키워드만 (bid_scheduler)
+        #   추정가가 바뀌는 / 돈 쓰는 키워드는 자주, 노출 0 키워드는 1시간에 한 번
+        self.log(f"🚀 입찰 로직 가동 (목표 {rank}위)")
+        stop = self.stop_event
+        sched, kwds, refresh_at = BidScheduler(), {}, 0
+        while not stop.is_set():
+            if not self.check_license(): break
+            if time.time() >= refresh_at:
+                kwds, spend = self._load_keywords(stop)
+                for kid in sched.ids() - kwds.keys(): sched.remove(kid)
+                for kid in kwds: sched.upsert(kid, *spend.get(kid, (0, 0)))
+                refresh_at = time.time() + KEYWORD_REFRESH_SEC
+                self.log(f"키워드 {len(kwds):,}개 갱신 | 확인 주기 {sched.summary()}")
+            due = [k for k in sched.pop_due(limit=BID_BUDGET) if k in kwds]
+            done = changed = failed = 0
+            for i in range(0, len(due), 50):
+                if stop.is_set(): break
+                chunk = due[i:i+50]
+                est = self.api.call("POST", "/estimate/average-position-bid/id", body={"device":"MOBILE", "items":[{"key":k, "position":rank} for k in chunk]})
+                upd = []
+                for e in (est or {}).get('estimate', []):
+                    kid = e.get('nccKeywordId') or e.get('keywordId')
+                    bid = e.get('bid', 0)
+                    curr = kwds.get(kid)
+                    if curr and curr['bidAmt'] != bid:
+                        upd.append({"nccKeywordId": kid, "nccAdgroupId": curr['nccAdgroupId'], "bidAmt": bid, "useGroupBidAmt": False})
+                # [최적화] 바뀐 키워드는 1개씩 PUT 대신 목록으로 한 번에
+                if upd and self.api.call("PUT", "/ncc/keywords", params={"fields": "bidAmt"}, body=upd):
+                    for u in upd: kwds[u['nccKeywordId']]['bidAmt'] = u['bidAmt']
+                    changed += len(upd)
+                elif upd:
+                    failed += len(upd)  # 429 등으로 실패 -> 주기가 줄어 곧 다시 확인
+                moved = {u['nccKeywordId'] for u in upd}
+                for kid in chunk: sched.report(kid, changed=kid in moved)
+                done += len(chunk)
+                self.engine.emit("status", f"🤖 입찰 중: 키워드 {done:,}개 확인 / {changed:,}개 변경 / {failed:,}개 실패")
+            if due:
+                self.log(f"확인 {done:,}개 / 변경 {changed:,}개" + (f" / 실패 {failed:,}개" if failed else "") + f" | 대기 {len(sched):,}개")
+            self.engine.emit("status", f"🤖 대기 중: 다음 확인 {sched.next_due_in():.0f}초 후 (키워드 {len(sched):,}개)")
+            stop.wait(min(10, max(1, sched.next_due_in())))
+        self.engine.emit("status", "대기 중")
+        self.log("⏹ 입찰 종료")
 
     # --- 2. 소재/확장소재 복사 (누락되었던 기능 복구) ---
     def setup_clone_ui(self):
@@ -149,10 +302,10 @@ class FullApp:
         tk.Button(f, text="🚀 복사 실행", command=self.run_clone).pack(pady=10)
 
     def run_clone(self):
-        threading.Thread(target=self._clone_logic, daemon=True).start()
+        if not self.require_api(): return
+        if not self.engine.submit("clone", self._clone_logic, self.src_grp.get(), self.tgt_grp.get()): self.log("이미 복사 중")
 
-    def _clone_logic(self):
-        src, tgt = self.src_grp.get(), self.tgt_grp.get()
+    def _clone_logic(self, src, tgt):
         self.log(f"복사 시작: {src} -> {tgt}")
         
         # 1. 소재 복사
@@ -185,11 +338,11 @@ class FullApp:
         tk.Button(f, text="🚀 스마트 확장 시작", command=self.run_smart).pack(pady=10)
 
     def run_smart(self):
-        threading.Thread(target=self._smart_logic, daemon=True).start()
-
-    def _smart_logic(self):
-        base_id = self.base_grp.get()
+        if not self.require_api(): return
         keywords = [k.strip() for k in self.kwd_list.get("1.0", tk.END).split(",") if k.strip()]
+        if not self.engine.submit("smart", self._smart_logic, self.base_grp.get(), keywords): self.log("이미 확장 중")
+
+    def _smart_logic(self, base_id, keywords):
         self.log(f"스마트 확장 시작: 총 {len(keywords)}개 키워드")
 
         grp = self.api.call("GET", f"/ncc/adgroups/{base_id}")
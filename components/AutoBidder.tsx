@@ -116,6 +116,26 @@ useEffect(() => {
     };
 }, []);
 
+  // [실시간] 서버/데스크톱 클라이언트에서 일어난 입찰 변경을 SSE 로 받아 로그에 표시 (폴링 없음)
+  useEffect(() => {
+    const unsubscribe = naverService.subscribeEvents({
+      bid: (data: any) => {
+        // 이 화면에서 보낸 입찰(source=web)은 saveBidLogs 직후 이미 로그에 넣음 -> 중복 표시하지 않음
+        if (data.source === 'web') return;
+        const changes: any[] = data.changes || [];
+        if (changes.length === 0) return;
+        setLogs(prev => [...changes.map(c => ({
+            keywordId: c.nccKeywordId, keyword: c.keyword || c.nccKeywordId, oldBid: c.oldBid, newBid: c.bidAmt, reason: `[${data.source || '서버'}]`
+        })), ...prev].slice(0, 50));
+      },
+      client_log: (data: any) => {
+        const last = (data.items || []).slice(-1)[0];
+        if (last && !isRunningRef.current) setStatusMessage(`🖥️ 클라이언트: ${last.details}`);
+      },
+    });
+    return unsubscribe;
+  }, []);
+
   // [최적화] 함수 재생성 방지
   const toggleExpand = useCallback(async (campId: string) => {
     setExpandedCampaigns(prev => {
@@ -285,6 +305,8 @@ useEffect(() => {
                       }
                       serverLogs.push({
                           time: new Date().toLocaleTimeString(),
+                          keywordId: kw.nccKeywordId,
+                          adGroupId: kw.nccAdGroupId,
                           keyword: kw.keyword,
                           oldBid: kw.bidAmt,
                           newBid: newBid,
@@ -302,7 +324,7 @@ useEffect(() => {
               if (serverLogs.length > 0) {
                   await naverService.saveBidLogs(serverLogs);
                   setLogs(prev => [...serverLogs.map(l => ({
-                      keywordId: '', keyword: l.keyword, oldBid: l.oldBid, newBid: l.newBid, reason: l.reason
+                      keywordId: l.keywordId || '', keyword: l.keyword, oldBid: l.oldBid, newBid: l.newBid, reason: l.reason
                   })), ...prev].slice(0, 50)); 
               }
               await new Promise(resolve => setTimeout(resolve, 2000)); 
@@ -344,6 +366,8 @@ useEffect(() => {
                   if (newBid !== freshKw.bidAmt || reason.includes('동결')) {
                       serverLogs.push({
                           time: new Date().toLocaleTimeString(),
+                          keywordId: freshKw.nccKeywordId,
+                          adGroupId: freshKw.nccAdGroupId,
                           keyword: freshKw.keyword,
                           oldBid: freshKw.bidAmt,
                           newBid: newBid,
@@ -358,7 +382,7 @@ useEffect(() => {
       if (serverLogs.length > 0) {
           await naverService.saveBidLogs(serverLogs);
           setLogs(prev => [...serverLogs.map(l => ({
-              keywordId: '', keyword: l.keyword, oldBid: l.oldBid, newBid: l.newBid, reason: l.reason
+              keywordId: l.keywordId || '', keyword: l.keyword, oldBid: l.oldBid, newBid: l.newBid, reason: l.reason
           })), ...prev].slice(0, 50));
       }
       finishCycle();
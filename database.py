@@ -0,0 +1,101 @@
+# ==========================================
+# DB 엔진 설정 (SQLite / PostgreSQL 선택)
+# ==========================================
+# DATABASE_URL 환경변수로 지정. 기본값은 기존과 같은 sqlite:///./app.db
+#   SQLite     : 연결마다 WAL / busy_timeout / synchronous=NORMAL / mmap_size 적용
+#   PostgreSQL : 커넥션 풀 크기/오버플로/재활용 튜닝 (pip install psycopg2-binary 필요)
+#     DATABASE_URL=postgresql+psycopg2://user:pw@127.0.0.1:5432/naver
+import os
+
+from sqlalchemy import create_engine, event, inspect, select, text
+from sqlalchemy.orm import sessionmaker, declarative_base
+
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./app.db")
+
+# SQLite 연결 PRAGMA
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# 서버형 DB 풀 설정 (uvicorn 워커 1개 기준)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "10"))
+
+
+def create_db_engine(url=DATABASE_URL):
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000})
+
+        @event.listens_for(engine, "connect")
+        def _sqlite_pragmas(dbapi_conn, conn_record):
+            # [최적화] 연결마다 적용 (예전엔 import 시점에 WAL 만 한 번 켰음)
+            cur = dbapi_conn.cursor()
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            cur.execute("PRAGMA synchronous=NORMAL")
+            cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            cur.close()
+        return engine
+
+    return create_engine(
+        url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE, pool_timeout=DB_POOL_TIMEOUT, pool_pre_ping=True,
+    )
+
+
+engine = create_db_engine()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base = declarative_base()
+
+
+# ==========================================
+# 스키마 마이그레이션
+# ==========================================
+def upgrade_schema(bind=None, metadata=None):
+    # create_all 은 기존 테이블에 새 컬럼을 추가하지 않음 -> 빠진 컬럼만 ALTER TABLE ADD
+    # (예: subscription_expiry 추가 이전에 만들어진 app.db)
+    bind = bind or engine
+    metadata = metadata or Base.metadata
+    insp = inspect(bind)
+    added = []
+    with bind.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not insp.has_table(table.name): continue
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing: continue
+                col_type = col.type.compile(dialect=bind.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{col.name}" {col_type}'))
+                added.append(f"{table.name}.{col.name}")
+    return added
+
+
+def copy_tables(src_url, dst_bind, metadata, table_names, batch_size=1000):
+    # 원본 DB -> 대상 DB 로 행 복사 (양쪽에 있는 컬럼만, 배치 단위 스트리밍)
+    src = create_db_engine(src_url)
+    src_insp = inspect(src)
+    copied = {}
+    for name in table_names:
+        table = metadata.tables[name]
+        if not src_insp.has_table(name):
+            copied[name] = 0
+            continue
+        src_cols = {c["name"] for c in src_insp.get_columns(name)}
+        cols = [c.name for c in table.columns if c.name in src_cols]
+        n = 0
+        with src.connect() as sconn, dst_bind.begin() as dconn:
+            # 테이블 컬럼 타입 기준으로 읽어야 DateTime/Boolean 이 파이썬 값으로 변환됨
+            result = sconn.execution_options(stream_results=True).execute(
+                select(*[table.c[c] for c in cols]).order_by(table.c.id))
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows: break
+                dconn.execute(table.insert(), [dict(zip(cols, r)) for r in rows])
+                n += len(rows)
+            if dst_bind.dialect.name == "postgresql" and "id" in cols:
+                # 복사한 id 이후부터 시퀀스 이어가기
+                dconn.execute(text(f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), COALESCE(MAX(id), 1)) FROM {name}"))
+        copied[name] = n
+    src.dispose()
+    return copied
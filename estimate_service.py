@@ -0,0 +1,99 @@
+# ==========================================
+# 순위 추정 입찰가 서비스 (배치 조회 + 캐시)
+# ==========================================
+# client_master.loop_bid 는 50개씩 추정 API 를 부르고, 바뀐 키워드를 1개씩 PUT 하며,
+# 10초마다 전부 다시 추정함. 추정가는 천천히 변하므로:
+#   - 추정 요청은 요청당 최대 items 수로 묶음 (ESTIMATE_BATCH_SIZE)
+#   - (고객, 키워드, 디바이스, 순위) 단위로 TTL 캐시 (shared_state 저장소 -> 워커 간 공유)
+#   - 변경분만 골라서 넘김 (반영은 outbox.py 가 PUT /ncc/keywords?fields=bidAmt 로 묶어서)
+#   - MOBILE / PC 를 한 사이클에 같이 추정하고 combine 정책으로 최종 입찰가 결정
+import os
+
+import metrics
+import shared_state
+
+ESTIMATE_BATCH_SIZE = int(os.environ.get("ESTIMATE_BATCH_SIZE", "200"))
+ESTIMATE_TTL = int(os.environ.get("ESTIMATE_TTL", "600"))
+DEVICES = ("MOBILE", "PC")
+MIN_BID, MAX_BID = 70, 100000
+
+
+def _cache_key(customer, kid, device, position):
+    return f"est:{customer}:{device}:{position}:{kid}"
+
+
+class EstimateService:
+    def __init__(self, call_api, store=None):
+        self.call_api = call_api
+        self.store = store
+
+    @property
+    def _store(self):
+        return self.store or shared_state.store
+
+    def estimate(self, auth, keyword_ids, device="MOBILE", position=3):
+        # {keywordId: bid} - 캐시에 있는 건 재사용, 없는 것만 배치로 조회
+        customer = str(auth.get("customer_id", ""))
+        keys = {kid: _cache_key(customer, kid, device, position) for kid in keyword_ids}
+        cached = self._store.get_many(keys.values())
+        result, missing = {}, []
+        for kid, ck in keys.items():
+            if ck in cached: result[kid] = cached[ck]
+            else: missing.append(kid)
+        if cached: metrics.CACHE_REQUESTS.inc("estimate", "hit", amount=len(cached))
+        if missing: metrics.CACHE_REQUESTS.inc("estimate", "miss", amount=len(missing))
+
+        fresh = {}
+        for i in range(0, len(missing), ESTIMATE_BATCH_SIZE):
+            chunk = missing[i:i + ESTIMATE_BATCH_SIZE]
+            body = {"device": device, "items": [{"key": k, "position": int(position)} for k in chunk]}
+            res = self.call_api(("POST", "/estimate/average-position-bid/id", None, body, auth))
+            if not res or "error" in res: continue
+            for e in res.get("estimate", []):
+                kid = e.get("nccKeywordId") or e.get("keywordId") or e.get("key") or e.get("keyword")
+                if kid and "bid" in e: fresh[kid] = int(e["bid"])
+        if fresh:
+            self._store.set_many({keys[k]: v for k, v in fresh.items() if k in keys}, ttl=ESTIMATE_TTL)
+            result.update(fresh)
+        return result
+
+    def estimate_devices(self, auth, keyword_ids, devices=DEVICES, position=3):
+        # {device: {keywordId: bid}}
+        return {d: self.estimate(auth, keyword_ids, d, position) for d in devices}
+
+    def invalidate(self, auth):
+        self._store.delete_prefix(f"est:{auth.get('customer_id', '')}:")
+
+
+def combine_bids(per_device, keyword_id, policy="max"):
+    # 키워드 입찰가는 1개뿐이라 디바이스별 추정가를 하나로 합침
+    bids = [m[keyword_id] for m in per_device.values() if keyword_id in m]
+    if not bids: return None
+    if policy == "min": return min(bids)
+    if policy == "avg": return int(round(sum(bids) / len(bids), -1))
+    if policy in per_device: return per_device[policy].get(keyword_id, max(bids))
+    return max(bids)
+
+
+def _bid_rows(keywords):
+    # KeywordTable 이면 컬럼에서 바로, dict 목록이면 필요한 필드만
+    if hasattr(keywords, "bid_rows"): return keywords.bid_rows()
+    return ((k["nccKeywordId"], k["nccAdgroupId"], k.get("bidAmt"), k.get("useGroupBidAmt")) for k in keywords)
+
+
+def plan_bid_changes(keywords, per_device, policy="max", max_bid=None, min_bid=MIN_BID):
+    # keywords: KeywordTable 또는 네이버 키워드 dict 목록 -> 실제로 바뀌는 것만 [{nccKeywordId, nccAdgroupId, oldBid, bidAmt}]
+    # KeywordTable 에 실적을 넣어 뒀으면 변경마다 최근 실적 (rank, imp, clk, cost, conv) 도 붙임
+    cap = min(max_bid or MAX_BID, MAX_BID)
+    stats_of = keywords.stats_of if getattr(keywords, "has_stats", False) else None
+    changes = []
+    for kid, gid, cur, use_group in _bid_rows(keywords):
+        target = combine_bids(per_device, kid, policy)
+        if target is None: continue
+        target = max(min_bid, min(cap, target))
+        if use_group or cur != target:
+            c = {"nccKeywordId": kid, "nccAdgroupId": gid, "oldBid": cur, "bidAmt": target}
+            if stats_of: c.update(stats_of(kid))
+            changes.append(c)
+    return changes
+
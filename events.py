@@ -0,0 +1,86 @@
+# ==========================================
+# 실시간 이벤트 (SSE) - 입찰 진행 / 작업 상태 / 클라이언트 로그
+# ==========================================
+# 사용자(채널)별 구독자 큐. publish 는 어느 스레드에서 불러도 됨 (이벤트 루프로 넘김)
+# 주의: 구독은 워커 프로세스 단위 (멀티워커면 같은 워커에 붙은 구독자만 받음)
+import json
+import asyncio
+import itertools
+import threading
+
+
+class _Subscriber:
+    __slots__ = ("loop", "queue")
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, msg):
+        # 느린 구독자는 오래된 이벤트부터 버림 (서버 메모리 보호)
+        if self.queue.full():
+            try: self.queue.get_nowait()
+            except asyncio.QueueEmpty: pass
+        self.queue.put_nowait(msg)
+
+
+class EventBus:
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._subs = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, channel):
+        sub = _Subscriber(asyncio.get_running_loop(), self.maxsize)
+        with self._lock: self._subs.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, channel, sub):
+        with self._lock:
+            subs = self._subs.get(channel)
+            if subs:
+                subs.discard(sub)
+                if not subs: self._subs.pop(channel, None)
+
+    def publish(self, channel, event, data):
+        with self._lock: subs = list(self._subs.get(channel, ()))
+        if not subs: return 0
+        msg = format_sse(event, data, next(self._ids))
+        for sub in subs:
+            try: sub.loop.call_soon_threadsafe(sub.put, msg)
+            except RuntimeError: self.unsubscribe(channel, sub)  # 루프 종료됨
+        return len(subs)
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None: return len(self._subs.get(channel, ()))
+            return sum(len(s) for s in self._subs.values())
+
+
+def format_sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None: lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    lines.extend(f"data: {l}" for l in payload.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+async def sse_stream(bus, channel, request, heartbeat=15):
+    # text/event-stream 본문 생성기. 연결이 끊기면 구독 해제
+    sub = bus.subscribe(channel)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                msg = await asyncio.wait_for(sub.queue.get(), timeout=heartbeat)
+                yield msg
+            except asyncio.TimeoutError:
+                if await request.is_disconnected(): break
+                yield ": ping\n\n"
+    finally:
+        bus.unsubscribe(channel, sub)
+
+
+bus = EventBus()
@@ -0,0 +1,36 @@
+# ==========================================
+# 빠른 JSON 응답 (opt-in)
+# ==========================================
+# FastAPI 기본 경로: 라우트 반환값 -> jsonable_encoder (목록/딕셔너리를 통째로 재귀 복사) -> json.dumps
+# 큰 목록 라우트는 응답 모양 그대로(pre-shaped) 만든 뒤 FastJSONResponse 를 직접 반환 -> 인코더 복사 생략
+#   orjson 설치 시 orjson (C 구현, pip install orjson), 없으면 stdlib json (공백 없는 구분자)
+#   FAST_JSON=0 이면 orjson 이 있어도 stdlib 사용
+import os
+import json
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson  # 선택 의존성
+except ImportError:
+    orjson = None
+
+if os.environ.get("FAST_JSON", "1") == "0": orjson = None
+
+
+def _dumps_std(content):
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _dumps_orjson(content):
+    return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+dumps = _dumps_orjson if orjson else _dumps_std
+ENCODER = "orjson" if orjson else "json"
+
+
+class FastJSONResponse(JSONResponse):
+    # content 는 JSON 기본 타입(dict/list/str/int/float/bool/None)으로 이미 모양이 잡혀 있어야 함
+    def render(self, content):
+        return dumps(content)
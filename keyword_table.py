@@ -0,0 +1,85 @@
+# ==========================================
+# 키워드 컬럼 배열 (입찰 핫패스용 압축 표현)
+# ==========================================
+# 네이버 키워드 JSON dict 는 필드 15개 안팎이라 키워드당 수 KB.
+# 여러 고객의 입찰 사이클을 서버에서 돌리면 이게 전부 메모리에 올라감 ->
+# 입찰 계산에 필요한 필드만 타입 고정 배열(array)로 한 번에 변환해서 보관:
+#   id       : list (문자열 1개씩은 어쩔 수 없음)
+#   그룹 ID  : 그룹 목록 인덱스 (array 'I') -> 같은 그룹 문자열을 키워드마다 들고 있지 않음
+#   bid / imp / clk / conv : 정수 배열,  cost : 64비트 정수,  rank : 실수 배열
+#   flags    : 비트 (useGroupBidAmt)
+# 변환은 add() / from_api() / set_stats() 에서 1회. 소비하는 쪽은 estimate_service.plan_bid_changes (bid_rows / stats_of).
+from array import array
+
+GROUP_BID = 1
+
+
+class KeywordTable:
+    __slots__ = ("ids", "group_idx", "groups", "_group_pos", "bid", "rank", "imp", "clk", "cost", "conv", "flags", "has_stats", "_pos")
+
+    def __init__(self):
+        self.ids, self.groups = [], []
+        self._group_pos, self._pos = {}, {}
+        self.group_idx = array("I")
+        self.bid, self.imp, self.clk, self.conv = array("i"), array("i"), array("i"), array("i")
+        self.cost = array("q")
+        self.rank = array("f")
+        self.flags = bytearray()
+        self.has_stats = False
+
+    @classmethod
+    def from_api(cls, keywords, stats=None):
+        # keywords: GET /ncc/keywords 응답 목록, stats: {id: /stats data 항목}
+        t = cls()
+        for k in keywords: t.add(k)
+        if stats: t.set_stats(stats)
+        return t
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, k):
+        kid = k["nccKeywordId"]
+        if kid in self._pos: return self._pos[kid]
+        gid = k["nccAdgroupId"]
+        gi = self._group_pos.get(gid)
+        if gi is None:
+            gi = self._group_pos[gid] = len(self.groups)
+            self.groups.append(gid)
+        i = len(self.ids)
+        self._pos[kid] = i
+        self.ids.append(kid)
+        self.group_idx.append(gi)
+        self.bid.append(int(k.get("bidAmt") or 0))
+        for col in (self.imp, self.clk, self.cost, self.conv): col.append(0)
+        self.rank.append(0.0)
+        self.flags.append(GROUP_BID if k.get("useGroupBidAmt") else 0)
+        return i
+
+    def set_stats(self, stats):
+        # stats: {id: /stats 모양 (impCnt, clkCnt, salesAmt, ccnt, avgRnk)} - 없는 키워드는 0 그대로
+        pos, self.has_stats = self._pos, True
+        for kid, s in stats.items():
+            i = pos.get(kid)
+            if i is None or not s: continue
+            try:
+                self.imp[i], self.clk[i], self.conv[i] = int(s.get("impCnt", 0)), int(s.get("clkCnt", 0)), int(s.get("ccnt", 0))
+                self.cost[i], self.rank[i] = int(s.get("salesAmt", 0)), float(s.get("avgRnk") or 0)
+            except (TypeError, ValueError):
+                continue
+
+    def stats_of(self, kid):
+        # 입찰 변경에 같이 넘기는 실적 (순위는 소수 1자리)
+        i = self._pos[kid]
+        return {"rank": round(self.rank[i], 1), "imp": self.imp[i], "clk": self.clk[i], "cost": self.cost[i], "conv": self.conv[i]}
+
+    def bid_rows(self):
+        # (keywordId, adgroupId, bidAmt, useGroupBidAmt) - estimate_service.plan_bid_changes 입력
+        groups, gidx, flags = self.groups, self.group_idx, self.flags
+        for i, kid in enumerate(self.ids):
+            yield kid, groups[gidx[i]], self.bid[i], bool(flags[i] & GROUP_BID)
+
+    def nbytes(self):
+        # 배열/컬럼 자체 크기 (문자열 본문 제외)
+        cols = (self.group_idx, self.bid, self.rank, self.imp, self.clk, self.cost, self.conv)
+        return sum(c.itemsize * len(c) for c in cols) + len(self.flags)
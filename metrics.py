@@ -0,0 +1,262 @@
+# ==========================================
+# Prometheus 호환 메트릭 (외부 의존성 없음)
+# ==========================================
+# - 핫패스 비용: 라벨 튜플 dict 조회 + Lock 1회
+# - /metrics 에서 text exposition format(0.0.4)으로 출력
+# - 멀티워커 (STATE_URL 공유 저장소) 면 워커마다 METRICS_PUSH_SEC 마다 스냅샷을 저장소에 올리고
+#   /metrics 는 받은 워커와 상관없이 전체 합계: counter / histogram 은 합산, gauge 는 worker 라벨로 워커별
+#   (워커가 죽으면 그 몫은 스냅샷 만료 (PUSH x 3) 뒤 빠짐 -> 합계 counter 가 줄어드는 건 Prometheus 가 리셋으로 처리)
+import os
+import re
+import time
+import socket
+import threading
+from bisect import bisect_left
+
+METRICS_PUSH_SEC = float(os.environ.get("METRICS_PUSH_SEC", "5"))
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_ID_SEGMENT = re.compile(r"^([a-z]{2,5}-[A-Za-z0-9-]*\d[A-Za-z0-9-]*|\d+)$")  # 숫자 없는 ad-extensions, stat-reports 등은 경로 그대로
+
+
+def normalize_path(uri):
+    # /ncc/adgroups/grp-a001-01-000000012345 -> /ncc/adgroups/:id (라벨 폭증 방지)
+    path = uri.split("?")[0]
+    return "/".join(":id" if _ID_SEGMENT.match(p) else p for p in path.split("/"))
+
+
+_LE_INF = 'le="+Inf"'
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra: pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, doc, labelnames=()):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def snapshot(self):
+        with self._lock: return [[list(k), v] for k, v in self._values.items()]
+
+    def merge(self, snaps):
+        # [(worker, snapshot)] -> 라벨별 합계
+        out = {}
+        for _, snap in snaps:
+            for k, v in snap:
+                k = tuple(k)
+                out[k] = out.get(k, 0) + v
+        return out
+
+    def collect(self, values=None, labelnames=None):
+        if values is None:
+            with self._lock: values = dict(self._values)
+        names = labelnames or self.labelnames
+        return [f"{self.name}{_fmt_labels(names, k)} {v}" for k, v in values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels, value):
+        with self._lock: self._values[labels] = value
+
+    def merge(self, snaps):
+        # 현재 값은 더하면 의미가 달라짐 -> 워커별로
+        return {tuple(k) + (w,): v for w, snap in snaps for k, v in snap}
+
+    def collect(self, values=None):
+        return super().collect(values, None if values is None else self.labelnames + ("worker",))
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, doc, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * (len(self.buckets) + 2)
+            row[idx] += 1
+            row[-1] += value
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def count(self, *labels):
+        row = self._values.get(labels)
+        return sum(row[:-1]) if row else 0
+
+    def snapshot(self):
+        with self._lock: return [[list(k), list(v)] for k, v in self._values.items()]
+
+    def merge(self, snaps):
+        out = {}
+        for _, snap in snaps:
+            for k, row in snap:
+                k = tuple(k)
+                acc = out.get(k)
+                out[k] = row if acc is None else [a + b for a, b in zip(acc, row)]
+        return out
+
+    def collect(self, values=None):
+        if values is None:
+            with self._lock: values = {k: list(v) for k, v in self._values.items()}
+        out = []
+        for labels, row in values.items():
+            acc = 0
+            for b, c in zip(self.buckets, row):
+                acc += c
+                le = 'le="%s"' % b
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, labels, le)} {acc}")
+            acc += row[len(self.buckets)]
+            out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, labels, _LE_INF)} {acc}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labelnames, labels)} {row[-1]}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labelnames, labels)} {acc}")
+        return out
+
+
+class _Timer:
+    __slots__ = ("h", "labels", "t0")
+
+    def __init__(self, h, labels):
+        self.h, self.labels = h, labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.h.observe(time.perf_counter() - self.t0, *self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, m):
+        self._metrics.append(m)
+        return m
+
+    def publish(self, store, ttl=METRICS_PUSH_SEC * 3):
+        # 이 워커 스냅샷 -> 공유 저장소 (워커 목록은 락 안에서 갱신, 오래 안 올린 워커는 목록에서 뺌)
+        store.set(f"metrics:{WORKER_ID}", {m.name: m.snapshot() for m in self._metrics}, ttl=ttl)
+        now = time.time()
+        with store.lock("metrics"):
+            workers = {w: t for w, t in (store.get("metrics:workers") or {}).items() if t > now - ttl}
+            workers[WORKER_ID] = now
+            store.set("metrics:workers", workers)
+
+    def render(self, store=None):
+        # store 를 주면 모든 워커 합계, 아니면 이 프로세스 값만
+        snaps = None
+        if store is not None:
+            self.publish(store)  # 내 몫은 최신으로
+            workers = store.get("metrics:workers") or {}
+            got = store.get_many([f"metrics:{w}" for w in workers])
+            snaps = [(k[len("metrics:"):], v) for k, v in got.items()]
+        lines = []
+        for m in self._metrics:
+            lines.append(f"# HELP {m.name} {m.doc}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.collect() if snaps is None else m.collect(m.merge([(w, s.get(m.name, [])) for w, s in snaps])))
+        return "\n".join(lines) + "\n"
+
+    def start_publisher(self, store, interval=METRICS_PUSH_SEC):
+        def run():
+            while True:
+                time.sleep(interval)
+                try: self.publish(store)
+                except Exception as e: print(f"[Metrics] 스냅샷 저장 실패: {e}")
+        threading.Thread(target=run, name="metrics-publisher", daemon=True).start()
+
+
+REGISTRY = Registry()
+
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "라우트별 응답 시간", ("method", "route", "status")))
+NAVER_CALLS = REGISTRY.register(Counter(
+    "naver_api_calls_total", "네이버 API 호출 수", ("method", "path", "customer", "status")))
+NAVER_LATENCY = REGISTRY.register(Histogram(
+    "naver_api_duration_seconds", "네이버 API 호출 시간", ("method", "path", "customer")))
+NAVER_429 = REGISTRY.register(Counter(
+    "naver_api_rate_limited_total", "네이버 API 429 응답 수", ("path", "customer")))
+NAVER_RETRIES = REGISTRY.register(Counter(
+    "naver_api_retries_total", "네이버 API 재시도 수", ("path", "customer")))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "cache_requests_total", "캐시 조회 (hit/miss)", ("cache", "result")))
+DB_LATENCY = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "DB 쿼리 시간", ("statement",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)))
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+# --- DB 쿼리 타이밍 (SQLAlchemy 이벤트 훅) ---
+def instrument_engine(engine):
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("_query_t0")
+        if not stack: return
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement else "-"
+        DB_LATENCY.observe(time.perf_counter() - stack.pop(), verb)
+
+
+# --- 라우트별 지연시간 (순수 ASGI 미들웨어: BaseHTTPMiddleware 보다 가벼움) ---
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        status_holder = [500]
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            route = scope.get("route")
+            # 매칭된 라우트 템플릿 사용 (/api/ads/{ad_id}) - 정적파일은 static 하나로 묶음
+            label = getattr(route, "path", None) or "static"
+            if label == "": label = "static"
+            HTTP_LATENCY.observe(time.perf_counter() - t0, scope["method"], label, str(status_holder[0]))
@@ -0,0 +1,43 @@
+# ==========================================
+# DB 마이그레이션 도구 (users / visit_logs)
+# ==========================================
+#   1) 기존 DB 제자리 업그레이드 (빠진 컬럼 추가)
+#        python migrate_db.py --upgrade
+#   2) 다른 DB 로 이전 (예: SQLite -> PostgreSQL)
+#        python migrate_db.py --from sqlite:///./app.db --to postgresql+psycopg2://user:pw@127.0.0.1/naver
+import os
+import sys
+import argparse
+
+TABLES = ["users", "visit_logs"]
+
+
+def main():
+    p = argparse.ArgumentParser(description="users / visit_logs 마이그레이션")
+    p.add_argument("--from", dest="src", help="원본 DB URL (예: sqlite:///./app.db)")
+    p.add_argument("--to", dest="dst", help="대상 DB URL (미지정 시 DATABASE_URL)")
+    p.add_argument("--upgrade", action="store_true", help="대상 DB 스키마만 최신화")
+    p.add_argument("--batch-size", type=int, default=1000)
+    a = p.parse_args()
+
+    if a.dst: os.environ["DATABASE_URL"] = a.dst
+    # server 모델 정의를 그대로 사용 (init_db 가 대상 DB 에 create_all + upgrade_schema 수행)
+    import server
+    from database import engine, copy_tables
+
+    added = server.init_db()
+    print(f"✅ 스키마 최신화: {', '.join(added) if added else '변경 없음'}")
+    if a.upgrade or not a.src: return
+
+    with server.SessionLocal() as db:
+        if db.query(server.User).count() or db.query(server.VisitLog).count():
+            print("❌ 대상 DB 에 이미 데이터가 있습니다. 빈 DB 로만 이전할 수 있습니다.")
+            sys.exit(1)
+
+    copied = copy_tables(a.src, engine, server.Base.metadata, TABLES, a.batch_size)
+    for name, n in copied.items(): print(f"   {name}: {n:,}건 복사")
+    print("🏁 이전 완료")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+# ==========================================
+# 네이버 검색광고 API 로컬 모의 서버 (성능 측정 / 테스트용)
+# ==========================================
+# 실 API 를 두드리면 차단 위험이 있어서 (check_door.py 참고) 로컬에서 같은 모양으로 흉내냄.
+#   python mock_naver.py --port 9000 --campaigns 5 --groups 20 --keywords 200 --latency-ms 80 --rps 30
+#   NAVER_API_BASE_URL=http://127.0.0.1:9000 python server.py
+# - 계정 규모 설정 가능 (캠페인/그룹/키워드/소재/확장소재 수)
+# - 응답 지연 주입 (latency + jitter)
+# - 고객(X-Customer)별 초당 호출 제한 -> 초과 시 429
+# - /_mock/stats : 경로별 호출 수 (벤치마크에서 upstream 호출 수 집계용)
+# - /_mock/block : 일정 시간 모든 호출을 429/5xx 로 응답 (차단 상황 재현, 서킷 브레이커 확인용)
+# - /stat-reports : 대용량 보고서 (report_delay_ms 동안 RUNNING -> BUILT, TSV 다운로드는 /stats 와 같은 숫자)
+import json
+import time
+import random
+import asyncio
+import hashlib
+import itertools
+import argparse
+from collections import defaultdict
+from datetime import datetime
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from metrics import normalize_path
+
+
+class MockConfig:
+    def __init__(self, campaigns=3, groups=10, keywords=50, ads=3, extensions=2,
+                 latency_ms=0, jitter_ms=0, rps=0, seed=42, report_delay_ms=300):
+        self.campaigns, self.groups, self.keywords = campaigns, groups, keywords
+        self.ads, self.extensions = ads, extensions
+        self.latency_ms, self.jitter_ms = latency_ms, jitter_ms
+        self.rps = rps  # 0 = 제한 없음
+        self.seed = seed
+        self.report_delay_ms = report_delay_ms
+
+
+class MockAccount:
+    # 계정 1개 분량의 가짜 데이터 (seed 고정 -> 매번 같은 ID)
+    def __init__(self, cfg: MockConfig, customer_id="1000000"):
+        rnd = random.Random(f"{cfg.seed}-{customer_id}")
+        self.customer_id = customer_id
+        self.campaigns, self.groups, self.keywords = {}, {}, {}
+        self.ads, self.extensions = {}, {}
+        self.ip_exclusions = []
+        self.seq = 0
+        site = f"bsn-a001-00-{customer_id[-4:]}0001"
+        self.channels = {site: {"nccBusinessChannelId": site, "customerId": int(customer_id), "name": "사이트", "channelTp": "SITE",
+                                "channelKey": "https://example.com", "inspectStatus": "APPROVED"}}
+        for c in range(cfg.campaigns):
+            cid = f"cmp-a001-01-{customer_id[-4:]}{c:06d}"
+            self.campaigns[cid] = {"nccCampaignId": cid, "customerId": int(customer_id), "name": f"캠페인_{c+1}",
+                                   "campaignTp": "WEB_SITE", "userLock": False, "status": "ELIGIBLE"}
+            for g in range(cfg.groups):
+                gid = f"grp-a001-01-{customer_id[-4:]}{c:03d}{g:04d}"
+                self.groups[gid] = {"nccAdgroupId": gid, "nccCampaignId": cid, "name": f"그룹_{c+1}_{g+1}",
+                                    "bidAmt": rnd.choice([70, 100, 300, 500]), "userLock": False, "status": "ELIGIBLE",
+                                    "pcChannelId": f"bsn-a001-00-{customer_id[-4:]}0001", "mobileChannelId": f"bsn-a001-00-{customer_id[-4:]}0001"}
+                for k in range(cfg.keywords):
+                    kid = f"nkw-a001-01-{customer_id[-4:]}{c:03d}{g:04d}{k:05d}"
+                    self.keywords[kid] = {"nccKeywordId": kid, "nccAdgroupId": gid, "nccCampaignId": cid,
+                                          "keyword": f"키워드{c}_{g}_{k}", "bidAmt": rnd.randrange(70, 3000, 10),
+                                          "useGroupBidAmt": False, "userLock": False, "status": "ELIGIBLE"}
+                for a in range(cfg.ads):
+                    aid = f"nad-a001-01-{customer_id[-4:]}{c:03d}{g:04d}{a:03d}"
+                    self.ads[aid] = {"nccAdId": aid, "nccAdgroupId": gid, "type": "TEXT_45", "userLock": a == cfg.ads - 1,
+                                     "ad": {"headline": f"제목 {a}", "description": f"설명 {a}",
+                                            "pc": {"final": "https://example.com"}, "mobile": {"final": "https://m.example.com"}}}
+                for e in range(cfg.extensions):
+                    eid = f"ext-a001-01-{customer_id[-4:]}{c:03d}{g:04d}{e:03d}"
+                    self.extensions[eid] = {"nccAdExtensionId": eid, "ownerId": gid, "type": "PHONE" if e == 0 else "SUB_LINKS",
+                                            "pcChannelId": f"bsn-a001-00-{customer_id[-4:]}0001",
+                                            "mobileChannelId": f"bsn-a001-00-{customer_id[-4:]}0001", "userLock": False}
+
+    def new_id(self, prefix):
+        self.seq += 1
+        return f"{prefix}-mock-{self.seq:08d}"
+
+
+def fake_stat(obj_id, since, until):
+    # ID+기간 해시 기반 결정적 통계
+    h = int(hashlib.md5(f"{obj_id}{since}{until}".encode()).hexdigest()[:12], 16)
+    imp = h % 5000
+    clk = (h >> 13) % (imp // 20 + 1)
+    cost = clk * (70 + (h >> 7) % 900)
+    conv = (h >> 21) % (clk // 10 + 1)
+    return {"id": obj_id, "impCnt": imp, "clkCnt": clk, "salesAmt": cost, "ccnt": conv,
+            "avgRnk": round(((h >> 3) % 150) / 10, 1) if imp else 0.0, "convAmt": conv * (10000 + (h >> 5) % 40000)}
+
+
+def report_lines(acc, report_tp, day):
+    # 키워드마다 PC/모바일 2줄로 나눔 (합치면 fake_stat(id, day, day) 와 같음) + 키워드 없는 줄('-')
+    ymd = day.replace("-", "")
+    for kid, k in acc.keywords.items():
+        s = fake_stat(kid, day, day)
+        head = f"{ymd}\t{acc.customer_id}\t{k['nccCampaignId']}\t{k['nccAdgroupId']}\t{kid}\t-\t-"
+        if report_tp == "AD_CONVERSION":
+            direct = s["ccnt"] // 2
+            for method, cnt in (("1", direct), ("2", s["ccnt"] - direct)):
+                if cnt: yield f"{head}\t27758\tM\t{method}\tpurchase\t{cnt}\t{s['convAmt'] * cnt // s['ccnt']}\n"
+            continue
+        pc_imp, pc_clk, pc_cost = s["impCnt"] // 3, s["clkCnt"] // 3, s["salesAmt"] // 3
+        for dev, imp, clk, cost in (("P", pc_imp, pc_clk, pc_cost),
+                                    ("M", s["impCnt"] - pc_imp, s["clkCnt"] - pc_clk, s["salesAmt"] - pc_cost)):
+            if imp or clk: yield f"{head}\t27758\t{dev}\t{imp}\t{clk}\t{cost}\t{s['avgRnk'] * imp:.1f}\t0\n"
+    if report_tp == "AD":
+        for gid, g in acc.groups.items():
+            yield f"{ymd}\t{acc.customer_id}\t{g['nccCampaignId']}\t{gid}\t-\t-\t-\t27758\tP\t3\t0\t0\t6.0\t0\n"
+
+
+def create_mock_app(cfg: MockConfig = None):
+    cfg = cfg or MockConfig()
+    app = FastAPI(title="Naver SearchAd Mock")
+    accounts = {}
+    buckets = {}
+    reports = {}
+    report_seq = itertools.count(1)  # 삭제돼도 ID 재사용 안 함
+    block = {"status": 0, "until": 0.0}
+    counters = defaultdict(int)
+
+    def account(req: Request):
+        cid = req.headers.get("X-Customer", "0")
+        if cid not in accounts: accounts[cid] = MockAccount(cfg, cid)
+        return accounts[cid]
+
+    @app.middleware("http")
+    async def simulate(req: Request, call_next):
+        if req.url.path.startswith("/_mock"):
+            return await call_next(req)
+        if not req.headers.get("X-API-KEY") or not req.headers.get("X-Signature"):
+            return JSONResponse({"title": "Unauthorized", "code": 1018}, status_code=401)
+        counters[f"{req.method} {normalize_path(req.url.path)}"] += 1
+        if block["status"] and time.monotonic() < block["until"]:
+            counters["blocked"] += 1
+            return JSONResponse({"title": "Blocked", "code": 1016}, status_code=block["status"])
+        if cfg.rps:
+            # 고객별 토큰 버킷 (버스트 = rps)
+            cid = req.headers.get("X-Customer", "0")
+            now = time.monotonic()
+            tokens, last = buckets.get(cid, (cfg.rps, now))
+            tokens = min(cfg.rps, tokens + (now - last) * cfg.rps)
+            if tokens < 1:
+                buckets[cid] = (tokens, now)
+                counters["429"] += 1
+                return JSONResponse({"title": "Too Many Requests", "code": 1016}, status_code=429)
+            buckets[cid] = (tokens - 1, now)
+        if cfg.latency_ms or cfg.jitter_ms:
+            await asyncio.sleep((cfg.latency_ms + random.uniform(0, cfg.jitter_ms)) / 1000)
+        return await call_next(req)
+
+    # --- 관리용 ---
+    @app.get("/_mock/stats")
+    def mock_stats():
+        return dict(counters)
+
+    @app.post("/_mock/block")
+    def mock_block(status: int = 429, seconds: float = 10):
+        block.update(status=status, until=time.monotonic() + seconds)
+        return {"ok": True}
+
+    @app.post("/_mock/reset")
+    def mock_reset():
+        counters.clear()
+        return {"ok": True}
+
+    # --- 캠페인 / 그룹 ---
+    @app.get("/ncc/campaigns")
+    def campaigns(req: Request):
+        return list(account(req).campaigns.values())
+
+    @app.get("/ncc/adgroups")
+    def adgroups(req: Request, nccCampaignId: str = None):
+        return [g for g in account(req).groups.values() if not nccCampaignId or g["nccCampaignId"] == nccCampaignId]
+
+    @app.get("/ncc/adgroups/{gid}")
+    def adgroup(gid: str, req: Request):
+        g = account(req).groups.get(gid)
+        return g if g else JSONResponse({"title": "Not Found"}, status_code=404)
+
+    @app.post("/ncc/adgroups")
+    async def create_adgroup(req: Request):
+        acc, body = account(req), await req.json()
+        gid = acc.new_id("grp")
+        acc.groups[gid] = {"nccAdgroupId": gid, "bidAmt": 70, "userLock": False, "status": "ELIGIBLE", **body}
+        return acc.groups[gid]
+
+    @app.put("/ncc/adgroups/{gid}")
+    async def update_adgroup(gid: str, req: Request):
+        acc, body = account(req), await req.json()
+        if gid not in acc.groups: return JSONResponse({"title": "Not Found"}, status_code=404)
+        acc.groups[gid].update(body)
+        return acc.groups[gid]
+
+    # --- 키워드 ---
+    @app.get("/ncc/keywords")
+    def keywords(req: Request, nccAdgroupId: str = None):
+        return [k for k in account(req).keywords.values() if k["nccAdgroupId"] == nccAdgroupId]
+
+    @app.post("/ncc/keywords")
+    async def create_keywords(req: Request, nccAdgroupId: str = None):
+        acc, body = account(req), await req.json()
+        out = []
+        for k in body:
+            kid = acc.new_id("nkw")
+            acc.keywords[kid] = {"nccKeywordId": kid, "userLock": False, "status": "ELIGIBLE", **k}
+            out.append(acc.keywords[kid])
+        return out
+
+    @app.put("/ncc/keywords")
+    async def update_keywords_bulk(req: Request, fields: str = None):
+        acc, body = account(req), await req.json()
+        out = []
+        for k in body:
+            cur = acc.keywords.get(k.get("nccKeywordId"))
+            if cur: cur.update({f: k[f] for f in k if f != "nccKeywordId"}); out.append(cur)
+        return out
+
+    @app.put("/ncc/keywords/{kid}")
+    async def update_keyword(kid: str, req: Request, fields: str = None):
+        acc, body = account(req), await req.json()
+        if kid not in acc.keywords: return JSONResponse({"title": "Not Found"}, status_code=404)
+        acc.keywords[kid].update(body)
+        return acc.keywords[kid]
+
+    # --- 소재 ---
+    @app.get("/ncc/ads")
+    def ads(req: Request, nccAdgroupId: str = None):
+        return [a for a in account(req).ads.values() if a["nccAdgroupId"] == nccAdgroupId]
+
+    @app.post("/ncc/ads")
+    async def create_ad(req: Request):
+        acc, body = account(req), await req.json()
+        aid = acc.new_id("nad")
+        acc.ads[aid] = {"nccAdId": aid, "userLock": False, **body}
+        return acc.ads[aid]
+
+    @app.put("/ncc/ads/{aid}")
+    async def update_ad(aid: str, req: Request, fields: str = None):
+        acc, body = account(req), await req.json()
+        if aid not in acc.ads: return JSONResponse({"title": "Not Found"}, status_code=404)
+        acc.ads[aid].update(body)
+        return acc.ads[aid]
+
+    @app.delete("/ncc/ads/{aid}")
+    def delete_ad(aid: str, req: Request):
+        account(req).ads.pop(aid, None)
+        return {}
+
+    # --- 비즈채널 ---
+    @app.get("/ncc/channels")
+    def channels(req: Request):
+        return list(account(req).channels.values())
+
+    @app.post("/ncc/channels")
+    async def create_channel(req: Request):
+        acc, body = account(req), await req.json()
+        bid = acc.new_id("bsn")
+        acc.channels[bid] = {"nccBusinessChannelId": bid, "customerId": int(acc.customer_id), "inspectStatus": "UNDER_REVIEW", **body}
+        return acc.channels[bid]
+
+    # --- 확장소재 ---
+    @app.get("/ncc/ad-extensions")
+    def extensions(req: Request, ownerId: str = None):
+        return [e for e in account(req).extensions.values() if e["ownerId"] == ownerId]
+
+    @app.post("/ncc/ad-extensions")
+    async def create_extension(req: Request):
+        acc, body = account(req), await req.json()
+        for f in ("pcChannelId", "mobileChannelId"):
+            if body.get(f) and body[f] not in acc.channels:
+                return JSONResponse({"title": "Invalid business channel", "code": 3708}, status_code=400)
+        eid = acc.new_id("ext")
+        acc.extensions[eid] = {"nccAdExtensionId": eid, "userLock": False, **body}
+        return acc.extensions[eid]
+
+    @app.put("/ncc/ad-extensions/{eid}")
+    async def update_extension(eid: str, req: Request, fields: str = None):
+        acc, body = account(req), await req.json()
+        if eid not in acc.extensions: return JSONResponse({"title": "Not Found"}, status_code=404)
+        acc.extensions[eid].update(body)
+        return acc.extensions[eid]
+
+    # --- 통계 / 추정 ---
+    @app.get("/stats")
+    def stats(ids: str = "", fields: str = None, timeRange: str = None, datePreset: str = None):
+        if timeRange:
+            tr = json.loads(timeRange)
+            since, until = tr.get("since"), tr.get("until")
+        else:
+            since = until = datePreset or datetime.now().strftime("%Y-%m-%d")
+        return {"data": [fake_stat(i, since, until) for i in ids.split(",") if i]}
+
+    @app.post("/estimate/average-position-bid/id")
+    async def estimate(req: Request):
+        body = await req.json()
+        out = []
+        for it in body.get("items", []):
+            h = int(hashlib.md5(f"{it['key']}{body.get('device')}".encode()).hexdigest()[:8], 16)
+            bid = max(70, (h % 3000) // max(1, int(it.get("position", 3))) // 10 * 10)
+            out.append({"keyword": it["key"], "nccKeywordId": it["key"], "position": it.get("position"), "bid": bid})
+        return {"device": body.get("device"), "estimate": out}
+
+    # --- 대용량 보고서 ---
+    def report_view(req, job):
+        built = time.monotonic() - job["created"] >= cfg.report_delay_ms / 1000
+        out = {k: v for k, v in job.items() if k not in ("created", "customer")}
+        out["status"] = "BUILT" if built else "RUNNING"
+        if built: out["downloadUrl"] = f"{str(req.base_url).rstrip('/')}/report-download?authtoken={job['reportJobId']}"
+        return out
+
+    @app.post("/stat-reports")
+    async def create_report(req: Request):
+        body = await req.json()
+        if body.get("reportTp") not in ("AD", "AD_CONVERSION"):
+            return JSONResponse({"title": "Invalid reportTp", "code": 11001}, status_code=400)
+        job_id = next(report_seq)
+        reports[job_id] = {"reportJobId": job_id, "reportTp": body["reportTp"], "statDt": body.get("statDt"),
+                           "customer": req.headers.get("X-Customer", "0"), "created": time.monotonic()}
+        return report_view(req, reports[job_id])
+
+    @app.get("/stat-reports/{job_id}")
+    def get_report(job_id: int, req: Request):
+        job = reports.get(job_id)
+        return report_view(req, job) if job else JSONResponse({"title": "Not Found"}, status_code=404)
+
+    @app.delete("/stat-reports/{job_id}")
+    def delete_report(job_id: int):
+        reports.pop(job_id, None)
+        return {}
+
+    @app.get("/report-download")
+    def download_report(authtoken: int, req: Request):
+        job = reports.get(authtoken)
+        if not job or job["customer"] != req.headers.get("X-Customer", "0"):
+            return JSONResponse({"title": "Not Found"}, status_code=404)
+        return StreamingResponse(report_lines(account(req), job["reportTp"], (job["statDt"] or "")[:10]),
+                                 media_type="text/tab-separated-values")
+
+    # --- IP 차단 ---
+    @app.get("/tool/ip-exclusions")
+    def ip_exclusions(req: Request):
+        return account(req).ip_exclusions
+
+    @app.put("/tool/ip-exclusions")
+    async def put_ip_exclusions(req: Request):
+        body = await req.json()
+        if isinstance(body, str): body = json.loads(body)
+        account(req).ip_exclusions = body
+        return body
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+    p = argparse.ArgumentParser(description="네이버 검색광고 API 모의 서버")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=9000)
+    p.add_argument("--campaigns", type=int, default=3)
+    p.add_argument("--groups", type=int, default=10, help="캠페인당 광고그룹 수")
+    p.add_argument("--keywords", type=int, default=50, help="그룹당 키워드 수")
+    p.add_argument("--ads", type=int, default=3, help="그룹당 소재 수")
+    p.add_argument("--extensions", type=int, default=2, help="그룹당 확장소재 수")
+    p.add_argument("--latency-ms", type=float, default=0)
+    p.add_argument("--jitter-ms", type=float, default=0)
+    p.add_argument("--rps", type=float, default=0, help="고객별 초당 허용 호출 (0=무제한)")
+    p.add_argument("--report-delay-ms", type=float, default=300, help="보고서 생성 완료까지 걸리는 시간")
+    a = p.parse_args()
+    cfg = MockConfig(a.campaigns, a.groups, a.keywords, a.ads, a.extensions, a.latency_ms, a.jitter_ms, a.rps,
+                     report_delay_ms=a.report_delay_ms)
+    uvicorn.run(create_mock_app(cfg), host=a.host, port=a.port, log_level="warning")
@@ -0,0 +1,387 @@
+# ==========================================
+# 네이버 쓰기 Outbox (DB 에 먼저 기록 -> 워커가 묶어서 반영, 실패하면 백오프 후 재시도)
+# ==========================================
+# call_api_sync 는 3번 실패하면 None -> 복제는 그 항목을 건너뛰고, 입찰은 실패가 조용히 사라짐 (입찰가 어긋남).
+# 쓰기(PUT/POST/DELETE)는 naver_outbox 테이블에 의도(intent)로 먼저 남기고 백그라운드 워커가 반영:
+#   kind=bid  : 키워드당 대기 행은 1개 -> 새 입찰이 오면 그 행을 덮어씀 (마지막 값만 반영, old_bid 는 처음 값 유지)
+#               고객별로 모아서 PUT /ncc/keywords 목록 1회 (BID_WRITE_BATCH_SIZE 개씩). 반영되면 입찰 이력에 기록
+#   kind=lock : ON/OFF(userLock). 대상당 대기 행 1개 (마지막 값만). 키워드는 PUT /ncc/keywords 목록으로 묶고,
+#               소재/확장소재(1건씩만 가능)는 서로 순서가 상관없으므로 OUTBOX_CONCURRENCY 개씩 동시에 (속도 제한은 레인이 지킴)
+#   kind=call : 1건씩 순서대로. key 를 주면 같은 key 의 대기 행을 덮어씀
+#   429 / 5xx / 연결 오류 / 서킷 열림 -> 그 고객 남은 행 전체를 지수 백오프(+지터) 뒤로. 워커는 잠들지 않고 다른 고객 처리
+#   그 밖의 4xx -> 바로 failed (묶음이면 1건씩 다시 보내서 문제 행만 failed). OUTBOX_MAX_ATTEMPTS 넘어도 failed
+# 서버가 죽어도 DB 에 남아 있으므로 재기동 후 이어서 반영 (오래 sending 으로 남은 행은 pending 으로 되돌림).
+# 워커가 여러 개면 꺼내는 순간만 shared_state 락으로 직렬화 (꺼낸 행은 sending 이라 다른 워커가 안 가져감).
+#   OUTBOX_POLL_SEC : 대기 행 확인 간격 (기본 1초, 큐에 넣으면 바로 깨움)
+#   OUTBOX_BATCH    : 한 번에 꺼내는 최대 행 수 (기본 1000)
+#   OUTBOX_MAX_ATTEMPTS / OUTBOX_BACKOFF_MAX : 재시도 횟수 (기본 20) / 최대 백오프 초 (기본 300)
+#   OUTBOX_WAIT_SEC : 엔드포인트가 반영 결과를 기다리는 최대 초 (기본 5, 넘으면 queued 로 응답)
+#   OUTBOX_CONCURRENCY : lock 1건 요청을 동시에 보내는 수 (기본 8)
+#   BID_WRITE_BATCH_SIZE : 키워드 목록 PUT 1회에 넣는 수 (기본 100)
+import os
+import json
+import time
+import random
+import threading
+from types import SimpleNamespace
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Index, update, func
+
+import metrics
+import shared_state
+from database import Base, SessionLocal
+from circuit_breaker import UpstreamUnavailable
+
+OUTBOX_POLL_SEC = float(os.environ.get("OUTBOX_POLL_SEC", "1.0"))
+OUTBOX_BATCH = int(os.environ.get("OUTBOX_BATCH", "1000"))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "20"))
+OUTBOX_BACKOFF_MAX = float(os.environ.get("OUTBOX_BACKOFF_MAX", "300"))
+OUTBOX_WAIT_SEC = float(os.environ.get("OUTBOX_WAIT_SEC", "5"))
+OUTBOX_CONCURRENCY = int(os.environ.get("OUTBOX_CONCURRENCY", "8"))
+BID_WRITE_BATCH_SIZE = int(os.environ.get("BID_WRITE_BATCH_SIZE", "100"))
+STALE_SENDING_SEC = 300
+DONE_RETENTION_DAYS = 3
+
+OUTBOX_TOTAL = metrics.REGISTRY.register(metrics.Counter(
+    "naver_outbox_total", "Outbox 반영 결과 (행 기준)", ("kind", "result")))
+
+
+class OutboxItem(Base):
+    __tablename__ = "naver_outbox"
+    id = Column(Integer, primary_key=True)
+    customer_id = Column(String, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    kind = Column(String(8), nullable=False)  # bid / lock / call
+    key = Column(String, nullable=True)       # 덮어쓰기 기준 (bid: keywordId, lock: 대상 ID)
+    method = Column(String(8), nullable=False)
+    uri = Column(String, nullable=False)
+    params = Column(Text, nullable=True)
+    body = Column(Text, nullable=True)
+    meta = Column(Text, nullable=True)        # bid: 반영 후 입찰 이력에 남길 값 (old_bid, reason, source)
+    state = Column(String(8), nullable=False, default="pending")  # pending / sending / done / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_at = Column(Float, nullable=False, default=0.0)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
+    updated_at = Column(DateTime, default=datetime.now, nullable=False)
+
+    __table_args__ = (
+        Index("ix_outbox_state_next", "state", "next_at"),
+        Index("ix_outbox_customer_key", "customer_id", "key", "state"),
+    )
+
+
+def _dumps(v):
+    return None if v is None else json.dumps(v, ensure_ascii=False)
+
+
+def _loads(v):
+    return None if v is None else json.loads(v)
+
+
+def backoff(attempts):
+    return min(OUTBOX_BACKOFF_MAX, 2 ** min(attempts, 16)) * random.uniform(0.8, 1.2)
+
+
+class Outbox:
+    def __init__(self, session_factory=SessionLocal, store=None):
+        self.session_factory = session_factory
+        self._store = store
+        self.send = None        # (kind, method, uri, params, body, auth) -> (상태코드 또는 None, 응답)
+        self.auth_for = None    # (user_id, customer_id) -> auth
+        self.on_applied = None  # 반영된 입찰 -> 입찰 이력 행 목록
+        self._wake = threading.Event()
+        self._paused = {}       # 고객ID -> 이 시각까지 보내지 않음 (워커별)
+        self._last_purge_day = None
+        self._thread = None
+        self._pool = None
+
+    @property
+    def store(self):
+        return self._store or shared_state.store
+
+    def bind(self, send, auth_for, on_applied=None):
+        self.send, self.auth_for, self.on_applied = send, auth_for, on_applied
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="naver-outbox", daemon=True)
+            self._thread.start()
+
+    # --- 넣기 ---
+    def enqueue_bids(self, customer_id, user_id, changes, reason=None, source=None):
+        # changes: [{nccKeywordId, nccAdgroupId, bidAmt, oldBid?}] -> 행 id 목록 (changes 순서)
+        customer_id, now = str(customer_id), datetime.now()
+        ids = []
+        with self.store.lock("outbox"), self.session_factory() as db:  # 꺼내기(_claim)와 직렬화 -> 덮어쓴 값이 유실되지 않음
+            pending = self._pending(db, customer_id, "bid", {c["nccKeywordId"] for c in changes})
+            for c in changes:
+                kid = c["nccKeywordId"]
+                body = {"nccKeywordId": kid, "nccAdgroupId": c["nccAdgroupId"], "bidAmt": c["bidAmt"], "useGroupBidAmt": False}
+                row = pending.get(kid)
+                if row is not None:
+                    meta = _loads(row.meta) or {}
+                    meta.update({k: v for k, v in (("reason", reason), ("source", source)) if v})
+                    row.body, row.meta, row.user_id, row.updated_at = _dumps(body), _dumps(meta), user_id, now
+                    OUTBOX_TOTAL.inc("bid", "coalesced")
+                else:
+                    meta = {"old_bid": c.get("oldBid"), "reason": reason, "source": source}
+                    row = pending[kid] = OutboxItem(customer_id=customer_id, user_id=user_id, kind="bid", key=kid, method="PUT",
+                                                    uri="/ncc/keywords", params=_dumps({"fields": "bidAmt"}), body=_dumps(body),
+                                                    meta=_dumps(meta), created_at=now, updated_at=now)
+                    db.add(row)
+                ids.append(row)
+            db.commit()
+            ids = [r.id for r in ids]
+        self._wake.set()
+        return ids
+
+    def enqueue_locks(self, customer_id, user_id, calls):
+        # calls: [(대상 ID, uri, body)] -> 행 id 목록 (calls 순서). PUT ?fields=userLock, 대기 중인 같은 대상은 덮어씀
+        customer_id, now = str(customer_id), datetime.now()
+        params = _dumps({"fields": "userLock"})
+        rows = []
+        with self.store.lock("outbox"), self.session_factory() as db:
+            pending = self._pending(db, customer_id, "lock", {key for key, _, _ in calls})
+            for key, uri, body in calls:
+                row = pending.get(key)
+                if row is not None:
+                    row.uri, row.body, row.user_id, row.updated_at = uri, _dumps(body), user_id, now
+                    OUTBOX_TOTAL.inc("lock", "coalesced")
+                else:
+                    row = pending[key] = OutboxItem(customer_id=customer_id, user_id=user_id, kind="lock", key=key, method="PUT",
+                                                    uri=uri, params=params, body=_dumps(body), created_at=now, updated_at=now)
+                    db.add(row)
+                rows.append(row)
+            db.commit()
+            ids = [r.id for r in rows]
+        self._wake.set()
+        return ids
+
+    @staticmethod
+    def _pending(db, customer_id, kind, keys):
+        keys, out = list(keys), {}
+        for i in range(0, len(keys), 500):
+            for r in db.query(OutboxItem).filter(OutboxItem.customer_id == customer_id, OutboxItem.kind == kind,
+                                                 OutboxItem.state == "pending", OutboxItem.key.in_(keys[i:i + 500])):
+                out[r.key] = r
+        return out
+
+    def enqueue(self, customer_id, user_id, method, uri, params=None, body=None, key=None):
+        customer_id, now = str(customer_id), datetime.now()
+        with self.store.lock("outbox"), self.session_factory() as db:
+            row = None
+            if key:
+                row = db.query(OutboxItem).filter(OutboxItem.customer_id == customer_id, OutboxItem.key == key,
+                                                  OutboxItem.state == "pending").first()
+            if row is not None:
+                row.method, row.uri, row.params, row.body, row.user_id, row.updated_at = method, uri, _dumps(params), _dumps(body), user_id, now
+                OUTBOX_TOTAL.inc("call", "coalesced")
+            else:
+                row = OutboxItem(customer_id=customer_id, user_id=user_id, kind="call", key=key, method=method, uri=uri,
+                                 params=_dumps(params), body=_dumps(body), created_at=now, updated_at=now)
+                db.add(row)
+            db.commit()
+            rid = row.id
+        self._wake.set()
+        return rid
+
+    def pending_body(self, customer_id, key):
+        # 같은 key 로 아직 안 보낸 call 행의 body (없으면 None) -> 목록 전체를 덮어쓰는 PUT 을 이어서 고칠 때 기준으로 씀
+        with self.session_factory() as db:
+            row = db.query(OutboxItem.body).filter(OutboxItem.customer_id == str(customer_id), OutboxItem.key == key,
+                                                   OutboxItem.state == "pending").first()
+        return _loads(row.body) if row else None
+
+    def wait(self, ids, timeout=OUTBOX_WAIT_SEC):
+        # 반영/실패가 끝날 때까지 (최대 timeout) -> {"done": n, "failed": n, "queued": n}
+        want = set(ids)
+        deadline = time.monotonic() + timeout
+        while True:
+            states = self.states(want)
+            queued = sum(1 for s in states.values() if s in ("pending", "sending"))
+            if not queued or time.monotonic() >= deadline:
+                return {"done": sum(1 for s in states.values() if s == "done"),
+                        "failed": sum(1 for s in states.values() if s == "failed"), "queued": queued}
+            time.sleep(0.1)
+
+    def states(self, ids):
+        # 행 id -> 상태 (pending / sending / done / failed)
+        ids, out = list(ids), {}
+        with self.session_factory() as db:
+            for i in range(0, len(ids), 500):
+                out.update(db.query(OutboxItem.id, OutboxItem.state).filter(OutboxItem.id.in_(ids[i:i + 500])).all())
+        return out
+
+    # --- 꺼내서 반영 ---
+    def _claim(self):
+        now = time.time()
+        with self.store.lock("outbox"):
+            with self.session_factory() as db:
+                # 보내다가 죽은 워커의 행은 되돌림
+                db.execute(update(OutboxItem).where(OutboxItem.state == "sending",
+                                                    OutboxItem.updated_at < datetime.now() - timedelta(seconds=STALE_SENDING_SEC))
+                           .values(state="pending"))
+                q = db.query(OutboxItem).filter(OutboxItem.state == "pending", OutboxItem.next_at <= now)
+                paused = [c for c, until in self._paused.items() if until > now]
+                if paused: q = q.filter(OutboxItem.customer_id.notin_(paused))
+                rows = [SimpleNamespace(**{c.name: getattr(r, c.name) for c in OutboxItem.__table__.columns})
+                        for r in q.order_by(OutboxItem.id).limit(OUTBOX_BATCH)]
+                for i in range(0, len(rows), 500):
+                    db.execute(update(OutboxItem).where(OutboxItem.id.in_([r.id for r in rows[i:i + 500]]))
+                               .values(state="sending", updated_at=datetime.now()))
+                db.commit()
+        return rows
+
+    def flush_once(self):
+        rows = self._claim()
+        by_customer = defaultdict(list)
+        for r in rows: by_customer[r.customer_id].append(r)
+        for customer, items in by_customer.items():
+            try:
+                self._flush_customer(customer, items)
+            except Exception as e:
+                # 예상 못 한 오류 (API 키 손상 등) -> HTTP 일시 장애와 같이 시도 횟수 +1, 백오프. OUTBOX_MAX_ATTEMPTS 넘으면 failed
+                print(f"[Outbox] {customer} 반영 오류: {e}")
+                states = self.states(r.id for r in items)
+                self._pause(customer, [r for r in items if states.get(r.id) == "sending"], None, repr(e))
+        self._maybe_purge()
+        return len(rows)
+
+    def _flush_customer(self, customer, items):
+        auth = self.auth_for(items[-1].user_id, customer)
+        if not auth:
+            return self._finish(items, failed=True, error="API 키 없음")
+        # 보내는 단위: 입찰 묶음 -> 키워드 ON/OFF 묶음 -> 소재/확장소재 ON/OFF (동시에) -> call 1건씩
+        steps = []
+        for kind, field in (("bid", "bidAmt"), ("lock", "userLock")):
+            rows = [r for r in items if r.kind == kind and r.uri == "/ncc/keywords"]
+            steps += [("batch", kind, field, rows[i:i + BID_WRITE_BATCH_SIZE]) for i in range(0, len(rows), BID_WRITE_BATCH_SIZE)]
+        locks = [r for r in items if r.kind == "lock" and r.uri != "/ncc/keywords"]
+        if locks: steps.append(("parallel", "lock", None, locks))
+        steps += [("one", r.kind, None, [r]) for r in items if r.kind == "call"]
+        for j, (how, kind, field, rows) in enumerate(steps):
+            if how == "batch": ok = self._send(customer, auth, rows, kind, "PUT", "/ncc/keywords", {"fields": field}, [_loads(r.body) for r in rows])
+            elif how == "parallel": ok = self._send_parallel(customer, auth, rows)
+            else: ok = self._send(customer, auth, rows, kind, rows[0].method, rows[0].uri, _loads(rows[0].params), _loads(rows[0].body))
+            if not ok:
+                return self._defer(customer, [r for s in steps[j + 1:] for r in s[3]])
+
+    def _send_parallel(self, customer, auth, rows):
+        # 서로 순서가 상관없는 1건 요청 -> 동시에. 일시 장애로 고객이 멈추면 아직 안 보낸 행은 미룸
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=OUTBOX_CONCURRENCY, thread_name_prefix="naver-outbox-send")
+        left = []
+
+        def one(r):
+            if self._paused.get(customer, 0) > time.time(): return left.append(r)
+            self._send(customer, auth, [r], r.kind, r.method, r.uri, _loads(r.params), _loads(r.body))
+
+        list(self._pool.map(one, rows))
+        self._defer(customer, left)
+        return not left and self._paused.get(customer, 0) <= time.time()
+
+    def _send(self, customer, auth, rows, kind, method, uri, params, body):
+        # -> 계속 보내도 되면 True (성공 / 영구 실패), 일시 장애면 False (고객 전체 백오프)
+        try:
+            status, _ = self.send(kind, method, uri, params, body, auth)
+        except UpstreamUnavailable as e:
+            self._pause(customer, rows, e.retry_after, str(e))
+            return False
+        if status == 200:
+            self._finish(rows, done=True)
+            return True
+        if status is None or status == 429 or status >= 500:
+            self._pause(customer, rows, None, f"HTTP {status or '연결 오류'}")
+            return False
+        if len(rows) > 1:  # 묶음 중 어떤 행이 문제인지 모름 -> 1건씩
+            for r in rows:
+                if not self._send(customer, auth, [r], kind, method, uri, params, [_loads(r.body)]): return False
+            return True
+        self._finish(rows, failed=True, error=f"HTTP {status}")
+        return True
+
+    def _pause(self, customer, rows, delay, error):
+        if not rows: return
+        attempts = max(r.attempts for r in rows) + 1
+        delay = max(delay or 0, backoff(attempts))
+        self._paused[customer] = time.time() + delay
+        self._finish(rows, retry=True, error=error, delay=delay, count=True)
+
+    def _defer(self, customer, rows):
+        # 앞 요청이 일시 장애 -> 아직 안 보낸 행도 같은 시각까지 미룸 (시도 횟수는 그대로, 순서 유지)
+        self._finish(rows, retry=True, error="앞 요청 재시도 대기", delay=max(0.0, self._paused.get(customer, 0) - time.time()))
+
+    def _finish(self, rows, done=False, failed=False, retry=False, error=None, delay=0.0, count=False):
+        if not rows: return
+        now = datetime.now()
+        applied = []
+        with self.session_factory() as db:
+            for r in rows:
+                vals = {"updated_at": now}
+                if done:
+                    vals["state"] = "done"
+                    if r.kind == "bid": applied.append(r)
+                elif failed:
+                    vals.update(state="failed", last_error=error)
+                else:
+                    attempts = r.attempts + (1 if count else 0)
+                    vals.update(state="failed" if attempts >= OUTBOX_MAX_ATTEMPTS else "pending", attempts=attempts,
+                                next_at=time.time() + delay, last_error=error)
+                db.execute(update(OutboxItem).where(OutboxItem.id == r.id).values(**vals))
+            db.commit()
+        result = "ok" if done else "failed" if failed else "retry"
+        OUTBOX_TOTAL.inc(rows[0].kind, result, amount=len(rows))
+        if applied and self.on_applied:
+            hist = []
+            for r in applied:
+                meta, body = _loads(r.meta) or {}, _loads(r.body)
+                if not meta.get("reason"): continue
+                hist.append({"user_id": r.user_id, "keyword_id": r.key, "adgroup_id": body["nccAdgroupId"], "old_bid": meta.get("old_bid"),
+                             "new_bid": body["bidAmt"], "reason": meta["reason"], "source": meta.get("source")})
+            if hist: self.on_applied(hist)
+
+    def _maybe_purge(self):
+        today = datetime.now().strftime("%Y-%m-%d")
+        if self._last_purge_day == today: return
+        self._last_purge_day = today
+        with self.session_factory() as db:
+            db.query(OutboxItem).filter(OutboxItem.state == "done",
+                                        OutboxItem.updated_at < datetime.now() - timedelta(days=DONE_RETENTION_DAYS)).delete(synchronize_session=False)
+            db.commit()
+
+    def _run(self):
+        while True:
+            self._wake.wait(OUTBOX_POLL_SEC)
+            self._wake.clear()
+            try:
+                while self.flush_once(): pass  # 밀린 게 있으면 연달아
+            except Exception as e:
+                print(f"[Outbox] flush 실패: {e}")
+
+    # --- 조회 / 관리 ---
+    def status(self, customer_id, limit=50):
+        with self.session_factory() as db:
+            q = db.query(OutboxItem).filter(OutboxItem.customer_id == str(customer_id))
+            counts = dict(db.query(OutboxItem.state, func.count(OutboxItem.id))
+                          .filter(OutboxItem.customer_id == str(customer_id)).group_by(OutboxItem.state).all())
+            failed = q.filter(OutboxItem.state == "failed").order_by(OutboxItem.id.desc()).limit(limit).all()
+            return {"counts": counts, "pausedFor": max(0, round(self._paused.get(str(customer_id), 0) - time.time())),
+                    "failed": [{"id": r.id, "kind": r.kind, "method": r.method, "uri": r.uri, "key": r.key, "body": _loads(r.body),
+                                "attempts": r.attempts, "error": r.last_error, "at": r.updated_at.strftime("%Y-%m-%d %H:%M:%S")}
+                               for r in failed]}
+
+    def retry_failed(self, customer_id):
+        with self.session_factory() as db:
+            n = db.execute(update(OutboxItem).where(OutboxItem.customer_id == str(customer_id), OutboxItem.state == "failed")
+                           .values(state="pending", attempts=0, next_at=0.0, updated_at=datetime.now())).rowcount
+            db.commit()
+        self._paused.pop(str(customer_id), None)
+        self._wake.set()
+        return n
+
+
+writer = Outbox()
@@ -0,0 +1,82 @@
+# ==========================================
+# 관리자 포트폴리오 (전체 광고주 캠페인 실적 병렬 집계)
+# ==========================================
+# 광고주 N명 대시보드를 하나씩 열던 것을 한 번에:
+#   - 고객별로 동시에 조회 (고객별 호출 제한은 call_api 의 고객 단위 레이트리미터가 그대로 적용)
+#   - 고객+기간 단위로 캐시 (오늘 포함 기간은 PORTFOLIO_TTL, 지난 기간은 하루)
+#   - 총 소요 시간 ~= 가장 느린 고객 1명
+import os
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import shared_state
+import tracing
+
+PORTFOLIO_WORKERS = int(os.environ.get("PORTFOLIO_WORKERS", "16"))
+PORTFOLIO_TTL = int(os.environ.get("PORTFOLIO_TTL", "600"))
+PAST_TTL = 86400
+
+
+def _ratios(row):
+    cost, clk, imp, conv, amt = row["cost"], row["clicks"], row["impressions"], row["conversions"], row["convAmt"]
+    row["ctr"] = round(clk / imp * 100, 2) if imp else 0
+    row["cpc"] = round(cost / clk) if clk else 0
+    row["cpa"] = round(cost / conv) if conv else 0
+    row["roas"] = round(amt / cost * 100) if cost else 0
+    return row
+
+
+def _empty():
+    return {"impressions": 0, "clicks": 0, "cost": 0, "conversions": 0, "convAmt": 0}
+
+
+def account_summary(call_api, fetch_stats, auth, since, until):
+    # 고객 1명: 캠페인 목록 + 캠페인 실적 합계
+    camps = call_api(("GET", "/ncc/campaigns", None, None, auth))
+    if camps is None or (isinstance(camps, dict) and "error" in camps):
+        raise RuntimeError("캠페인 조회 실패")
+    stats = fetch_stats([c["nccCampaignId"] for c in camps], auth, since, until)
+    total, campaigns = _empty(), []
+    for c in camps:
+        s = stats.get(c["nccCampaignId"]) or {}
+        row = {"impressions": int(s.get("impCnt", 0)), "clicks": int(s.get("clkCnt", 0)), "cost": int(s.get("salesAmt", 0)),
+               "conversions": int(s.get("ccnt", 0)), "convAmt": int(s.get("convAmt", 0))}
+        for k, v in row.items(): total[k] += v
+        campaigns.append(_ratios({"nccCampaignId": c["nccCampaignId"], "name": c.get("name"), "userLock": c.get("userLock", False), **row}))
+    campaigns.sort(key=lambda r: r["cost"], reverse=True)
+    return {**_ratios(total), "campaignCount": len(camps), "campaigns": campaigns}
+
+
+def build_portfolio(accounts, call_api, fetch_stats, since, until, refresh=False, store=None):
+    # accounts: [(user 정보 dict, auth dict)] -> 고객별 요약 + 전체 합계
+    store = store or shared_state.store
+    ttl = PORTFOLIO_TTL if until >= datetime.now().strftime("%Y-%m-%d") else PAST_TTL
+
+    def one(user, auth):
+        key = f"portfolio:{auth['customer_id']}:{since}:{until}"
+        t0 = time.perf_counter()
+        summary = None if refresh else store.get(key)
+        cached = summary is not None
+        if not cached:
+            try:
+                summary = account_summary(call_api, fetch_stats, auth, since, until)
+                store.set(key, summary, ttl=ttl)
+            except Exception as e:
+                return {**user, "customerId": auth["customer_id"], "error": str(e), "elapsedMs": round((time.perf_counter() - t0) * 1000)}
+        return {**user, "customerId": auth["customer_id"], **summary, "cached": cached,
+                "elapsedMs": round((time.perf_counter() - t0) * 1000)}
+
+    t0 = time.perf_counter()
+    with tracing.span("portfolio", accounts=len(accounts)):
+        with ThreadPoolExecutor(max_workers=max(1, min(PORTFOLIO_WORKERS, len(accounts)))) as ex:
+            rows = [f.result() for f in [tracing.submit(ex, one, u, a) for u, a in accounts]]
+
+    total = _empty()
+    for r in rows:
+        if "error" in r: continue
+        for k in total: total[k] += r[k]
+    rows.sort(key=lambda r: r.get("cost", -1), reverse=True)
+    return {"since": since, "until": until, "accounts": rows,
+            "total": {**_ratios(total), "accounts": len(rows), "failed": sum(1 for r in rows if "error" in r)},
+            "elapsedMs": round((time.perf_counter() - t0) * 1000)}
@@ -0,0 +1,140 @@
+# ==========================================
+# 네이버 호출 우선순위 스케줄러 (고객별 레인 + 가중 공정 분배)
+# ==========================================
+# 모든 호출이 같은 고객 토큰 버킷(naver_limiter)을 두고 경쟁 -> 입찰 사이클/캠페인 복제가 스레드 10개로 버킷을 비우면
+# 대시보드 조회(list_camps, list_keywords)가 그 뒤에 줄 서거나 429 를 맞음.
+# 토큰을 받기 전에 고객별 대기열을 거침:
+#   interactive : 화면 조회 (레인을 지정하지 않은 호출의 기본값)
+#   bidding     : 입찰 변경 / 추정가 입찰 사이클
+#   bulk        : 복제, 키워드 확장, 일별 실적 수집, 전체 광고주 집계 등 백그라운드
+# 고객마다 토큰을 기다리는 스레드는 1개(head)뿐이고, 다음 head 는 레인별 가상시간으로 선택 (start-time fair queuing):
+#   차례를 받으면 그 레인 가상시간 += 1/가중치 -> 대기 중인 레인 중 가상시간이 가장 작은 레인이 다음 차례
+#   쉬던 레인이 다시 들어오면 현재 시각(마지막으로 나간 가상시간)까지 당김 -> 쉬는 동안 몫을 쌓아 몰아쓰지 못함
+# -> 모두 밀려 있으면 8:3:1 로 나눠 쓰고, interactive 가 비면 남는 용량은 전부 background 차지.
+#    interactive 는 토큰 1~2개 간격 안에 차례가 옴 (background 스레드가 몇 개든).
+# 레인은 contextvar -> tracing.submit 으로 넘긴 워커 스레드까지 전파 (threading.Thread 는 안에서 lane() 지정).
+# 공정 분배는 워커 프로세스 안에서, 속도 제한 자체는 저장소로 전체 워커 합산.
+#   NAVER_LANE_WEIGHTS : "interactive=8,bidding=3,bulk=1"
+import os
+import time
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+import metrics
+
+LANES = ("interactive", "bidding", "bulk")
+NAVER_LANE_WEIGHTS = os.environ.get("NAVER_LANE_WEIGHTS", "interactive=8,bidding=3,bulk=1")
+
+LANE_WAIT = metrics.REGISTRY.register(metrics.Histogram(
+    "naver_lane_wait_seconds", "네이버 호출 토큰을 받기까지 대기 시간 (차례 + 토큰)", ("lane",)))
+LANE_WAITING = metrics.REGISTRY.register(metrics.Gauge(
+    "naver_lane_waiting", "차례를 기다리는 네이버 호출 수 (워커별)", ("lane",)))
+
+_lane = contextvars.ContextVar("naver_lane", default=LANES[0])
+
+
+def parse_weights(spec):
+    weights = dict.fromkeys(LANES, 1.0)
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, w = part.partition("=")
+        if name.strip() in weights: weights[name.strip()] = max(0.01, float(w))
+    return weights
+
+
+@contextmanager
+def lane(name):
+    token = _lane.set(name)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def run_in(name):
+    # 엔드포인트 전체를 한 레인으로 (FastAPI 는 __wrapped__ 시그니처로 의존성 주입)
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with lane(name): return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def current():
+    return _lane.get()
+
+
+class _Customer:
+    __slots__ = ("waiting", "vtime", "clock", "busy", "served")
+
+    def __init__(self):
+        self.waiting = {l: deque() for l in LANES}
+        self.vtime = dict.fromkeys(LANES, 0.0)
+        self.clock = 0.0
+        self.busy = False
+        self.served = dict.fromkeys(LANES, 0)
+
+
+class LaneScheduler:
+    def __init__(self, limiter, weights=None):
+        self.limiter = limiter
+        self.weights = weights or parse_weights(NAVER_LANE_WEIGHTS)
+        self._mu = threading.Lock()
+        self._customers = {}
+
+    def _charge(self, c, name):
+        c.clock = c.vtime[name]
+        c.vtime[name] += 1.0 / self.weights[name]
+        c.served[name] += 1
+
+    def acquire(self, key, name=None, timeout=30):
+        # 차례를 기다린 뒤 토큰 1개 (RateLimiter.acquire 와 같은 반환값). 차례 + 토큰 합쳐서 timeout 초 안에 못 받으면 False
+        if self.limiter.rate <= 0: return True
+        name = name or _lane.get()
+        if name not in self.weights: name = LANES[0]
+        t0 = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        ev = None
+        with self._mu:
+            c = self._customers.get(key)
+            if c is None: c = self._customers[key] = _Customer()
+            if not c.waiting[name]: c.vtime[name] = max(c.vtime[name], c.clock)
+            if c.busy:
+                ev = threading.Event()
+                c.waiting[name].append(ev)
+            else:
+                c.busy = True
+                self._charge(c, name)
+        if ev:
+            LANE_WAITING.inc(name)
+            granted = ev.wait(timeout)
+            LANE_WAITING.inc(name, amount=-1)
+            if not granted:
+                with self._mu:
+                    if ev in c.waiting[name]:  # 그 사이 차례가 왔으면 (set 직전 경합) 그대로 진행
+                        c.waiting[name].remove(ev)
+                        LANE_WAIT.observe(time.perf_counter() - t0, name)
+                        return False
+        try:
+            return self.limiter.acquire(key, max(0.0, deadline - time.monotonic()))
+        finally:
+            self._release(c)
+            LANE_WAIT.observe(time.perf_counter() - t0, name)
+
+    def _release(self, c):
+        with self._mu:
+            ready = [l for l in LANES if c.waiting[l]]
+            if not ready:
+                c.busy = False
+                return
+            name = min(ready, key=lambda l: c.vtime[l])  # 동률이면 LANES 순서 (interactive 먼저)
+            self._charge(c, name)
+            c.waiting[name].popleft().set()
+
+    def snapshot(self):
+        with self._mu:
+            return {key: {"waiting": {l: len(c.waiting[l]) for l in LANES}, "served": dict(c.served)}
+                    for key, c in self._customers.items() if c.busy or any(c.served.values())}
@@ -0,0 +1,192 @@
+# ==========================================
+# 관리자용 샘플링 프로파일러 (운영 중인 프로세스, PyInstaller 빌드 포함)
+# ==========================================
+# 느린 라우트를 운영에서 재현할 때 py-spy 같은 외부 도구를 붙일 수 없음 -> 프로세스 안에서 스택 샘플링.
+#   시간 모드   : N초 동안 interval 마다 sys._current_frames() 로 모든 스레드 스택 수집
+#   요청 모드   : path 로 시작하는 요청 N개가 끝날 때까지, 그 요청이 처리 중인 구간에서만 수집
+#                 (동기 엔드포인트는 AnyIO 워커 스레드에서 돌아서 요청-스레드를 바로 잇기 어려움 -> 구간 기준)
+# 결과는 collapsed stack ("스레드;함수 (파일:줄);... 횟수") -> flamegraph.pl / speedscope / inferno 에 그대로.
+# 프로젝트 코드 프레임이 하나도 없는 스택(대기 중인 워커, 이벤트 루프 select 등)은 기본 제외 (idle=True 로 포함).
+# 같이 기록: AnyIO 스레드풀(동기 엔드포인트) 사용/대기 수, 살아 있는 ThreadPoolExecutor 별 스레드/대기열 길이.
+# 꺼져 있을 때: 샘플러 스레드 없음, 미들웨어는 속성 1번 읽고 통과. 워커가 여러 개면 요청 받은 워커 프로세스만 대상.
+import os
+import re
+import sys
+import time
+import threading
+from collections import Counter, defaultdict
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+_THREAD_NUM = re.compile(r"[-_ ]?\d+(_\d+)?$")
+POOL_EVERY = 0.1  # 스레드풀 대기열 기록 간격 (초)
+
+
+class Busy(Exception):
+    pass
+
+
+def _project_modules():
+    # 이 폴더의 최상위 모듈 이름 (PyInstaller 빌드는 co_filename 이 상대경로라 경로 대신 모듈 이름으로 판별)
+    out = set()
+    for name, m in list(sys.modules.items()):
+        f = getattr(m, "__file__", None)
+        if f and "." not in name and name not in sys.stdlib_module_names and os.path.dirname(os.path.abspath(f)) == _ROOT:
+            out.add(name)
+    return out
+
+
+def _pool_name(thread_name):
+    return _THREAD_NUM.sub("", thread_name) or thread_name
+
+
+def pools(limiter=None):
+    # 지금 살아 있는 스레드풀 현황 (ThreadPoolExecutor 는 concurrent.futures 내부 등록표에서 찾음)
+    from concurrent.futures import thread as cf_thread
+    names = {t.ident: t.name for t in threading.enumerate()}
+    groups = {}
+    for t, q in list(cf_thread._threads_queues.items()):
+        g = groups.get(id(q))
+        if g is None: g = groups[id(q)] = {"name": _pool_name(t.name), "threads": 0, "queued": q.qsize()}
+        g["threads"] += 1
+    out = {"executors": sorted(groups.values(), key=lambda g: -g["queued"]), "threads": len(names)}
+    if limiter is not None:
+        # AnyIO 기본 리미터 = 동기 엔드포인트/의존성 실행 스레드풀 (기본 40)
+        out["anyio"] = {"busy": limiter.borrowed_tokens, "total": limiter.total_tokens,
+                        "waiting": limiter.statistics().tasks_waiting}
+    return out
+
+
+class Profile:
+    def __init__(self, seconds, requests, path, interval, idle, limiter):
+        self.seconds, self.requests, self.path = seconds, requests, path or "/"
+        self.interval, self.idle, self.limiter = interval, idle, limiter
+        self.stacks = Counter()
+        self.samples = self.skipped = 0
+        self.inflight = 0
+        self.finished = []  # 요청 모드: [(경로, ms)]
+        self.pool_series = defaultdict(list)  # 풀 이름 -> [대기열 길이]
+        self.done = threading.Event()
+        self.started = self.elapsed = 0.0
+        self._mu = threading.Lock()
+        self._labels = {}  # code 객체 -> ("함수 (파일:줄)", 프로젝트 코드 여부)
+        self._ours = _project_modules()
+
+    # --- 미들웨어에서 (요청 모드) ---
+    def begin(self):
+        with self._mu: self.inflight += 1
+
+    def end(self, path, ms):
+        with self._mu:
+            self.inflight -= 1
+            if self.done.is_set(): return
+            self.finished.append((path, round(ms, 1)))
+            if len(self.finished) >= self.requests: self.done.set()
+
+    # --- 샘플러 스레드 ---
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            base = os.path.basename(code.co_filename)
+            ours = os.path.splitext(base)[0] in self._ours and "site-packages" not in code.co_filename
+            label = self._labels[code] = (f"{code.co_name} ({base}:{code.co_firstlineno})", ours)
+        return label
+
+    def _sample(self, me, names):
+        for tid, frame in sys._current_frames().items():
+            if tid == me: continue
+            stack, ours = [], False
+            while frame is not None:
+                label, mine = self._label(frame.f_code)
+                stack.append(label)
+                ours = ours or mine
+                frame = frame.f_back
+            if not ours and not self.idle:
+                self.skipped += 1
+                continue
+            stack.append(_pool_name(names.get(tid, "thread")))
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def _record_pools(self):
+        snap = pools(self.limiter)
+        for g in snap["executors"]: self.pool_series[g["name"]].append(g["queued"])
+        if "anyio" in snap: self.pool_series["anyio(waiting)"].append(snap["anyio"]["waiting"])
+
+    def run(self):
+        me = threading.get_ident()
+        self.started = time.time()
+        deadline = time.monotonic() + self.seconds
+        names, next_names, next_pools = {}, 0.0, 0.0
+        while not self.done.is_set() and time.monotonic() < deadline:
+            now = time.monotonic()
+            if now >= next_names:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                next_names = now + 1.0
+            if self.requests and not self.inflight:
+                self.done.wait(self.interval)
+                continue
+            self._sample(me, names)
+            if now >= next_pools:
+                self._record_pools()
+                next_pools = now + POOL_EVERY
+            time.sleep(self.interval)
+        self.elapsed = time.time() - self.started
+
+    # --- 결과 ---
+    def collapsed(self):
+        return "".join(f"{k} {v}\n" for k, v in self.stacks.most_common())
+
+    def summary(self, top=30):
+        self_cnt, total_cnt = Counter(), Counter()
+        for stack, n in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames: continue
+            self_cnt[frames[-1]] += n
+            for f in set(frames): total_cnt[f] += n
+        pct = lambda n: round(n * 100 / self.samples, 1) if self.samples else 0
+        return {
+            "mode": "requests" if self.requests else "seconds", "path": self.path, "elapsedS": round(self.elapsed, 2),
+            "intervalMs": self.interval * 1000, "samples": self.samples, "idleSkipped": self.skipped,
+            "requests": [{"path": p, "ms": ms} for p, ms in self.finished],
+            "self": [{"frame": f, "samples": n, "pct": pct(n)} for f, n in self_cnt.most_common(top)],
+            "total": [{"frame": f, "samples": n, "pct": pct(n)} for f, n in total_cnt.most_common(top)],
+            "pools": {name: {"max": max(v), "avg": round(sum(v) / len(v), 2)} for name, v in self.pool_series.items()},
+            "collapsed": self.collapsed(),
+        }
+
+
+class Profiler:
+    def __init__(self):
+        self.active = None  # 미들웨어가 보는 유일한 값 (None 이면 아무것도 안 함)
+        self._mu = threading.Lock()
+
+    def run(self, seconds=10, requests=0, path=None, interval=0.005, idle=False, limiter=None):
+        # 호출한 스레드에서 샘플링까지 수행 (끝날 때까지 블록). 동시에 1개만
+        p = Profile(seconds, requests, path, interval, idle, limiter)
+        with self._mu:
+            if self.active is not None: raise Busy("이미 프로파일 중")
+            self.active = p
+        try:
+            p.run()
+        finally:
+            self.active = None
+        return p
+
+
+profiler = Profiler()
+
+
+class ProfileMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        p = profiler.active
+        if p is None or not p.requests or scope["type"] != "http" or not scope["path"].startswith(p.path):
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        p.begin()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            p.end(scope["path"], (time.perf_counter() - t0) * 1000)
@@ -3,32 +3,49 @@ print("\n\n🔥🔥🔥 [SaaS 모드: 기능 완전 복구 + 하이브리드 지
 import hashlib
 import hmac
 import base64
-import requests
 import json
 import time
 import sys
 import os
 import threading
-import csv
 import re
 import urllib.parse
 from datetime import datetime, timedelta
 # [수정] Dict, Any가 빠져서 에러가 났던 부분 해결
 from typing import List, Optional, Dict, Any 
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager
+
+# [멀티워커] 스크립트로 실행될 때도 "server:app" import 가 같은 모듈을 가리키도록
+# (워커 프로세스가 __mp_main__ 으로 한 번 더 실행되며 테이블이 중복 정의되는 문제 방지)
+if __name__ in ("__main__", "__mp_main__"):
+    sys.modules.setdefault("server", sys.modules[__name__])
 
-import mimetypes
 from fastapi import FastAPI, HTTPException, Request, Header, Query, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, text
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from passlib.context import CryptContext
-from jose import JWTError, jwt
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy.orm import Session
+# [기동 속도] requests / passlib / jose 는 첫 사용 시 import (합계 ~150ms). 기동 직후 백그라운드에서 미리 로드
+
+import metrics
+import tracing
+import shared_state
+import priority_lanes
+from singleflight import SingleFlight
+from estimate_service import EstimateService, plan_bid_changes
+import events
+import static_assets
+from fast_json import FastJSONResponse
+from keyword_table import KeywordTable
+import portfolio
+import stats_warehouse
+import circuit_breaker
+import profiler
+import outbox
 
 # [안전장치] 출력 인코딩
 try:
@@ -49,14 +66,11 @@ SECRET_KEY = "YOUR_SECRET_KEY_PLEASE_CHANGE_THIS"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./app.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-# [최적화] WAL 모드 적용
-with engine.connect() as connection:
-    connection.execute(text("PRAGMA journal_mode=WAL;"))
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+# [DB] 엔진/세션은 database.py (DATABASE_URL 로 SQLite/PostgreSQL 선택)
+from database import engine, SessionLocal, Base, upgrade_schema
+import bid_history
+metrics.instrument_engine(engine)
+tracing.instrument_engine(engine)
 
 class User(Base):
     __tablename__ = "users"
@@ -86,10 +100,29 @@ class VisitLog(Base):
     url = Column(String)
     referrer = Column(String, nullable=True)
 
-Base.metadata.create_all(bind=engine)
+_db_ready = False
+
+def init_db():
+    # [기동 속도] 테이블 생성/스키마 보정은 import 시점이 아니라 lifespan 에서 1회 (멀티워커는 공유 락으로 직렬화)
+    global _db_ready
+    if _db_ready: return []
+    with shared_state.store.lock("db_init", ttl=120):
+        Base.metadata.create_all(bind=engine)
+        added = upgrade_schema(engine)
+    _db_ready = True
+    return added
+
+_pwd_context = None
+
+def pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+    return _pwd_context
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+oauth2_optional = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
 
 # --- Pydantic Models (정석대로 줄바꿈 적용) ---
 class UserCreate(BaseModel):
@@ -140,6 +173,8 @@ class LogItem(BaseModel):
     oldBid: int
     newBid: int
     reason: str
+    keywordId: Optional[str] = None
+    adGroupId: Optional[str] = None
 
 class AdGroupCreateItem(BaseModel):
     nccCampaignId: str
@@ -162,6 +197,12 @@ class ExtensionCreateItem(BaseModel):
 class StatusUpdate(BaseModel):
     status: str
 
+class BulkStatusItem(BaseModel):
+    status: str   # ON / OFF
+    adIds: List[str] = []
+    extensionIds: List[str] = []
+    keywordIds: List[str] = []
+
 class SmartExpandItem(BaseModel):
     sourceGroupId: str
     keywords: List[str]
@@ -172,6 +213,26 @@ class CloneAdsItem(BaseModel):
     sourceGroupId: str
     targetGroupId: str
 
+class EstimateBidItem(BaseModel):
+    campaignId: Optional[str] = None
+    adgroupIds: Optional[List[str]] = None
+    position: int = 3
+    devices: List[str] = ["MOBILE", "PC"]
+    policy: str = "max"   # max / min / avg / MOBILE / PC
+    maxBid: Optional[int] = None
+    dryRun: bool = False
+    statsDays: int = 7    # 변경 목록에 붙일 최근 실적 일수 (일별 저장소에 다 있을 때만, 0=안 붙임)
+
+class BacktestItem(BaseModel):
+    since: Optional[str] = None   # 기본: 어제까지 30일
+    until: Optional[str] = None
+    targetRank: List[float] = [2, 3, 4, 5]
+    bidStep: List[int] = [100, 200, 300, 500]
+    probeLimit: List[int] = [1000, 3000]
+    maxBid: Optional[List[int]] = None
+    sort: str = "roas"            # roas / spend / clicks / avgRank / onTargetPct ...
+    top: int = 50
+
 # --- Helper Functions ---
 def get_db():
     db = SessionLocal()
@@ -181,18 +242,20 @@ def get_db():
         db.close()
 
 def verify_password(plain, hashed):
-    return pwd_context.verify(plain, hashed)
+    return pwd_context().verify(plain, hashed)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 def create_access_token(data: dict):
+    from jose import jwt
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -210,6 +273,12 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             db.commit()
     return user
 
+def get_optional_user(token: Optional[str] = Depends(oauth2_optional), db: Session = Depends(get_db)):
+    # 토큰이 있으면 사용자, 없거나 잘못되면 None (기존 비인증 호출 호환용)
+    if not token: return None
+    try: return get_current_user(token=token, db=db)
+    except HTTPException: return None
+
 def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -225,7 +294,16 @@ def get_current_admin_user(current_user: User = Depends(get_current_user)):
 # ==========================================
 # 3. 네이버 API 로직 (400 에러 해결 완료)
 # ==========================================
-BASE_URL = "https://api.searchad.naver.com"
+BASE_URL = os.environ.get("NAVER_API_BASE_URL", "https://api.searchad.naver.com")  # 로컬 모의서버: mock_naver.py
+
+# [속도제한] 고객별 초당 호출 수 (워커가 여러 개여도 STATE_URL 저장소로 합산됨, 0=끔)
+NAVER_RPS = float(os.environ.get("NAVER_RPS", "10"))
+naver_limiter = shared_state.RateLimiter(NAVER_RPS)
+# [우선순위] 토큰은 레인별 가중 공정 분배로 (화면 조회 > 입찰 > 복제/수집) - 백그라운드 작업이 버킷을 비워도 UI 는 바로 차례
+naver_lanes = priority_lanes.LaneScheduler(naver_limiter)
+naver_flight = SingleFlight("naver_singleflight")
+# [차단 보호] 429/연결 끊김이 몰리면 고객별/전체 서킷을 열고 즉시 실패 (복구는 백그라운드 노크로 확인)
+breaker = circuit_breaker.CircuitBreaker()
 
 def generate_signature(timestamp, method, uri, secret_key):
     message = f"{timestamp}.{method}.{uri}"
@@ -245,6 +323,16 @@ def get_header(method, uri, api_key, secret_key, customer_id):
     }
 
 # [핵심] 수동 URL 조립 방식으로 400 에러 원천 차단
+def _build_url(uri, params):
+    clean_uri = uri.split("?")[0]
+    url = BASE_URL + clean_uri
+    
+    # [중요] 라이브러리(requests)의 params 인자를 쓰지 않고 직접 URL에 붙임
+    query_string = urllib.parse.urlencode(params) if params else ""
+    if query_string:
+        url = f"{url}?{query_string}"
+    return url, clean_uri, query_string
+
 def call_api_sync(args):
     if len(args) == 5:
         method, uri, params, body, auth = args
@@ -254,53 +342,155 @@ def call_api_sync(args):
     if not auth or not auth.get('api_key'):
         return {"error": "Missing authentication data"}
 
-    clean_uri = uri.split("?")[0]
-    url = BASE_URL + clean_uri
-    
-    # [중요] 라이브러리(requests)의 params 인자를 쓰지 않고 직접 URL에 붙임
-    if params:
-        query_string = urllib.parse.urlencode(params)
-        url = f"{url}?{query_string}"
-
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            headers = get_header(method, clean_uri, auth['api_key'], auth['secret_key'], auth['customer_id'])
-            
-            if method in ["POST", "PUT", "DELETE"]:
-                # params=params 제거됨 (URL에 이미 있음)
-                resp = requests.request(method, url, json=body, headers=headers)
-            else:
-                resp = requests.get(url, headers=headers)
-                
-            if resp.status_code == 200: 
-                return resp.json()
-            
-            if resp.status_code == 429:
-                wait_time = 1.5 * (attempt + 1)
-                print(f"⚠️ [429] 대기... {wait_time}초")
-                time.sleep(wait_time)
-                continue
-            
-            if resp.status_code >= 400:
-                print(f"[API Error {resp.status_code}]: {url}")
-                if body: print(f" -> Body: {str(body)[:100]}...")
-                print(f" -> Response: {resp.text[:200]}")
-                return None
-                
-        except Exception as e:
-            print(f"[Net Error]: {e}")
-            time.sleep(1)
-    return None
+    url, clean_uri, query_string = _build_url(uri, params)
+
+    if method == "GET":
+        # [최적화] 동일 조회 동시 요청은 upstream 1회로 합침 (고객, 경로, 파라미터 기준)
+        # API 키도 키에 포함 -> 같은 고객ID 를 입력한 다른 키(권한 없는 키)와는 결과를 공유하지 않음
+        key = (str(auth.get('customer_id', '')), auth.get('api_key'), clean_uri, query_string)
+        return naver_flight.do(key, lambda: _request_with_retries(method, url, clean_uri, body, auth))
+    return _request_with_retries(method, url, clean_uri, body, auth)
+
+def call_api_status(method, uri, params, body, auth, max_retries=1):
+    # Outbox 용: 재시도/대기는 호출하는 쪽이 함 -> (상태코드 또는 None(연결 오류), 응답 JSON)
+    url, clean_uri, _ = _build_url(uri, params)
+    return _request(method, url, clean_uri, body, auth, max_retries)
+
+def _request_with_retries(method, url, clean_uri, body, auth):
+    return _request(method, url, clean_uri, body, auth)[1]
+
+def _take_token(customer):
+    # 제한 시간 안에 토큰을 못 받으면 토큰 없이 보내지 않음 -> 429 와 같게 취급 (API 503 + Retry-After, Outbox 는 백오프)
+    if not naver_lanes.acquire(customer):
+        raise circuit_breaker.UpstreamUnavailable(f"limit:{customer}", 5.0)
+
+def _request(method, url, clean_uri, body, auth, max_retries=3):
+    import requests
+    status = None
+    path_label = metrics.normalize_path(clean_uri)
+    customer = str(auth.get('customer_id', ''))
+    with tracing.span("naver", method=method, path=path_label, customer=customer):
+        for attempt in range(max_retries):
+            if attempt > 0: metrics.NAVER_RETRIES.inc(path_label, customer)
+            breaker.check(customer)  # 차단 중이면 재시도 없이 바로 UpstreamUnavailable
+            _take_token(customer)
+            t0 = time.perf_counter()
+            with tracing.span("naver.attempt", attempt=attempt) as sp:
+                try:
+                    headers = get_header(method, clean_uri, auth['api_key'], auth['secret_key'], auth['customer_id'])
+                    
+                    if method in ["POST", "PUT", "DELETE"]:
+                        # params=params 제거됨 (URL에 이미 있음)
+                        resp = requests.request(method, url, json=body, headers=headers)
+                    else:
+                        resp = requests.get(url, headers=headers)
+
+                    metrics.NAVER_LATENCY.observe(time.perf_counter() - t0, method, path_label, customer)
+                    metrics.NAVER_CALLS.inc(method, path_label, customer, str(resp.status_code))
+                    if sp: sp.set(status=resp.status_code)
+                    breaker.record(customer, auth, "throttled" if resp.status_code == 429 else "error" if resp.status_code >= 500 else "ok")
+                        
+                    status = resp.status_code
+                    if resp.status_code == 200: 
+                        return status, resp.json()
+                    
+                    if resp.status_code == 429:
+                        metrics.NAVER_429.inc(path_label, customer)
+                        if attempt + 1 == max_retries: break
+                        wait_time = 1.5 * (attempt + 1)
+                        print(f"⚠️ [429] 대기... {wait_time}초")
+                        time.sleep(wait_time)
+                        continue
+                    
+                    if resp.status_code >= 400:
+                        print(f"[API Error {resp.status_code}]: {url}")
+                        if body: print(f" -> Body: {str(body)[:100]}...")
+                        print(f" -> Response: {resp.text[:200]}")
+                        return status, None
+                        
+                except Exception as e:
+                    status = None
+                    metrics.NAVER_CALLS.inc(method, path_label, customer, "error")
+                    breaker.record(customer, auth, "error")
+                    if sp: sp.set(error=repr(e))
+                    print(f"[Net Error]: {e}")
+                    if attempt + 1 < max_retries: time.sleep(1)
+    return status, None
+
+estimate_service = EstimateService(call_api_sync)
+
+# [Outbox] 쓰기는 DB 에 먼저 넣고 워커가 반영 (입찰/ON·OFF=bidding 레인, 복제 등=bulk 레인)
+def _outbox_send(kind, method, uri, params, body, auth):
+    with priority_lanes.lane("bidding" if kind in ("bid", "lock") else "bulk"):
+        return call_api_status(method, uri, params, body, auth)
+
+def outbox_call(auth, user_id, method, uri, params=None, body=None, key=None):
+    # 1건 쓰기 -> Outbox 에 넣고 최대 OUTBOX_WAIT_SEC 기다림. 반영되면 success, 429/차단 중이면 queued (나중에 반영), 실패면 400
+    res = outbox.writer.wait([outbox.writer.enqueue(auth['customer_id'], user_id, method, uri, params, body, key=key)])
+    if res["failed"]: raise HTTPException(status_code=400, detail="Failed")
+    return {"success": bool(res["done"]), "queued": bool(res["queued"])}
+
+def _outbox_auth(user_id, customer_id):
+    # 넣은 사용자의 키 -> 그 사이 키를 지웠거나 바꿨으면 같은 광고주를 등록한 다른 사용자 키
+    with SessionLocal() as db:
+        t = db.get(User, user_id) if user_id else None
+        if not (t and t.naver_access_key and str(t.naver_customer_id).strip() == customer_id):
+            t = db.query(User).filter(User.naver_customer_id == customer_id, User.naver_access_key != None).first()
+        return get_naver_auth(t) if t else None
+
+outbox.writer.bind(_outbox_send, _outbox_auth, bid_history.writer.append)
+
+def _knock(auth):
+    # 서킷 프로브: check_door.knock_knock 과 같은 /ncc/campaigns 1회 (레이트리미터/재시도/브레이커 우회)
+    ok, status, detail = circuit_breaker.knock(BASE_URL, get_header("GET", "/ncc/campaigns", auth['api_key'], auth['secret_key'], auth['customer_id']))
+    metrics.NAVER_CALLS.inc("GET", "/ncc/campaigns", str(auth.get('customer_id', '')), str(status))
+    if not ok: print(f"[CircuitBreaker] 프로브 실패 {auth.get('customer_id')} ({status}): {detail[:200]}")
+    return ok
+
+def _probe_auth(customer_id):
+    # 이 워커가 모르는 고객 (재기동 후 등) -> DB 의 키. global 은 키가 있는 아무 사용자
+    if customer_id: return _outbox_auth(None, customer_id)
+    with SessionLocal() as db:
+        t = db.query(User).filter(User.naver_access_key != None).first()
+        return get_naver_auth(t) if t else None
+
+def download_report(url, auth):
+    # 대용량 보고서 TSV 스트리밍 다운로드 (서명 필요, 한 줄씩 넘김 -> 파일 전체를 메모리에 올리지 않음)
+    import requests
+    path = urllib.parse.urlparse(url).path
+    path_label = metrics.normalize_path(path)
+    customer = str(auth.get('customer_id', ''))
+    breaker.check(customer)
+    _take_token(customer)
+    headers = get_header("GET", path, auth['api_key'], auth['secret_key'], auth['customer_id'])
+    with tracing.span("naver", method="GET", path=path_label, customer=customer):
+        with requests.get(url, headers=headers, stream=True, timeout=(10, 300)) as resp:
+            metrics.NAVER_CALLS.inc("GET", path_label, customer, str(resp.status_code))
+            breaker.record(customer, auth, "throttled" if resp.status_code == 429 else "error" if resp.status_code >= 500 else "ok")
+            resp.raise_for_status()
+            resp.encoding = "utf-8"
+            for line in resp.iter_lines(decode_unicode=True):
+                if line: yield line
 
 def fetch_stats(ids_list, auth, since=None, until=None):
     if not ids_list or not auth: return {}
+    today = datetime.now().strftime("%Y-%m-%d")
+    if since and until and since < today:
+        # 지난 날짜가 일별 저장소에 다 들어 있으면 거기서 (API 호출 없음) + 오늘이 끼어 있으면 오늘 분만 /stats
+        cid = str(auth.get('customer_id', ''))
+        past_until = min(until, (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d"))
+        wh = stats_warehouse.get_warehouse()
+        if not wh.missing_days(cid, since, past_until):
+            stats_map = wh.stats_for(cid, ids_list, since, past_until)
+            if until >= today:
+                for k, v in _fetch_stats_api(ids_list, auth, today, today).items():
+                    stats_map[k] = stats_warehouse.merge_stats(stats_map[k], v) if k in stats_map else v
+            return stats_map
+    return _fetch_stats_api(ids_list, auth, since or today, until or today)
+
+def _fetch_stats_api(ids_list, auth, since, until):
     stats_map = {}
-    if not since or not until:
-        today = datetime.now().strftime("%Y-%m-%d")
-        time_range = {"since": today, "until": today}
-    else:
-        time_range = {"since": since, "until": until}
+    time_range = {"since": since, "until": until}
 
     for i in range(0, len(ids_list), 50):
         chunk = ids_list[i:i + 50]
@@ -325,8 +515,11 @@ def get_naver_auth(user: User):
         "customer_id": str(user.naver_customer_id).strip()
     }
 
+# 실적 없는 항목은 같은 dict 를 공유 (키워드 1만개면 1만개 생성하던 것 제거) -> 읽기 전용으로만 사용
+EMPTY_STATS = {"impressions":0,"clicks":0,"cost":0,"ctr":0,"cpc":0,"conversions":0,"cpa":0,"roas":0,"convAmt":0}
+
 def format_stats(s):
-    if not s: return {"impressions":0,"clicks":0,"cost":0,"ctr":0,"cpc":0,"conversions":0,"cpa":0,"roas":0,"convAmt":0}
+    if not s: return EMPTY_STATS
     try:
         imp, clk, cost, conv, c_amt = int(s.get('impCnt',0)), int(s.get('clkCnt',0)), int(s.get('salesAmt',0)), int(s.get('ccnt',0)), int(s.get('convAmt',0))
         return {
@@ -339,7 +532,7 @@ def format_stats(s):
             "convAmt": c_amt
         }
     except:
-        return {"impressions":0,"clicks":0,"cost":0,"ctr":0,"cpc":0,"conversions":0,"cpa":0,"roas":0,"convAmt":0}
+        return EMPTY_STATS
 
 def safe_json_parse(d):
     if isinstance(d, dict): return d
@@ -364,24 +557,132 @@ def format_extension(e):
     e['extension'] = safe_json_parse(e.get('adExtension'))
     return e
 
-# --- 로그 파일 (Lock 추가) ---
+# --- ON/OFF (userLock) ---
+# 조회 응답의 userLock 을 캐시 (워커 간 공유, LOCK_CACHE_TTL 초) -> 일괄 변경 때 이미 그 상태인 대상은 호출하지 않음.
+# 캐시 값은 [잠김 여부, 그룹ID] (키워드는 그룹을 알면 목록 PUT 으로 묶을 수 있음). 반영 대기 중에는 잠김 여부를 비워 둠.
+LOCK_CACHE_TTL = int(os.environ.get("LOCK_CACHE_TTL", "600"))
+LOCK_URIS = {"ads": "/ncc/ads/{}", "extensions": "/ncc/ad-extensions/{}", "keywords": "/ncc/keywords/{}"}
+
+def parse_lock(status):
+    s = str(status).strip().upper()
+    if s in ("ON", "ELIGIBLE", "ENABLED"): return False
+    if s in ("OFF", "PAUSED", "LOCKED"): return True
+    raise HTTPException(status_code=400, detail="status 는 ON 또는 OFF")
+
+def remember_locks(customer_id, rows, id_field, group_field):
+    if rows: shared_state.store.set_many({f"lock:{customer_id}:{r[id_field]}": [bool(r.get('userLock')), r.get(group_field)]
+                                          for r in rows if r.get(id_field)}, ttl=LOCK_CACHE_TTL)
+
+def set_locks(auth, user_id, targets, lock):
+    # targets: [(ads|extensions|keywords, ID)] -> Outbox 로 넣고 최대 OUTBOX_WAIT_SEC 기다림
+    customer = auth['customer_id']
+    targets = list(dict.fromkeys(targets))
+    cache_key = lambda i: f"lock:{customer}:{i}"
+    cached = shared_state.store.get_many([cache_key(i) for _, i in targets])
+    calls, groups = [], {}
+    for entity, i in targets:
+        cur, group = cached.get(cache_key(i)) or (None, None)
+        if cur == lock: continue
+        groups[i] = group
+        if entity == "keywords" and group: calls.append((i, "/ncc/keywords", {"nccKeywordId": i, "nccAdgroupId": group, "userLock": lock}))
+        else: calls.append((i, LOCK_URIS[entity].format(i), {"userLock": lock}))
+    res = {"requested": len(targets), "skipped": len(targets) - len(calls), "success": 0, "failed": 0, "queued": 0}
+    if calls:
+        shared_state.store.set_many({cache_key(i): [None, groups[i]] for i, _, _ in calls}, ttl=LOCK_CACHE_TTL)
+        ids = outbox.writer.enqueue_locks(customer, user_id, calls)
+        done = outbox.writer.wait(ids)
+        res.update(success=done["done"], failed=done["failed"], queued=done["queued"])
+        states = outbox.writer.states(ids)
+        shared_state.store.set_many({cache_key(i): [lock, groups[i]] for rid, (i, _, _) in zip(ids, calls) if states.get(rid) == "done"},
+                                    ttl=LOCK_CACHE_TTL)
+    res["paused"] = breaker.is_open(customer)
+    return res
+
+# --- 비즈채널 목록 캐시 ---
+# 확장소재 화면/생성/복제마다 채널을 다시 읽지 않도록 고객별 목록을 캐시 (워커 간 공유, CHANNEL_CACHE_TTL 초).
+# 확장소재의 pcChannelId/mobileChannelId 는 POST 전에 여기서 확인 -> 대량 복제에서 실패할 요청을 보내지 않음.
+# 목록에 없는 ID 가 나오면 (그 사이 새로 만든 채널일 수 있음) CHANNEL_MISS_REFRESH_SEC 에 한 번만 다시 읽음.
+CHANNEL_CACHE_TTL = int(os.environ.get("CHANNEL_CACHE_TTL", "1800"))
+CHANNEL_MISS_REFRESH_SEC = 60
+
+def get_channels(auth, refresh=False):
+    # -> {"at": 읽은 시각, "channels": [...]} (목록을 못 읽으면 None)
+    key = f"channels:{auth['customer_id']}"
+    cat = None if refresh else shared_state.store.get(key)
+    if cat is None:
+        res = call_api_sync(("GET", "/ncc/channels", None, None, auth))
+        if res is None: return None
+        cat = {"at": time.time(), "channels": res}
+        shared_state.store.set(key, cat, ttl=CHANNEL_CACHE_TTL)
+    return cat
+
+def unknown_channels(auth, ids):
+    # 목록에 없는 채널 ID 집합 (목록을 못 읽으면 빈 집합 -> 판단은 네이버에 맡김)
+    ids = {i for i in ids if i}
+    cat = get_channels(auth) if ids else None
+    if cat is None: return set()
+    missing = ids - {c['nccBusinessChannelId'] for c in cat['channels']}
+    if missing and time.time() - cat['at'] > CHANNEL_MISS_REFRESH_SEC:
+        cat = get_channels(auth, refresh=True) or cat
+        missing = ids - {c['nccBusinessChannelId'] for c in cat['channels']}
+    return missing
+
+# --- 로그 파일 (Lock 추가: 워커 간 공유 락) ---
 VISIT_LOG_FILE = "visits.json"
-log_lock = threading.Lock()
 
 def save_visit_logs(logs):
-    with log_lock:
+    with shared_state.store.lock("visit_log_file"):
         with open(VISIT_LOG_FILE, "w", encoding="utf-8") as f:
             json.dump(logs[:1000], f, ensure_ascii=False, indent=2)
 
-mimetypes.init()
-mimetypes.add_type('application/javascript', '.js')
-mimetypes.add_type('text/css', '.css')
+def _warmup():
+    # 첫 로그인/첫 네이버 호출이 import 비용을 떠안지 않도록 기동 후 백그라운드에서 로드 + 정적 파일 사전 압축
+    try:
+        import requests, jose.jwt  # noqa: F401
+        pwd_context()
+    except Exception as e: print(f"[Startup] prewarm 실패: {e}")
+    # 패키징된 exe 는 _MEIPASS 가 실행마다 새로 풀리는 임시 폴더 -> 압축은 빌드 때 spec 에서 (NaverAdManager.spec)
+    dist_path = find_dist_path()
+    if not getattr(sys, 'frozen', False) and os.path.exists(os.path.join(dist_path, "index.html")):
+        try: static_assets.precompress(dist_path)
+        except OSError as e: print(f"[Startup] 정적 파일 압축 생략: {e}")
+
+@asynccontextmanager
+async def lifespan(app):
+    init_db()
+    bid_history.writer.start()
+    outbox.writer.start()
+    threading.Thread(target=_warmup, name="warmup", daemon=True).start()
+    breaker.start(_knock, _probe_auth)
+    if METRICS_SHARED: metrics.REGISTRY.start_publisher(shared_state.store)
+    if WAREHOUSE_NIGHTLY_HOUR: threading.Thread(target=_warehouse_nightly, name="warehouse-nightly", daemon=True).start()
+    yield
+    bid_history.writer.flush()
 
 # ==========================================
 # 4. FastAPI App
 # ==========================================
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(static_assets.ApiGZipMiddleware)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(tracing.TracingMiddleware)
+app.add_middleware(profiler.ProfileMiddleware)  # 요청 모드 프로파일 중에만 동작
+
+@app.exception_handler(circuit_breaker.UpstreamUnavailable)
+async def upstream_unavailable(request: Request, exc: circuit_breaker.UpstreamUnavailable):
+    return JSONResponse({"detail": str(exc), "scope": exc.scope, "retryAfter": round(exc.retry_after)}, status_code=503,
+                        headers={"Retry-After": str(int(exc.retry_after + 0.999))})
+
+# [모니터링] Prometheus 스크레이프용 (METRICS_TOKEN 설정 시 ?token= 필요)
+# 공유 저장소(멀티워커)면 어느 워커가 받든 전체 워커 합계 (metrics.py 참고)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+METRICS_SHARED = not shared_state.STATE_URL.startswith("memory")
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics(token: Optional[str] = None):
+    if METRICS_TOKEN and token != METRICS_TOKEN: raise HTTPException(status_code=403)
+    return PlainTextResponse(metrics.REGISTRY.render(shared_state.store if METRICS_SHARED else None), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.post("/auth/register", response_model=UserOut)
 def register(user: UserCreate, db: Session = Depends(get_db)):
@@ -437,6 +738,55 @@ def revoke(uid: int, u: User = Depends(get_current_admin_user), db: Session = De
     t.is_paid=False; db.commit()
     return {"status":"success"}
 
+@app.get("/admin/portfolio") # 전체 유료 광고주 캠페인 실적 (병렬 조회 + 일 단위 캐시)
+@priority_lanes.run_in("bulk")
+def admin_portfolio(since: Optional[str] = None, until: Optional[str] = None, refresh: bool = False,
+                    u: User = Depends(get_current_admin_user), db: Session = Depends(get_db)):
+    today = datetime.now().strftime("%Y-%m-%d")
+    since, until = since or today, until or since or today
+    return FastJSONResponse(portfolio.build_portfolio(paid_accounts(db), call_api_sync, fetch_stats, since, until, refresh))
+
+@app.get("/admin/upstream") # 서킷 브레이커 상태 (열린 범위 / 워커별 최근 실패율)
+def admin_upstream(u: User = Depends(get_current_admin_user)):
+    return {**breaker.snapshot(), "lanes": naver_lanes.snapshot()}
+
+@app.post("/admin/upstream/reset") # 수동 복구 (scope: global 또는 cust:{고객ID})
+def admin_upstream_reset(scope: str = Query(circuit_breaker.GLOBAL), u: User = Depends(get_current_admin_user)):
+    breaker.close(scope)
+    return {**breaker.snapshot(), "lanes": naver_lanes.snapshot()}
+
+@app.get("/admin/profile") # 샘플링 프로파일 (기본: collapsed stack -> flamegraph.pl / speedscope, format=json: 요약 + 스레드풀 대기열)
+def admin_profile(seconds: float = Query(10, gt=0, le=300), requests: int = Query(0, ge=0, le=1000), path: Optional[str] = None,
+                  interval_ms: float = Query(5, ge=1, le=100), idle: bool = False, format: str = "collapsed",
+                  u: User = Depends(get_current_admin_user)):
+    # requests > 0 이면 path 로 시작하는 요청 N개가 끝날 때까지 (seconds 는 최대 대기)
+    if format not in ("collapsed", "json"): raise HTTPException(status_code=400, detail="format: collapsed / json")
+    import anyio.from_thread, anyio.to_thread
+    limiter = anyio.from_thread.run_sync(anyio.to_thread.current_default_thread_limiter)
+    try:
+        p = profiler.profiler.run(seconds, requests, path, interval_ms / 1000, idle, limiter)
+    except profiler.Busy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "json": return FastJSONResponse(p.summary())
+    return PlainTextResponse(p.collapsed())
+
+@app.get("/admin/pools") # 지금 스레드풀 현황 (AnyIO 사용/대기, ThreadPoolExecutor 별 스레드/대기열)
+async def admin_pools(u: User = Depends(get_current_admin_user)):
+    import anyio.to_thread
+    return profiler.pools(anyio.to_thread.current_default_thread_limiter())
+
+def paid_accounts(db):
+    # 유효한 유료 사용자(+관리자) 중 API 키가 있는 광고주 -> [(사용자 정보, auth)]
+    now, accounts, seen = datetime.now(), [], set()
+    for t in db.query(User).filter(User.is_active == True, User.naver_access_key != None).all():
+        if not (t.is_paid or t.is_superuser): continue
+        if t.is_paid and not t.is_superuser and t.subscription_expiry and t.subscription_expiry < now: continue
+        auth = get_naver_auth(t)
+        if auth["customer_id"] in seen: continue  # 같은 광고주 계정을 여러 사용자가 등록한 경우 1번만
+        seen.add(auth["customer_id"])
+        accounts.append(({"userId": t.id, "username": t.username, "name": t.name}, auth))
+    return accounts
+
 # --- 기존 웹사이트 기능 복구 (모든 엔드포인트 유지) ---
 @app.post("/api/track/visit")
 async def track_visit(req: Request, db: Session = Depends(get_db)):
@@ -459,132 +809,390 @@ def get_logs(db: Session = Depends(get_db)):
     return [{"id":str(l.id),"timestamp":l.timestamp.strftime("%Y-%m-%d %H:%M:%S"),"ip":l.ip,"type":l.type,"keyword":l.keyword,"url":l.url,"referrer":l.referrer} for l in logs]
 
 @app.post("/api/log/save")
-def save_logs(items: List[LogItem]):
+def save_logs(items: List[LogItem], u: Optional[User] = Depends(get_optional_user)):
+    # [변경] 일별 CSV append -> bid_changes 테이블 배치 쓰기 (CSV 는 /api/log/export.csv 로 스트리밍)
     try:
-        if not os.path.exists("logs"): os.makedirs("logs")
-        fn = f"logs/log_{datetime.now().strftime('%Y-%m-%d')}.csv"
-        with open(fn, 'a', newline='', encoding='utf-8-sig') as f:
-            w = csv.writer(f)
-            if not os.path.isfile(fn): w.writerow(["시간","키워드","기존","변경","변동","사유"])
-            for i in items: w.writerow([i.time, i.keyword, i.oldBid, i.newBid, i.newBid-i.oldBid, i.reason])
-        return {"status": "success"}
+        uid = u.id if u else None
+        n = bid_history.writer.append([{
+            "user_id": uid, "keyword_id": i.keywordId, "keyword": i.keyword, "adgroup_id": i.adGroupId,
+            "old_bid": i.oldBid, "new_bid": i.newBid, "reason": i.reason, "source": "web", "client_time": i.time,
+        } for i in items])
+        if uid: events.bus.publish(uid, "bid", {"source": "web", "changes": [
+            {"nccKeywordId": i.keywordId, "keyword": i.keyword, "oldBid": i.oldBid, "bidAmt": i.newBid} for i in items[:200]]})
+        return {"status": "success", "saved": n}
     except: return {"status": "error"}
 
+@app.get("/api/log/history") # 키워드별 입찰 변경 이력
+def bid_log_history(keyword: Optional[str] = None, keyword_id: Optional[str] = None, since: Optional[str] = None,
+                    until: Optional[str] = None, limit: int = Query(500, le=5000),
+                    u: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
+    if not keyword and not keyword_id: raise HTTPException(status_code=400, detail="keyword 또는 keyword_id 필요")
+    bid_history.writer.flush()
+    return FastJSONResponse(bid_history.keyword_history(db, u, keyword, keyword_id, since, until, limit))
+
+@app.get("/api/log/summary") # 일별 요약 (기본: 최근 7일)
+def bid_log_summary(since: Optional[str] = None, until: Optional[str] = None,
+                    u: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
+    until = until or datetime.now().strftime("%Y-%m-%d")
+    since = since or (datetime.now() - timedelta(days=6)).strftime("%Y-%m-%d")
+    bid_history.writer.flush()
+    return bid_history.daily_summary(db, u, since, until)
+
+@app.get("/api/log/export.csv") # CSV 스트리밍 다운로드
+def bid_log_export(since: Optional[str] = None, until: Optional[str] = None, u: User = Depends(get_current_active_user)):
+    today = datetime.now().strftime("%Y-%m-%d")
+    since, until = since or today, until or since or today
+    bid_history.writer.flush()
+
+    def gen():
+        with SessionLocal() as db:
+            yield from bid_history.iter_csv(db, u, since, until)
+    return StreamingResponse(gen(), media_type="text/csv; charset=utf-8",
+                             headers={"Content-Disposition": f'attachment; filename="bid_log_{since}_{until}.csv"'})
+
+# --- 실시간 이벤트 (SSE) ---
+def _stream_user_id(token):
+    # 스트림 동안 DB 세션을 잡고 있지 않도록 확인만 하고 바로 닫음 (Depends(get_db) 는 응답이 끝날 때 닫힘)
+    with SessionLocal() as db:
+        u = get_current_user(token=token, db=db)
+        if not u.is_active: raise HTTPException(status_code=403)
+        return u.id
+
+@app.get("/api/events/stream")
+async def event_stream(request: Request, token: Optional[str] = None):
+    # EventSource 는 헤더를 못 붙이므로 ?token= 도 허용
+    token = token or request.headers.get("authorization", "").replace("Bearer ", "")
+    channel = await run_in_threadpool(_stream_user_id, token)  # 동기 DB 조회는 이벤트 루프 밖에서
+    return StreamingResponse(events.sse_stream(events.bus, channel, request), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/client/log") # 데스크톱 클라이언트 로그 (배치 전송: {"items": [...]})
+def client_log(payload: Dict[str, Any], u: User = Depends(get_current_user)):
+    items = payload.get("items") if isinstance(payload.get("items"), list) else [payload]
+    items = [{"action": str(i.get("action", "LOG")), "details": str(i.get("details", ""))[:2000]} for i in items if isinstance(i, dict)]
+    if not items: return {"received": 0}
+    if not os.path.exists("logs"): os.makedirs("logs")
+    with open(f"logs/client_{datetime.now().strftime('%Y-%m-%d')}.log", "a", encoding="utf-8") as f:
+        f.writelines(f"{u.username}\t{i['action']}\t{i['details']}\n" for i in items)
+    events.bus.publish(u.id, "client_log", {"user": u.username, "items": items})
+    return {"received": len(items)}
+
 @app.get("/api/campaigns")
 def list_camps(u: User = Depends(get_current_active_user)):
     auth = get_naver_auth(u)
     c = call_api_sync(("GET", "/ncc/campaigns", None, None, auth)) or []
     s = fetch_stats([x['nccCampaignId'] for x in c], auth)
-    return [{**x, "stats": format_stats(s.get(x['nccCampaignId']))} for x in c]
+    # [성능] {**x} 복사 대신 받은 dict 에 stats 만 붙여서 그대로 직렬화
+    for x in c: x["stats"] = format_stats(s.get(x['nccCampaignId']))
+    return FastJSONResponse(c)
 
 @app.get("/api/adgroups")
 def list_groups(campaign_id: str, u: User = Depends(get_current_active_user)):
     auth = get_naver_auth(u)
     g = call_api_sync(("GET", "/ncc/adgroups", {'nccCampaignId': campaign_id}, None, auth)) or []
     s = fetch_stats([x['nccAdgroupId'] for x in g], auth)
-    return [{**x, "stats": format_stats(s.get(x['nccAdgroupId']))} for x in g]
+    for x in g: x["stats"] = format_stats(s.get(x['nccAdgroupId']))
+    return FastJSONResponse(g)
 
 @app.get("/api/keywords")
 def list_keywords(adgroup_id: str, u: User = Depends(get_current_active_user)):
     # 웹에서는 조회만 빠르게 수행 (입찰은 클라이언트에서)
     auth = get_naver_auth(u)
     k = call_api_sync(("GET", "/ncc/keywords", {'nccAdgroupId': adgroup_id}, None, auth)) or []
+    remember_locks(auth['customer_id'], k, 'nccKeywordId', 'nccAdgroupId')
     s = fetch_stats([x['nccKeywordId'] for x in k], auth)
-    return [{
+    return FastJSONResponse([{
         "nccKeywordId": x['nccKeywordId'], "nccAdGroupId": x['nccAdgroupId'], "keyword": x['keyword'],
         "bidAmt": x['bidAmt'], "status": x['status'], "managedStatus": "ON" if x['status']=='ELIGIBLE' else "OFF",
         "stats": format_stats(s.get(x['nccKeywordId']))
-    } for x in k]
+    } for x in k])
+
+@app.put("/api/keywords/bid/bulk")
+@priority_lanes.run_in("bidding")
+def bulk_update_bids(items: List[BulkBidItem], u: User = Depends(get_current_active_user)):
+    # Outbox 에 넣고 최대 OUTBOX_WAIT_SEC 기다림 -> 429/차단 중이면 queued 로 남아 나중에 반영 (같은 키워드는 마지막 값만)
+    auth = get_naver_auth(u)
+    changes = [{"nccKeywordId": i.keywordId, "nccAdgroupId": i.adGroupId, "bidAmt": i.bidAmt} for i in items]
+    res = outbox.writer.wait(outbox.writer.enqueue_bids(auth['customer_id'], u.id, changes))
+    return {"success": res["done"], "failed": res["failed"], "queued": res["queued"], "paused": breaker.is_open(auth['customer_id'])}
+
+@app.get("/api/outbox") # 반영 대기/실패 중인 쓰기 (상태별 개수 + 최근 실패)
+def outbox_status(u: User = Depends(get_current_active_user)):
+    return outbox.writer.status(get_naver_auth(u)['customer_id'])
+
+@app.post("/api/outbox/retry") # 실패(failed)한 쓰기 다시 대기열로
+def outbox_retry(u: User = Depends(get_current_active_user)):
+    return {"retried": outbox.writer.retry_failed(get_naver_auth(u)['customer_id'])}
+
+@app.post("/api/bid/estimate-run") # [신규] 추정가 기반 일괄 입찰 (MOBILE+PC 한 사이클)
+@priority_lanes.run_in("bidding")
+def estimate_bid_run(item: EstimateBidItem, u: User = Depends(get_current_active_user)):
+    auth = get_naver_auth(u)
+    breaker.check(auth['customer_id'])
+    group_ids = list(item.adgroupIds or [])
+    if item.campaignId:
+        groups = call_api_sync(("GET", "/ncc/adgroups", {'nccCampaignId': item.campaignId}, None, auth)) or []
+        group_ids += [g['nccAdgroupId'] for g in groups if not g.get('userLock')]
+    if not group_ids: raise HTTPException(status_code=400, detail="campaignId 또는 adgroupIds 필요")
+
+    # [메모리] 응답 JSON 은 받자마자 컬럼 배열로 변환 (그룹별 원본 목록은 바로 버림)
+    keywords = KeywordTable()
+    with ThreadPoolExecutor(max_workers=10) as ex:
+        fs = [tracing.submit(ex, call_api_sync, ("GET", "/ncc/keywords", {'nccAdgroupId': gid}, None, auth)) for gid in group_ids]
+        for f in as_completed(fs):
+            for k in f.result() or []:
+                if not k.get('userLock'): keywords.add(k)
+    if item.statsDays > 0:
+        # 최근 실적도 같은 컬럼 배열로 (저장소에서만 읽음 -> 입찰 경로에 /stats 호출을 더하지 않음)
+        until = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+        since = (datetime.now() - timedelta(days=item.statsDays)).strftime("%Y-%m-%d")
+        wh = stats_warehouse.get_warehouse()
+        if not wh.missing_days(auth['customer_id'], since, until):
+            keywords.set_stats(wh.stats_for(auth['customer_id'], keywords.ids, since, until))
+
+    per_device = estimate_service.estimate_devices(auth, keywords.ids, item.devices, item.position)
+    changes = plan_bid_changes(keywords, per_device, item.policy, item.maxBid)
+    res = {"done": 0, "failed": 0, "queued": 0}
+    if changes and not item.dryRun:
+        # 입찰 이력은 Outbox 워커가 실제로 반영된 것만 기록
+        res = outbox.writer.wait(outbox.writer.enqueue_bids(auth['customer_id'], u.id, changes,
+                                                            reason=f"추정가({item.position}위/{item.policy})", source="estimate-run"))
+    events.bus.publish(u.id, "bid", {"source": "estimate-run", "keywords": len(keywords), "changes": changes[:200],
+                                     "applied": res["done"], "queued": res["queued"], "dryRun": item.dryRun})
+    return {"keywords": len(keywords), "changes": changes, "applied": res["done"], "failed": res["failed"], "queued": res["queued"],
+            "dryRun": item.dryRun, "paused": breaker.is_open(auth['customer_id'])}
 
 @app.get("/api/ads")
 def get_ads(campaign_id: Optional[str]=None, adgroup_id: Optional[str]=None, u: User = Depends(get_current_active_user)):
     auth = get_naver_auth(u)
     if adgroup_id:
         ads = call_api_sync(("GET", "/ncc/ads", {'nccAdgroupId': adgroup_id}, None, auth))
-        return convert_ads(ads) if ads else []
+        remember_locks(auth['customer_id'], ads, 'nccAdId', 'nccAdgroupId')
+        with tracing.span("convert_ads"):
+            return FastJSONResponse(convert_ads(ads) if ads else [])
     if campaign_id:
         groups = call_api_sync(("GET", "/ncc/adgroups", {'nccCampaignId': campaign_id}, None, auth))
         if not groups: return []
         all_ads = []
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            fs = [executor.submit(call_api_sync, ("GET", "/ncc/ads", {'nccAdgroupId': g['nccAdgroupId']}, None, auth)) for g in groups]
-            for f in as_completed(fs):
-                res = f.result()
-                if res: all_ads.extend(res)
-        return convert_ads(all_ads)
+        with tracing.span("fanout", tasks=len(groups), workers=10):
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                fs = [tracing.submit(executor, call_api_sync, ("GET", "/ncc/ads", {'nccAdgroupId': g['nccAdgroupId']}, None, auth)) for g in groups]
+                for f in as_completed(fs):
+                    res = f.result()
+                    if res: all_ads.extend(res)
+        remember_locks(auth['customer_id'], all_ads, 'nccAdId', 'nccAdgroupId')
+        with tracing.span("convert_ads", count=len(all_ads)):
+            return FastJSONResponse(convert_ads(all_ads))
     return []
 
 @app.post("/api/ads")
 def create_ad(item: AdCreateItem, u: User = Depends(get_current_active_user)):
     auth = get_naver_auth(u)
     body = {"type": "TEXT_45", "nccAdgroupId": item.adGroupId, "ad": {"headline": item.headline, "description": item.description, "pc": {"final": item.pcUrl}, "mobile": {"final": item.mobileUrl}}}
-    res = call_api_sync(("POST", "/ncc/ads", None, body, auth))
-    if res: return res
-    raise HTTPException(status_code=400, detail="Failed")
+    return outbox_call(auth, u.id, "POST", "/ncc/ads", body=body)
+
+@app.put("/api/ads/{ad_id}/status") # 소재 ON/OFF
+def update_ad_status(ad_id: str, item: StatusUpdate, u: User = Depends(get_current_active_user)):
+    return set_locks(get_naver_auth(u), u.id, [("ads", ad_id)], parse_lock(item.status))
 
 @app.post("/api/ads/clone") # [기능 복구] 소재 복제
+@priority_lanes.run_in("bulk")
 def clone_ads(item: CloneAdsItem, u: User = Depends(get_current_active_user)):
     auth = get_naver_auth(u)
     src = call_api_sync(("GET", "/ncc/ads", {'nccAdgroupId': item.sourceGroupId}, None, auth))
     if not src: return {"success": 0}
-    cnt = 0
+    ids = []
     for a in src:
         d = a.get('ad')
         if isinstance(d, str): d = json.loads(d)
-        if call_api_sync(("POST", "/ncc/ads", None, {"type": "TEXT_45", "nccAdgroupId": item.targetGroupId, "ad": d}, auth)): cnt += 1
-    return {"success": cnt}
+        ids.append(outbox.writer.enqueue(auth['customer_id'], u.id, "POST", "/ncc/ads", body={"type": "TEXT_45", "nccAdgroupId": item.targetGroupId, "ad": d}))
+    res = outbox.writer.wait(ids)
+    return {"success": res["done"], "failed": res["failed"], "queued": res["queued"]}
 
 @app.get("/api/extensions")
 def get_exts(campaign_id: Optional[str]=None, adgroup_id: Optional[str]=None, u: User = Depends(get_current_active_user)):
     auth = get_naver_auth(u)
     if adgroup_id:
         res = call_api_sync(("GET", "/ncc/ad-extensions", {'ownerId': adgroup_id}, None, auth))
-        if res: return [format_extension(e) for e in res]
+        remember_locks(auth['customer_id'], res, 'nccAdExtensionId', 'ownerId')
+        if res: return FastJSONResponse([format_extension(e) for e in res])
     if campaign_id:
         groups = call_api_sync(("GET", "/ncc/adgroups", {'nccCampaignId': campaign_id}, None, auth))
         if groups:
             all_ext = []
             with ThreadPoolExecutor(max_workers=10) as ex:
-                fs = [ex.submit(call_api_sync, ("GET", "/ncc/ad-extensions", {'ownerId': g['nccAdgroupId']}, None, auth)) for g in groups]
+                fs = [tracing.submit(ex, call_api_sync, ("GET", "/ncc/ad-extensions", {'ownerId': g['nccAdgroupId']}, None, auth)) for g in groups]
                 for f in as_completed(fs):
                     r = f.result()
-                    if r: all_ext.extend([format_extension(e) for e in r])
-            return all_ext
+                    if r: all_ext.extend(format_extension(e) for e in r)
+            remember_locks(auth['customer_id'], all_ext, 'nccAdExtensionId', 'ownerId')
+            return FastJSONResponse(all_ext)
     return []
 
+@app.get("/api/channels") # 비즈채널 목록 (캐시, refresh=true 면 네이버에서 다시 읽음)
+def list_channels(refresh: bool = False, u: User = Depends(get_current_active_user)):
+    cat = get_channels(get_naver_auth(u), refresh)
+    if cat is None: raise HTTPException(status_code=502, detail="비즈채널 목록 조회 실패")
+    return FastJSONResponse([{**c, "type": c.get("type") or c.get("channelTp")} for c in cat["channels"]])
+
+@app.post("/api/extensions")
+def create_extension(item: ExtensionCreateItem, u: User = Depends(get_current_active_user)):
+    auth = get_naver_auth(u)
+    if unknown_channels(auth, [item.businessChannelId]):
+        raise HTTPException(status_code=400, detail=f"비즈채널 없음: {item.businessChannelId}")
+    body = {"ownerId": item.adGroupId, "type": item.type}
+    if item.businessChannelId: body["pcChannelId"] = body["mobileChannelId"] = item.businessChannelId
+    ext = item.adExtension if item.adExtension is not None else item.attributes
+    if ext is not None: body["adExtension"] = ext
+    return outbox_call(auth, u.id, "POST", "/ncc/ad-extensions", body=body)
+
+@app.put("/api/extensions/{ext_id}/status") # 확장소재 ON/OFF
+def update_extension_status(ext_id: str, item: StatusUpdate, u: User = Depends(get_current_active_user)):
+    return set_locks(get_naver_auth(u), u.id, [("extensions", ext_id)], parse_lock(item.status))
+
+@app.put("/api/status/bulk") # 소재/확장소재/키워드 일괄 ON/OFF (수천 개, 이미 그 상태인 것은 건너뜀)
+def bulk_update_status(item: BulkStatusItem, u: User = Depends(get_current_active_user)):
+    lock = parse_lock(item.status)
+    targets = [("ads", i) for i in item.adIds] + [("extensions", i) for i in item.extensionIds] + [("keywords", i) for i in item.keywordIds]
+    if not targets: raise HTTPException(status_code=400, detail="adIds / extensionIds / keywordIds 중 하나 필요")
+    return set_locks(get_naver_auth(u), u.id, targets, lock)
+
 @app.post("/api/extensions/clone/{new_group_id}") # [기능 복구] 확장소재 복제
+@priority_lanes.run_in("bulk")
 def clone_extensions(source_group_id: str, new_group_id: str, u: User = Depends(get_current_active_user)):
     auth = get_naver_auth(u)
-    src = call_api_sync(("GET", "/ncc/ad-extensions", {'ownerId': source_group_id}, {}, auth)) or []
-    cnt = 0
+    src = [e for e in call_api_sync(("GET", "/ncc/ad-extensions", {'ownerId': source_group_id}, {}, auth)) or []
+           if e['type'] not in ["IMAGE_SUB_LINKS", "CATALOG_EXTRA"]]
+    # 없어진 비즈채널을 쓰는 확장소재는 보내지 않음 (네이버에서 400 으로 실패할 요청)
+    bad = unknown_channels(auth, [e.get(f) for e in src for f in ("pcChannelId", "mobileChannelId")])
+    ids, skipped = [], 0
     for e in src:
-        if e['type'] in ["IMAGE_SUB_LINKS", "CATALOG_EXTRA"]: continue
+        if e.get('pcChannelId') in bad or e.get('mobileChannelId') in bad:
+            skipped += 1
+            continue
         new = {"ownerId": new_group_id, "type": e['type'], "pcChannelId": e.get('pcChannelId'), "mobileChannelId": e.get('mobileChannelId')}
         if "adExtension" in e: new["adExtension"] = e["adExtension"]
-        if call_api_sync(("POST", "/ncc/ad-extensions", None, new, auth)): cnt += 1
-    return {"success": cnt}
+        ids.append(outbox.writer.enqueue(auth['customer_id'], u.id, "POST", "/ncc/ad-extensions", body=new))
+    res = outbox.writer.wait(ids)
+    return {"success": res["done"], "failed": res["failed"], "queued": res["queued"], "invalidChannel": skipped}
+
+# --- 일별 실적 저장소 (증분 수집 + 로컬 집계) ---
+WAREHOUSE_NIGHTLY_HOUR = os.environ.get("WAREHOUSE_NIGHTLY_HOUR")  # 예: "4" -> 매일 04시 전체 유료 광고주 증분 수집
+
+@priority_lanes.run_in("bulk")  # 별도 스레드에서 실행 -> 레인을 안에서 지정
+def _warehouse_job(auth, days):
+    key = f"wh_job:{auth['customer_id']}"
+    def progress(n, total, day):
+        shared_state.store.set(key, {"state": "running", "done": n, "total": total, "day": day}, ttl=3600)
+    try:
+        res = stats_warehouse.ingest(call_api_sync, auth, days, progress=progress, download=download_report)
+        shared_state.store.set(key, {"state": "done", "days": len(res["days"]), "rows": res["rows"], "keywords": res["keywords"],
+                                     "finishedAt": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}, ttl=86400)
+    except Exception as e:
+        print(f"[Warehouse] {auth['customer_id']} 수집 실패: {e}")
+        shared_state.store.set(key, {"state": "error", "error": str(e)}, ttl=86400)
+
+def _warehouse_nightly():
+    hour = int(WAREHOUSE_NIGHTLY_HOUR)
+    while True:
+        now = datetime.now()
+        nxt = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+        if nxt <= now: nxt += timedelta(days=1)
+        time.sleep((nxt - now).total_seconds())
+        day = datetime.now().strftime("%Y-%m-%d")
+        with shared_state.store.lock("wh_nightly"):
+            if shared_state.store.get("wh_nightly_day") == day: continue  # 다른 워커가 이미 실행
+            shared_state.store.set("wh_nightly_day", day, ttl=2 * 86400)
+        with SessionLocal() as db: accounts = paid_accounts(db)
+        for _, auth in accounts: _warehouse_job(auth, stats_warehouse.WAREHOUSE_DAYS)
+
+def _wh_range(since, until, days=30):
+    until = until or datetime.now().strftime("%Y-%m-%d")
+    since = since or (datetime.strptime(until, "%Y-%m-%d") - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    return since, until
+
+def _wh_check(by=None, metric=None):
+    if by is not None and by not in stats_warehouse._GROUP: raise HTTPException(status_code=400, detail=f"by: {list(stats_warehouse._GROUP)}")
+    if metric is not None and metric not in stats_warehouse._METRIC: raise HTTPException(status_code=400, detail=f"metric: {list(stats_warehouse._METRIC)}")
+
+@app.post("/api/warehouse/sync") # 증분 수집 시작 (백그라운드)
+def warehouse_sync(days: int = Query(stats_warehouse.WAREHOUSE_DAYS, ge=0, le=365), u: User = Depends(get_current_active_user)):
+    auth = get_naver_auth(u)
+    key = f"wh_job:{auth['customer_id']}"
+    job = shared_state.store.get(key)
+    if job and job.get("state") == "running": return job
+    shared_state.store.set(key, {"state": "running", "done": 0}, ttl=3600)
+    threading.Thread(target=_warehouse_job, args=(auth, days), name="warehouse-sync", daemon=True).start()
+    return {"state": "running", "done": 0}
+
+@app.get("/api/warehouse/status")
+def warehouse_status(u: User = Depends(get_current_active_user)):
+    cid = get_naver_auth(u)["customer_id"]
+    return {"job": shared_state.store.get(f"wh_job:{cid}"), **stats_warehouse.get_warehouse().status(cid)}
+
+@app.get("/api/warehouse/rollup") # 기간 합계 (by=day/campaign/adgroup/keyword)
+def warehouse_rollup(since: Optional[str] = None, until: Optional[str] = None, by: str = "day", limit: int = Query(1000, le=100000),
+                     u: User = Depends(get_current_active_user)):
+    _wh_check(by=by)
+    since, until = _wh_range(since, until)
+    cid = get_naver_auth(u)["customer_id"]
+    wh = stats_warehouse.get_warehouse()
+    return FastJSONResponse({"since": since, "until": until, "total": wh.totals(cid, since, until), "rows": wh.rollup(cid, since, until, by, limit)})
+
+@app.get("/api/warehouse/ranking") # 순위 (metric=cost/clk/conv/roas/cpa/ctr/...)
+def warehouse_ranking(since: Optional[str] = None, until: Optional[str] = None, metric: str = "cost", by: str = "keyword",
+                      limit: int = Query(50, le=1000), order: str = "desc", min_imp: int = 0, u: User = Depends(get_current_active_user)):
+    _wh_check(by=by, metric=metric)
+    since, until = _wh_range(since, until)
+    rows = stats_warehouse.get_warehouse().ranking(get_naver_auth(u)["customer_id"], since, until, metric, by, limit, order == "asc", min_imp)
+    return FastJSONResponse({"since": since, "until": until, "metric": metric, "rows": rows})
+
+@app.get("/api/warehouse/compare") # 기간 비교 (이전 기간 미지정 시 직전 같은 길이)
+def warehouse_compare(since: Optional[str] = None, until: Optional[str] = None, prev_since: Optional[str] = None,
+                      prev_until: Optional[str] = None, by: str = "campaign", limit: int = Query(100, le=10000),
+                      u: User = Depends(get_current_active_user)):
+    _wh_check(by=by)
+    since, until = _wh_range(since, until, days=7)
+    return FastJSONResponse(stats_warehouse.get_warehouse().compare(get_naver_auth(u)["customer_id"], since, until, prev_since, prev_until, by, limit))
+
+@app.post("/api/backtest") # 저장소 데이터로 자동입찰(run_auto_bidder) 설정 스윕 - API 호출 없음
+def run_backtest(item: BacktestItem, u: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
+    cid = get_naver_auth(u)["customer_id"]
+    until = item.until or (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    since, until = _wh_range(item.since, until, days=30)
+    axes = {"target_rank": item.targetRank, "bid_step": item.bidStep, "probe_limit": item.probeLimit, "max_bid": item.maxBid}
+    n = 1
+    for v in axes.values(): n *= len(v or [1])
+    if n > 1000: raise HTTPException(status_code=400, detail=f"설정 조합 {n}개 (최대 1000)")
+    import backtest  # 첫 사용 시 (기동 경로에서 뺌)
+    res = backtest.run(stats_warehouse.get_warehouse(), cid, since, until, axes, timeline=bid_history.bid_timeline(db, u, since), sort=item.sort)
+    if not res["keywords"]: raise HTTPException(status_code=409, detail="저장소에 데이터 없음 - /api/warehouse/sync 먼저")
+    res["results"] = res["results"][:item.top]
+    return FastJSONResponse(res)
 
 @app.get("/api/tool/ip-exclusion") # [기능 복구] IP 차단
 def get_ip(u: User = Depends(get_current_active_user)):
     return call_api_sync(("GET", "/tool/ip-exclusions", None, None, get_naver_auth(u))) or []
 
+# 차단 목록은 PUT 한 번에 전체를 덮어씀 -> Outbox 에 key 하나로 넣음 (아직 안 보낸 목록이 있으면 그걸 이어서 고침)
+def _ip_list(auth):
+    curr = outbox.writer.pending_body(auth['customer_id'], "ip-exclusions")
+    return curr if curr is not None else call_api_sync(("GET", "/tool/ip-exclusions", None, None, auth)) or []
+
 @app.post("/api/tool/ip-exclusion")
 def add_ip(item: Dict[str,Any], u: User = Depends(get_current_active_user)):
     auth = get_naver_auth(u)
-    curr = call_api_sync(("GET", "/tool/ip-exclusions", None, None, auth)) or []
-    curr.append({"ip": item['ip'], "memo": item.get('memo','')})
-    call_api_sync(("PUT", "/tool/ip-exclusions", None, json.dumps(curr), auth))
-    return {"success": True}
+    curr = _ip_list(auth) + [{"ip": item['ip'], "memo": item.get('memo','')}]
+    return outbox_call(auth, u.id, "PUT", "/tool/ip-exclusions", body=curr, key="ip-exclusions")
 
 @app.delete("/api/tool/ip-exclusion/{ip}")
 def del_ip(ip: str, u: User = Depends(get_current_active_user)):
     auth = get_naver_auth(u)
-    curr = call_api_sync(("GET", "/tool/ip-exclusions", None, None, auth)) or []
-    new_l = [i for i in curr if i['ip'] != ip]
-    call_api_sync(("PUT", "/tool/ip-exclusions", None, json.dumps(new_l), auth))
-    return {"success": True}
+    new_l = [i for i in _ip_list(auth) if i['ip'] != ip]
+    return outbox_call(auth, u.id, "PUT", "/tool/ip-exclusions", body=new_l, key="ip-exclusions")
 
 @app.post("/api/tools/smart-expand") # [기능 복구] 스마트 확장
+@priority_lanes.run_in("bulk")
 def smart_expand(item: SmartExpandItem, u: User = Depends(get_current_active_user)):
     auth = get_naver_auth(u)
     src = call_api_sync(("GET", f"/ncc/adgroups/{item.sourceGroupId}", None, None, auth))
@@ -592,26 +1200,57 @@ def smart_expand(item: SmartExpandItem, u: User = Depends(get_current_active_use
     
     # 웹에서는 간단히 키워드 추가만 수행 (무거운 그룹 생성 로직은 클라이언트 권장)
     chunk = [{"nccAdgroupId": src['nccAdgroupId'], "keyword": k, "bidAmt": item.bidAmt or 70, "useGroupBidAmt": False} for k in item.keywords]
-    call_api_sync(("POST", "/ncc/keywords", {'nccAdgroupId': src['nccAdgroupId']}, chunk, auth))
-    return {"status": "success"}
-
-# --- Static Files ---
-if getattr(sys, 'frozen', False):
-    dist_path = os.path.join(sys._MEIPASS, "dist")
-else:
-    base_dir = os.path.dirname(__file__)
+    res = outbox.writer.wait([outbox.writer.enqueue(auth['customer_id'], u.id, "POST", "/ncc/keywords", {'nccAdgroupId': src['nccAdgroupId']}, chunk)])
+    return {"status": "queued" if res["queued"] else "success" if res["done"] else "failed"}
+
+# --- Static Files (첫 요청 때 구성: 기동 시 디렉터리 검사 / mimetypes 초기화 생략) ---
+def find_dist_path():
+    if getattr(sys, 'frozen', False):
+        return os.path.join(sys._MEIPASS, "dist")
+    base_dir = os.path.dirname(os.path.abspath(__file__))
     dist_local_path = os.path.join(base_dir, "dist")
-    if os.path.exists(dist_local_path) and os.path.exists(os.path.join(dist_local_path, "index.html")):
-        dist_path = dist_local_path
-    else:
-        dist_path = os.path.join(base_dir, "frontend")
-
-if os.path.exists(dist_path) and os.path.exists(os.path.join(dist_path, "index.html")):
-    app.mount("/", StaticFiles(directory=dist_path, html=True), name="static")
-else:
-    @app.get("/")
-    def root(): return HTMLResponse("<h1>Backend Running (v12.0 Final)</h1>")
+    if os.path.exists(os.path.join(dist_local_path, "index.html")):
+        return dist_local_path
+    return os.path.join(base_dir, "frontend")
+
+class LazyStatic:
+    def __init__(self):
+        self.app = None
+
+    async def __call__(self, scope, receive, send):
+        if self.app is None: self.app = self._build()
+        await self.app(scope, receive, send)
+
+    def _build(self):
+        dist_path = find_dist_path()
+        if os.path.exists(os.path.join(dist_path, "index.html")):
+            import mimetypes
+            mimetypes.init()
+            mimetypes.add_type('application/javascript', '.js')
+            mimetypes.add_type('text/css', '.css')
+            return static_assets.CompressedStaticFiles(directory=dist_path, html=True)
+        return _backend_root
+
+async def _backend_root(scope, receive, send):
+    if scope["type"] != "http": return
+    if scope["path"] == "/": resp = HTMLResponse("<h1>Backend Running (v12.0 Final)</h1>")
+    else: resp = JSONResponse({"detail": "Not Found"}, status_code=404)
+    await resp(scope, receive, send)
+
+app.mount("/", LazyStatic(), name="static")
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # 패키징된 exe 가 자식 프로세스로 다시 실행된 경우 여기서 처리하고 끝냄
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
\ No newline at end of file
+    # [멀티워커] WORKERS=4 python server.py (패키징된 exe 는 단일 프로세스)
+    workers = int(os.environ.get("WORKERS", "1"))
+    port = int(os.environ.get("PORT", "8000"))
+    if workers > 1 and not getattr(sys, 'frozen', False):
+        if shared_state.STATE_URL.startswith("memory"):
+            # 워커끼리 레이트리밋/캐시/큐를 공유하도록 기본 SQLite 저장소 지정 (자식 프로세스에 상속)
+            os.environ["STATE_URL"] = "sqlite:///./state.db"
+        print(f"🚀 멀티워커 모드: {workers}개 (STATE_URL={os.environ['STATE_URL']})")
+        uvicorn.run("server:app", host="0.0.0.0", port=port, workers=workers, log_config=None)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port, log_config=None)
\ No newline at end of file
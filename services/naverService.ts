@@ -8,6 +8,8 @@ export interface LogItem {
   oldBid: number;
   newBid: number;
   reason: string;
+  keywordId?: string;
+  adGroupId?: string;
 }
 
 // [핵심] 토큰 관리 및 헤더 생성 함수
@@ -275,12 +277,12 @@ export const naverService = {
     return res.json();
   },
 
-  // 로그 저장 (인증 불필요 - 서버 설정 따름)
+  // 로그 저장 (토큰 없어도 저장됨 - 있으면 사용자별 이력)
   async saveBidLogs(logs: LogItem[]): Promise<void> {
     try {
       await fetch(`${API_BASE_URL}/api/log/save`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: getHeaders(), // 토큰이 있으면 사용자별 이력으로 저장
         body: JSON.stringify(logs)
       });
     } catch (error) {
@@ -338,5 +340,19 @@ export const naverService = {
     });
     if (!res.ok) throw new Error('Failed to execute smart expand');
     return res.json();
+  },
+
+  // [실시간] 입찰/작업/클라이언트 로그 이벤트 구독 (SSE, 연결 1개로 유지)
+  // 반환된 함수를 호출하면 구독 해제
+  subscribeEvents(handlers: Record<string, (data: any) => void>): () => void {
+    const token = getToken();
+    if (!token || typeof EventSource === 'undefined') return () => {};
+    const es = new EventSource(`${API_BASE_URL}/api/events/stream?token=${encodeURIComponent(token)}`);
+    Object.entries(handlers).forEach(([event, fn]) => {
+      es.addEventListener(event, (e: MessageEvent) => {
+        try { fn(JSON.parse(e.data)); } catch (err) { console.error(err); }
+      });
+    });
+    return () => es.close();
   }
 };
\ No newline at end of file
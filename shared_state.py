@@ -0,0 +1,296 @@
+# ==========================================
+# 워커 간 공유 상태 (레이트리밋 버킷 / 캐시 / 락)
+# ==========================================
+# uvicorn 워커를 여러 개 띄우면 threading.Lock / 전역 dict 는 프로세스마다 따로 놀기 때문에
+# 고객별 호출 제한이 워커 수만큼 늘어나 버림. STATE_URL 로 공유 저장소 선택:
+#   memory://                    (기본, 단일 프로세스)
+#   sqlite:///./state.db         (같은 머신의 여러 워커)
+#   redis://127.0.0.1:6379/0     (여러 노드, pip install redis 필요)
+# 만료된 캐시 / 락 / 오래 안 쓴 버킷은 쓰기 때 STATE_PURGE_SEC (기본 60초) 에 한 번씩 지움 (redis 는 자체 만료)
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+STATE_URL = os.environ.get("STATE_URL", "memory://")
+STATE_PURGE_SEC = float(os.environ.get("STATE_PURGE_SEC", "60"))
+BUCKET_IDLE_SEC = 3600  # 이만큼 안 쓴 버킷은 가득 찬 상태와 같음 -> 지워도 됨
+
+
+class MemoryStore:
+    def __init__(self):
+        self._kv = {}
+        self._buckets = {}
+        self._locks = {}        # 이름 -> (owner, 만료 monotonic)
+        self._mu = threading.Lock()
+        self._lock_cv = threading.Condition()
+        self._next_purge = 0.0
+
+    # --- 캐시 ---
+    def get(self, key):
+        item = self._kv.get(key)
+        if item is None: return None
+        value, expires = item
+        if expires and expires < time.time():
+            self._kv.pop(key, None)
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        self._kv[key] = (value, time.time() + ttl if ttl else None)
+        self._maybe_purge()
+
+    def delete(self, key):
+        self._kv.pop(key, None)
+
+    def get_many(self, keys):
+        out = {}
+        for k in keys:
+            v = self.get(k)
+            if v is not None: out[k] = v
+        return out
+
+    def set_many(self, items, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        for k, v in items.items(): self._kv[k] = (v, expires)
+        self._maybe_purge()
+
+    def delete_prefix(self, prefix):
+        with self._mu:
+            for k in [k for k in self._kv if k.startswith(prefix)]: self._kv.pop(k, None)
+
+    def _maybe_purge(self):
+        now = time.time()
+        if now < self._next_purge: return
+        self._next_purge = now + STATE_PURGE_SEC
+        idle = time.monotonic() - BUCKET_IDLE_SEC
+        with self._mu:
+            for k in [k for k, (_, exp) in list(self._kv.items()) if exp and exp < now]: self._kv.pop(k, None)
+            for k in [k for k, (_, last) in self._buckets.items() if last < idle]: del self._buckets[k]
+
+    # --- 토큰 버킷: 0 이면 통과, 아니면 기다려야 할 초 ---
+    def take_token(self, key, rate, burst):
+        now = time.monotonic()
+        with self._mu:
+            tokens, last = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+    @contextmanager
+    def lock(self, name, ttl=30):
+        # SqliteStore 와 같은 규칙: ttl 이 지나면 (잡은 쪽이 멈춘 경우) 다른 쪽이 가져감, 풀 때는 owner 확인
+        owner = object()
+        with self._lock_cv:
+            while True:
+                now = time.monotonic()
+                held = self._locks.get(name)
+                if held is None or held[1] <= now: break
+                self._lock_cv.wait(held[1] - now)
+            self._locks[name] = (owner, now + ttl)
+        try:
+            yield
+        finally:
+            with self._lock_cv:
+                if self._locks.get(name, (None,))[0] is owner: del self._locks[name]
+                self._lock_cv.notify_all()
+
+
+class SqliteStore:
+    # 같은 파일을 여러 프로세스가 공유. BEGIN IMMEDIATE 로 버킷/락 갱신을 원자적으로 처리 (읽기만 하는 건 쓰기 락 없이)
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._next_purge = 0.0
+        with self._conn() as c:
+            c.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+            c.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, ts REAL)")
+            c.execute("CREATE TABLE IF NOT EXISTS locks (name TEXT PRIMARY KEY, expires REAL, owner TEXT)")
+            if "owner" not in [r[1] for r in c.execute("PRAGMA table_info(locks)")]:
+                c.execute("ALTER TABLE locks ADD COLUMN owner TEXT")  # 이전 버전 state.db
+
+    def _conn(self, mode="IMMEDIATE"):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return _Tx(conn, mode)
+
+    def _maybe_purge(self):
+        now = time.time()
+        if now < self._next_purge: return
+        self._next_purge = now + STATE_PURGE_SEC
+        with self._conn() as c:
+            c.execute("DELETE FROM kv WHERE expires < ?", (now,))
+            c.execute("DELETE FROM locks WHERE expires < ?", (now,))
+            c.execute("DELETE FROM buckets WHERE ts < ?", (now - BUCKET_IDLE_SEC,))
+
+    def get(self, key):
+        with self._conn("DEFERRED") as c:
+            row = c.execute("SELECT value, expires FROM kv WHERE key=?", (key,)).fetchone()
+        if not row or (row[1] and row[1] < time.time()): return None
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        with self._conn() as c:
+            c.execute("INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+                      (key, json.dumps(value, ensure_ascii=False), time.time() + ttl if ttl else None))
+        self._maybe_purge()
+
+    def delete(self, key):
+        with self._conn() as c: c.execute("DELETE FROM kv WHERE key=?", (key,))
+
+    def get_many(self, keys):
+        out, now = {}, time.time()
+        keys = list(keys)
+        with self._conn("DEFERRED") as c:  # 여러 번 읽어도 같은 스냅샷
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = c.execute(f"SELECT key, value, expires FROM kv WHERE key IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+                for k, v, exp in rows:
+                    if not exp or exp >= now: out[k] = json.loads(v)
+        return out
+
+    def set_many(self, items, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        with self._conn() as c:
+            c.executemany("INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+                          [(k, json.dumps(v, ensure_ascii=False), expires) for k, v in items.items()])
+        self._maybe_purge()
+
+    def delete_prefix(self, prefix):
+        with self._conn() as c: c.execute("DELETE FROM kv WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def take_token(self, key, rate, burst):
+        now = time.time()
+        with self._conn() as c:
+            row = c.execute("SELECT tokens, ts FROM buckets WHERE key=?", (key,)).fetchone()
+            tokens, last = row if row else (burst, now)
+            tokens = min(burst, tokens + max(0.0, now - last) * rate)
+            wait = 0.0
+            if tokens >= 1: tokens -= 1
+            else: wait = (1 - tokens) / rate
+            c.execute("INSERT OR REPLACE INTO buckets (key, tokens, ts) VALUES (?, ?, ?)", (key, tokens, now))
+        return wait
+
+    @contextmanager
+    def lock(self, name, ttl=30):
+        # ttl 이 지나 다른 워커가 가져간 락은 지우지 않도록 owner 토큰으로 확인
+        owner = uuid.uuid4().hex
+        while True:
+            now = time.time()
+            with self._conn() as c:
+                row = c.execute("SELECT expires FROM locks WHERE name=?", (name,)).fetchone()
+                if not row or row[0] < now:
+                    c.execute("INSERT OR REPLACE INTO locks (name, expires, owner) VALUES (?, ?, ?)", (name, now + ttl, owner))
+                    break
+            time.sleep(0.02)
+        try:
+            yield
+        finally:
+            with self._conn() as c: c.execute("DELETE FROM locks WHERE name=? AND owner=?", (name, owner))
+
+
+class _Tx:
+    # BEGIN IMMEDIATE (쓰기) / DEFERRED (읽기) ~ COMMIT (예외 시 ROLLBACK)
+    def __init__(self, conn, mode="IMMEDIATE"):
+        self.conn, self.mode = conn, mode
+
+    def __enter__(self):
+        self.conn.execute(f"BEGIN {self.mode}")
+        return self.conn
+
+    def __exit__(self, exc_type, *exc):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class RedisStore:
+    _TAKE = """
+    local t = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local tokens = tonumber(t[1]) or burst
+    local last = tonumber(t[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - last) * rate)
+    local wait = 0
+    if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+    return tostring(wait)
+    """
+
+    def __init__(self, url):
+        import redis  # 선택 의존성
+        self.r = redis.Redis.from_url(url)
+        self._take = self.r.register_script(self._TAKE)
+
+    def get(self, key):
+        v = self.r.get("kv:" + key)
+        return json.loads(v) if v is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.r.set("kv:" + key, json.dumps(value, ensure_ascii=False), ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self.r.delete("kv:" + key)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys: return {}
+        vals = self.r.mget(["kv:" + k for k in keys])
+        return {k: json.loads(v) for k, v in zip(keys, vals) if v is not None}
+
+    def set_many(self, items, ttl=None):
+        pipe = self.r.pipeline()
+        for k, v in items.items():
+            pipe.set("kv:" + k, json.dumps(v, ensure_ascii=False), ex=int(ttl) if ttl else None)
+        pipe.execute()
+
+    def delete_prefix(self, prefix):
+        keys = list(self.r.scan_iter(match="kv:" + prefix + "*"))
+        if keys: self.r.delete(*keys)
+
+    def take_token(self, key, rate, burst):
+        return float(self._take(keys=["bucket:" + key], args=[rate, burst, time.time()]))
+
+    @contextmanager
+    def lock(self, name, ttl=30):
+        with self.r.lock("lock:" + name, timeout=ttl):
+            yield
+
+
+def create_store(url=STATE_URL):
+    if url.startswith("sqlite:///"): return SqliteStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")): return RedisStore(url)
+    return MemoryStore()
+
+
+store = create_store()
+
+
+# ==========================================
+# 고객별 레이트 리미터 (공유 저장소 기반)
+# ==========================================
+class RateLimiter:
+    def __init__(self, rate, burst=None, backend=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.backend = backend
+
+    def acquire(self, key, timeout=30):
+        # 토큰이 생길 때까지 대기. timeout 초과 시 False
+        if self.rate <= 0: return True
+        backend = self.backend or store
+        deadline = time.time() + timeout
+        while True:
+            wait = backend.take_token(key, self.rate, self.burst)
+            if wait <= 0: return True
+            if time.time() + wait > deadline: return False
+            time.sleep(min(wait, 1.0))
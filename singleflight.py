@@ -0,0 +1,60 @@
+# ==========================================
+# Single-flight: 동시에 들어온 같은 조회는 upstream 호출 1번으로 합침
+# ==========================================
+# 같은 대행사 계정으로 여러 명이 대시보드를 동시에 열면 /ncc/campaigns, /stats 가 똑같이 N번 나감.
+# 먼저 온 호출(leader)만 실제로 요청하고, 진행 중에 들어온 동일 키(follower)는 결과를 기다렸다 받음.
+# 결과는 호출자마다 새 객체로 돌려줌 (format_extension 처럼 결과를 수정하는 코드가 있어서)
+import json
+import threading
+
+import metrics
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "followers", "payload")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+        self.payload = None
+
+
+class SingleFlight:
+    def __init__(self, name="singleflight"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.followers += 1
+        metrics.record_cache(self.name, not leader)
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None: raise call.error
+            return json.loads(call.payload) if call.payload is not None else None
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                shared = call.followers > 0
+            if shared and call.error is None and call.result is not None:
+                call.payload = json.dumps(call.result, ensure_ascii=False)
+            call.event.set()
+        if call.error is not None: raise call.error
+        return json.loads(call.payload) if call.payload is not None else call.result
+
+    def in_flight(self):
+        return len(self._calls)
@@ -0,0 +1,141 @@
+# ==========================================
+# 대용량 보고서 (StatReport) 수집 파이프라인
+# ==========================================
+# 지난 날짜 실적을 /stats 로 받으면 키워드 50개당 1회 x 날짜 수만큼 호출 -> 키워드 1만개 x 90일 = 1.8만 회.
+# 네이버 대용량 보고서는 고객 1명 x 하루 = 보고서 1개 (TSV 파일):
+#   POST /stat-reports {reportTp, statDt} -> GET /stat-reports/{id} 를 백오프로 폴링 (BUILT 될 때까지)
+#   -> downloadUrl 을 스트리밍으로 받아 한 줄씩 파싱 -> 키워드별 합계만 메모리에 (파일 전체는 들고 있지 않음)
+# AD (노출/클릭/비용/순위합) + AD_CONVERSION (전환수/전환매출) 두 보고서를 키워드 기준으로 합침.
+# 오늘 날짜는 보고서가 만들어지지 않으므로 /stats (stats_warehouse.fetch_day) 로만 받음.
+#   REPORT_CONCURRENCY : 동시에 생성/폴링하는 날짜 수 (기본 4)
+#   REPORT_TIMEOUT     : 보고서 1개 대기 최대 초 (기본 600)
+import os
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+REPORT_CONCURRENCY = int(os.environ.get("REPORT_CONCURRENCY", "4"))
+REPORT_TIMEOUT = float(os.environ.get("REPORT_TIMEOUT", "600"))
+POLL_START, POLL_MAX = 1.0, 30.0
+
+# TSV 컬럼 위치 (네이버 보고서 스펙: 날짜, 고객, 캠페인, 그룹, 키워드, 소재, 비즈채널, 매체, PC/모바일, ...)
+AD_COLS = {"keyword": 4, "imp": 9, "clk": 10, "cost": 11, "rank_sum": 12}
+CONV_COLS = {"keyword": 4, "conv": 11, "conv_amt": 12}
+_SLOT = {"imp": 0, "clk": 1, "cost": 2, "conv": 3, "conv_amt": 4, "rank_sum": 5}
+
+
+class ReportError(Exception):
+    pass
+
+
+def create(call_api, auth, report_tp, day):
+    res = call_api(("POST", "/stat-reports", None, {"reportTp": report_tp, "statDt": f"{day}T00:00:00Z"}, auth))
+    if not res or "reportJobId" not in res: raise ReportError(f"{report_tp} {day} 보고서 생성 실패")
+    return res
+
+
+def wait(call_api, auth, job, timeout=REPORT_TIMEOUT, sleep=time.sleep, stop=None):
+    # BUILT / NONE(데이터 없음) 이 될 때까지 지수 백오프 + 지터로 폴링 (stop 이 set 되면 ReportError)
+    delay, deadline = POLL_START, time.monotonic() + timeout
+    while job.get("status") not in ("BUILT", "NONE"):
+        if job.get("status") == "ERROR": raise ReportError(f"보고서 {job['reportJobId']} 생성 오류")
+        if time.monotonic() + delay > deadline: raise ReportError(f"보고서 {job['reportJobId']} 대기 시간 초과")
+        if stop is not None:
+            if stop.wait(delay * random.uniform(0.8, 1.2)): raise ReportError(f"보고서 {job['reportJobId']} 대기 취소")
+        else:
+            sleep(delay * random.uniform(0.8, 1.2))
+        delay = min(POLL_MAX, delay * 2)
+        job = call_api(("GET", f"/stat-reports/{job['reportJobId']}", None, None, auth)) or job
+    return job
+
+
+def delete(call_api, auth, job):
+    # 다운로드 끝난 보고서는 지움 (고객별 보고서 보관 개수 제한)
+    try:
+        call_api(("DELETE", f"/stat-reports/{job['reportJobId']}", None, None, auth))
+    except Exception:
+        pass
+
+
+def prepare_day(call_api, auth, day, stop=None):
+    # 하루치 AD + AD_CONVERSION 생성 후 둘 다 준비될 때까지 대기 -> (day, ad_job, conv_job)
+    # 한쪽이라도 실패(생성 실패 / ERROR / 시간 초과 / 취소)하면 만든 보고서는 지우고 예외 (보관 개수 제한에 고아 작업이 쌓이지 않게)
+    jobs = []
+    with tracing.span("report.prepare", day=day):
+        try:
+            if stop is not None and stop.is_set(): raise ReportError(f"{day} 보고서 취소")
+            jobs.append(create(call_api, auth, "AD", day))
+            jobs.append(create(call_api, auth, "AD_CONVERSION", day))
+            return day, wait(call_api, auth, jobs[0], stop=stop), wait(call_api, auth, jobs[1], stop=stop)
+        except Exception:
+            for job in jobs: delete(call_api, auth, job)
+            raise
+
+
+def _accumulate(acc, lines, cols, fields):
+    key_col, idx = cols["keyword"], [cols[f] for f in fields]
+    need = max(idx) + 1
+    for line in lines:
+        p = line.rstrip("\r\n").split("\t")
+        if len(p) < need or p[key_col] in ("-", ""): continue  # 키워드 없는 줄 (쇼핑/브랜드 등)
+        row = acc.get(p[key_col])
+        if row is None: row = acc[p[key_col]] = [0, 0, 0, 0, 0, 0.0]
+        for f, i in zip(fields, idx):
+            row[_SLOT[f]] += float(p[i]) if f == "rank_sum" else int(float(p[i]))
+
+
+def read_day(call_api, download, auth, ad_job, conv_job):
+    # 두 보고서 스트림을 키워드별로 합산 -> (id, imp, clk, cost, conv, conv_amt, rnk) 이터레이터
+    # 다운로드는 호출 즉시 (제너레이터 아님) -> 다운로드가 실패하든 소비하는 쪽이 멈추든 두 보고서는 항상 지움
+    acc = {}
+    try:
+        for job, cols, fields in ((ad_job, AD_COLS, ("imp", "clk", "cost", "rank_sum")), (conv_job, CONV_COLS, ("conv", "conv_amt"))):
+            if job.get("status") == "BUILT":
+                with tracing.span("report.download", report=job.get("reportTp")):
+                    _accumulate(acc, download(job["downloadUrl"], auth), cols, fields)
+    finally:
+        for job in (ad_job, conv_job): delete(call_api, auth, job)
+    return ((kid, imp, clk, cost, conv, amt, round(rank_sum / imp, 2) if imp else 0.0)
+            for kid, (imp, clk, cost, conv, amt, rank_sum) in acc.items())
+
+
+def iter_days(call_api, auth, days):
+    # 날짜별 보고서 준비를 REPORT_CONCURRENCY 개 창(window)으로 미리 돌려두고 순서대로 넘김 (다운로드하는 동안 다음 날짜가 생성됨)
+    # 하나를 넘길 때마다 다음 날짜 1개를 추가 -> 네이버에 떠 있는 보고서는 최대 (창 + 1) x 2 개
+    # 준비 실패한 날짜는 예외 객체로 넘김 -> 호출하는 쪽에서 /stats 로 대체
+    # 소비하는 쪽이 중간에 멈추면 (write_day / 다운로드 오류) 남은 날짜는 취소하고 이미 만든 보고서는 지움
+    if not days: return
+    workers = max(1, min(REPORT_CONCURRENCY, len(days)))
+    ex, stop = ThreadPoolExecutor(max_workers=workers), threading.Event()
+    todo, pending = iter(days), deque()
+
+    def fill():
+        while len(pending) < workers:
+            d = next(todo, None)
+            if d is None: return
+            pending.append((d, tracing.submit(ex, prepare_day, call_api, auth, d, stop)))
+
+    try:
+        fill()
+        while pending:
+            d, f = pending.popleft()
+            try:
+                res = f.result()
+            except Exception as e:
+                res = d, e, None
+            fill()
+            yield res
+    finally:
+        stop.set()  # 대기 중인 prepare_day 는 만든 보고서를 지우고 빠져나옴
+        for _, f in pending:
+            if f.cancel(): continue
+            try:
+                _, ad, conv = f.result()
+            except Exception:
+                continue
+            for job in (ad, conv): delete(call_api, auth, job)
+        ex.shutdown(wait=False)
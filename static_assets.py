@@ -0,0 +1,114 @@
+# ==========================================
+# 정적 파일 서빙 (사전 압축 + 해시 파일 장기 캐시) / API gzip
+# ==========================================
+# Vite dist 번들을 매번 원본 그대로 보내던 문제:
+#   - .js/.css/.html 등은 미리 .gz (+ brotli 설치 시 .br) 로 압축해두고 Accept-Encoding 에 맞춰 그대로 전송
+#     (빌드 후 `python static_assets.py dist` 로 미리 만들거나, 서버 기동 시 백그라운드에서 생성. exe 는 spec 에서 빌드 때)
+#   - assets/이름-해시.js 처럼 해시가 붙은 파일은 1년 immutable, index.html 등은 ETag 재검증(no-cache)
+#   - 파일 전송은 FileResponse (ASGI 서버가 http.response.pathsend 를 지원하면 zero-copy 전송)
+#   - /api/* JSON 응답은 ApiGZipMiddleware 로 gzip
+import os
+import re
+import sys
+import gzip
+from mimetypes import guess_type
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+
+try:
+    import brotli  # 선택 의존성 (pip install brotli)
+except ImportError:
+    brotli = None
+
+COMPRESS_EXT = (".js", ".mjs", ".css", ".html", ".svg", ".json", ".map", ".txt", ".xml", ".ico", ".wasm")
+MIN_SIZE = 1024
+API_GZIP_MIN_SIZE = int(os.environ.get("API_GZIP_MIN_SIZE", "1024"))
+API_GZIP_LEVEL = int(os.environ.get("API_GZIP_LEVEL", "5"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+_HASHED = re.compile(r"(^|/)assets/.+-[A-Za-z0-9_-]{8}\.\w+$")
+
+
+def _fresh(src, dst):
+    try: return os.stat(dst).st_mtime >= os.stat(src).st_mtime
+    except OSError: return False
+
+
+def _write_atomic(dst, data):
+    tmp = dst + ".tmp"
+    with open(tmp, "wb") as f: f.write(data)
+    os.replace(tmp, dst)
+
+
+def precompress(root, min_size=MIN_SIZE):
+    # root 아래 압축 대상 파일마다 .gz / .br 생성 (이미 최신이면 건너뜀) -> 생성한 파일 수
+    made = 0
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if not name.endswith(COMPRESS_EXT): continue
+            src = os.path.join(dirpath, name)
+            if os.path.getsize(src) < min_size: continue
+            data = None
+            targets = [(".gz", lambda d: gzip.compress(d, 9, mtime=0))]
+            if brotli: targets.append((".br", lambda d: brotli.compress(d, quality=11)))
+            for ext, fn in targets:
+                if _fresh(src, src + ext): continue
+                if data is None:
+                    with open(src, "rb") as f: data = f.read()
+                packed = fn(data)
+                if len(packed) >= len(data): continue  # 압축 이득 없으면 원본만
+                _write_atomic(src + ext, packed)
+                made += 1
+    return made
+
+
+def cache_control(path):
+    return IMMUTABLE if _HASHED.search(path.replace("\\", "/")) else REVALIDATE
+
+
+class CompressedStaticFiles(StaticFiles):
+    # 요청한 파일 옆에 .br/.gz 가 있고 클라이언트가 받을 수 있으면 그 파일을 Content-Encoding 과 함께 전송
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        accept = request_headers.get("accept-encoding", "")
+        full_path = str(full_path)
+        headers = {"Cache-Control": cache_control(os.path.relpath(full_path, self.directory))}
+        path, media_type = full_path, None
+        for enc, ext in (("br", ".br"), ("gzip", ".gz")):
+            if enc not in accept: continue
+            try: st = os.stat(full_path + ext)
+            except OSError: continue
+            if st.st_mtime < stat_result.st_mtime: continue  # 원본이 더 새로우면 무시 (재압축 전)
+            path, stat_result = full_path + ext, st
+            headers["Content-Encoding"] = enc
+            media_type = guess_type(full_path)[0] or "text/plain"  # 원본 확장자 기준 타입
+            break
+        if full_path.endswith(COMPRESS_EXT): headers["Vary"] = "Accept-Encoding"
+        response = FileResponse(path, status_code=status_code, stat_result=stat_result, headers=headers, media_type=media_type)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class ApiGZipMiddleware:
+    # /api/* 만 gzip (정적 파일은 사전 압축본 사용, SSE 는 GZipMiddleware 가 제외)
+    def __init__(self, app, prefix="/api", minimum_size=API_GZIP_MIN_SIZE, compresslevel=API_GZIP_LEVEL):
+        self.app = app
+        self.prefix = prefix
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.prefix):
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+
+if __name__ == "__main__":
+    # 빌드 직후 사전 압축: python static_assets.py dist
+    root = sys.argv[1] if len(sys.argv) > 1 else "dist"
+    n = precompress(root)
+    print(f"✅ {root}: 압축본 {n}개 생성 (brotli {'사용' if brotli else '미설치 - gzip 만'})")
@@ -0,0 +1,281 @@
+# ==========================================
+# 일별 실적 저장소 (SQLite) + 로컬 집계 쿼리
+# ==========================================
+# fetch_stats 는 "오늘" 또는 기간 1개를 매번 API 로 물어봄 -> 90일 추이 / 키워드 순위 불가능.
+# 키워드 x 일 단위 실적(impCnt, clkCnt, salesAmt, ccnt, avgRnk, convAmt)을 로컬에 쌓아두고
+# 기간 합계 / 순위 / 기간 비교는 SQLite 에서 바로 계산 (API 호출 없음).
+#   - 증분 수집: 아직 안 받은 날짜만 (오늘은 partial 로 저장해서 다음 수집 때 다시 받음)
+#   - 지난 날짜는 대용량 보고서 (stat_reports.py), /stats 는 오늘 분 / 보고서 실패 시에만
+#   - WAREHOUSE_PATH (기본 ./stats.db), WAREHOUSE_DAYS (처음 수집 시 며칠 전까지, 기본 90)
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+WAREHOUSE_PATH = os.environ.get("WAREHOUSE_PATH", "./stats.db")
+WAREHOUSE_DAYS = int(os.environ.get("WAREHOUSE_DAYS", "90"))
+STATS_FIELDS = '["impCnt","clkCnt","salesAmt","ccnt","avgRnk","convAmt"]'
+
+_SUMS = ("SUM(d.imp) AS imp, SUM(d.clk) AS clk, SUM(d.cost) AS cost, SUM(d.conv) AS conv, SUM(d.conv_amt) AS conv_amt, "
+         "SUM(d.rnk * d.imp) / NULLIF(SUM(d.imp), 0) AS rnk")
+_GROUP = {"day": "d.day", "keyword": "d.id", "adgroup": "m.adgroup_id", "campaign": "m.campaign_id"}
+_METRIC = {
+    "imp": "SUM(d.imp)", "clk": "SUM(d.clk)", "cost": "SUM(d.cost)", "conv": "SUM(d.conv)", "conv_amt": "SUM(d.conv_amt)",
+    "ctr": "100.0 * SUM(d.clk) / NULLIF(SUM(d.imp), 0)", "cpc": "1.0 * SUM(d.cost) / NULLIF(SUM(d.clk), 0)",
+    "cpa": "1.0 * SUM(d.cost) / NULLIF(SUM(d.conv), 0)", "roas": "100.0 * SUM(d.conv_amt) / NULLIF(SUM(d.cost), 0)",
+    "rnk": "SUM(d.rnk * d.imp) / NULLIF(SUM(d.imp), 0)",
+}
+
+
+def _names(by):
+    # 키워드 단위면 키워드 문자열/그룹도 같이 (GROUP BY d.id 라 1:1)
+    return ", MAX(m.keyword) AS name, MAX(m.adgroup_id) AS adgroupId" if by == "keyword" else ""
+
+
+def _ratios(r):
+    imp, clk, cost, conv, amt = r["imp"] or 0, r["clk"] or 0, r["cost"] or 0, r["conv"] or 0, r["conv_amt"] or 0
+    r.update(imp=imp, clk=clk, cost=cost, conv=conv, conv_amt=amt,
+             ctr=round(clk / imp * 100, 2) if imp else 0, cpc=round(cost / clk) if clk else 0,
+             cpa=round(cost / conv) if conv else 0, roas=round(amt / cost * 100) if cost else 0,
+             rnk=round(r["rnk"], 2) if r.get("rnk") else 0)
+    return r
+
+
+def merge_stats(a, b):
+    # /stats 항목 2개 합치기 (순위는 노출 가중 평균) - 저장소(어제까지) + /stats(오늘)
+    out = dict(a)
+    for k in ("impCnt", "clkCnt", "salesAmt", "ccnt", "convAmt"): out[k] = int(a.get(k, 0)) + int(b.get(k, 0))
+    ia, ib = int(a.get("impCnt", 0)), int(b.get("impCnt", 0))
+    out["avgRnk"] = round((float(a.get("avgRnk") or 0) * ia + float(b.get("avgRnk") or 0) * ib) / (ia + ib), 1) if ia + ib else 0
+    return out
+
+
+def day_range(since, until):
+    d, end = datetime.strptime(since, "%Y-%m-%d"), datetime.strptime(until, "%Y-%m-%d")
+    out = []
+    while d <= end:
+        out.append(d.strftime("%Y-%m-%d"))
+        d += timedelta(days=1)
+    return out
+
+
+class StatsWarehouse:
+    def __init__(self, path=WAREHOUSE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._tx() as c:
+            c.execute("CREATE TABLE IF NOT EXISTS daily (customer TEXT, id TEXT, day TEXT, imp INTEGER, clk INTEGER, cost INTEGER, "
+                      "conv INTEGER, conv_amt INTEGER, rnk REAL, PRIMARY KEY (customer, id, day)) WITHOUT ROWID")
+            c.execute("CREATE INDEX IF NOT EXISTS ix_daily_day ON daily (customer, day)")
+            c.execute("CREATE TABLE IF NOT EXISTS dims (customer TEXT, id TEXT, keyword TEXT, adgroup_id TEXT, campaign_id TEXT, "
+                      "bid INTEGER, PRIMARY KEY (customer, id)) WITHOUT ROWID")
+            if "bid" not in {r[1] for r in c.execute("PRAGMA table_info(dims)")}:
+                c.execute("ALTER TABLE dims ADD COLUMN bid INTEGER")  # 이전 버전 stats.db
+            c.execute("CREATE TABLE IF NOT EXISTS ingested (customer TEXT, day TEXT, rows INTEGER, source TEXT, partial INTEGER, "
+                      "ts REAL, PRIMARY KEY (customer, day)) WITHOUT ROWID")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _tx(self):
+        return _Tx(self._conn())
+
+    # --- 적재 ---
+    def upsert_dims(self, customer, rows):
+        # rows: (keywordId, keyword, adgroupId, campaignId, 현재 입찰가)
+        with self._tx() as c:
+            c.executemany("INSERT OR REPLACE INTO dims (customer, id, keyword, adgroup_id, campaign_id, bid) VALUES (?, ?, ?, ?, ?, ?)",
+                          ((customer, *r) for r in rows))
+
+    def begin_day(self, customer, day):
+        # 해당 일자를 통째로 교체하기 전에 비움 (완료 기록도 지움 -> 중간에 죽으면 다음 수집 때 다시 받음)
+        with self._tx() as c:
+            c.execute("DELETE FROM daily WHERE customer=? AND day=?", (customer, day))
+            c.execute("DELETE FROM ingested WHERE customer=? AND day=?", (customer, day))
+
+    def insert_rows(self, customer, rows, batch_size=5000):
+        # rows: (id, day, imp, clk, cost, conv, conv_amt, rnk) 반복자. 배치마다 짧게 커밋 (API/다운로드 대기 중에 쓰기 락을 잡지 않음)
+        n, batch = 0, []
+        for r in rows:
+            batch.append((customer, *r))
+            if len(batch) >= batch_size:
+                with self._tx() as c: c.executemany("INSERT OR REPLACE INTO daily VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                n += len(batch); batch = []
+        if batch:
+            with self._tx() as c: c.executemany("INSERT OR REPLACE INTO daily VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            n += len(batch)
+        return n
+
+    def finish_day(self, customer, day, rows, source="stats", partial=False):
+        with self._tx() as c:
+            c.execute("INSERT OR REPLACE INTO ingested VALUES (?, ?, ?, ?, ?, ?)", (customer, day, rows, source, int(partial), time.time()))
+
+    def write_day(self, customer, day, rows, source="stats", partial=False):
+        # rows: (id, imp, clk, cost, conv, conv_amt, rnk) 반복자 - 해당 일자를 통째로 교체
+        self.begin_day(customer, day)
+        n = self.insert_rows(customer, ((r[0], day, *r[1:]) for r in rows))
+        self.finish_day(customer, day, n, source, partial)
+        return n
+
+    def missing_days(self, customer, since, until):
+        done = {r[0] for r in self._conn().execute(
+            "SELECT day FROM ingested WHERE customer=? AND day BETWEEN ? AND ? AND partial=0", (customer, since, until))}
+        return [d for d in day_range(since, until) if d not in done]
+
+    def stats_for(self, customer, ids, since, until, chunk=500):
+        # /stats 응답 모양 {id: {impCnt, clkCnt, salesAmt, ccnt, convAmt, avgRnk}} - 키워드/그룹/캠페인 ID 모두
+        out, conn = {}, self._conn()
+        for col in ("d.id", "m.adgroup_id", "m.campaign_id"):
+            for i in range(0, len(ids), chunk):
+                part = [x for x in ids[i:i + chunk] if x not in out]
+                if not part: continue
+                sql = (f"SELECT {col} AS key, {_SUMS} FROM daily d LEFT JOIN dims m ON m.customer=d.customer AND m.id=d.id "
+                       f"WHERE d.customer=? AND d.day BETWEEN ? AND ? AND {col} IN ({','.join('?' * len(part))}) GROUP BY {col}")
+                for r in conn.execute(sql, (customer, since, until, *part)):
+                    out[r["key"]] = {"id": r["key"], "impCnt": r["imp"] or 0, "clkCnt": r["clk"] or 0, "salesAmt": r["cost"] or 0,
+                                     "ccnt": r["conv"] or 0, "convAmt": r["conv_amt"] or 0, "avgRnk": round(r["rnk"] or 0, 1)}
+        return out
+
+    def status(self, customer):
+        r = self._conn().execute("SELECT COUNT(*), MIN(day), MAX(day), SUM(rows) FROM ingested WHERE customer=?", (customer,)).fetchone()
+        return {"days": r[0], "first": r[1], "last": r[2], "rows": r[3] or 0}
+
+    # --- 조회 ---
+    def rollup(self, customer, since, until, by="day", limit=1000):
+        g = _GROUP[by]
+        sql = (f"SELECT {g} AS key, {_SUMS}{_names(by)} FROM daily d LEFT JOIN dims m ON m.customer=d.customer AND m.id=d.id "
+               f"WHERE d.customer=? AND d.day BETWEEN ? AND ? GROUP BY {g} ORDER BY {'key' if by == 'day' else 'cost DESC'} LIMIT ?")
+        return [_ratios(dict(r)) for r in self._conn().execute(sql, (customer, since, until, limit))]
+
+    def totals(self, customer, since, until):
+        r = self._conn().execute(f"SELECT {_SUMS} FROM daily d WHERE d.customer=? AND d.day BETWEEN ? AND ?", (customer, since, until)).fetchone()
+        return _ratios(dict(r))
+
+    def ranking(self, customer, since, until, metric="cost", by="keyword", limit=50, asc=False, min_imp=0):
+        g, m = _GROUP[by], _METRIC[metric]
+        sql = (f"SELECT {g} AS key, {_SUMS}, {m} AS metric{_names(by)} FROM daily d LEFT JOIN dims m ON m.customer=d.customer AND m.id=d.id "
+               f"WHERE d.customer=? AND d.day BETWEEN ? AND ? GROUP BY {g} HAVING {m} IS NOT NULL AND SUM(d.imp) >= ? "
+               f"ORDER BY metric {'ASC' if asc else 'DESC'} LIMIT ?")
+        return [_ratios(dict(r)) for r in self._conn().execute(sql, (customer, since, until, min_imp, limit))]
+
+    def compare(self, customer, since, until, prev_since=None, prev_until=None, by="campaign", limit=100):
+        # 기간 비교 (이전 기간 미지정 시 바로 앞 같은 길이)
+        if not prev_since or not prev_until:
+            n = len(day_range(since, until))
+            s = datetime.strptime(since, "%Y-%m-%d")
+            prev_until = (s - timedelta(days=1)).strftime("%Y-%m-%d")
+            prev_since = (s - timedelta(days=n)).strftime("%Y-%m-%d")
+        cur = {r["key"]: r for r in self.rollup(customer, since, until, by, limit=100000)}
+        prev = {r["key"]: r for r in self.rollup(customer, prev_since, prev_until, by, limit=100000)}
+        rows = []
+        for key in set(cur) | set(prev):
+            a, b = cur.get(key), prev.get(key)
+            base = a or b
+            row = {"key": key, "name": base.get("name"), "current": a, "previous": b}
+            for k in ("imp", "clk", "cost", "conv", "conv_amt", "roas", "cpa"):
+                row[f"{k}_delta"] = (a[k] if a else 0) - (b[k] if b else 0)
+            rows.append(row)
+        rows.sort(key=lambda r: abs(r["cost_delta"]), reverse=True)
+        return {"current": {"since": since, "until": until, **self.totals(customer, since, until)},
+                "previous": {"since": prev_since, "until": prev_until, **self.totals(customer, prev_since, prev_until)},
+                "rows": rows[:limit]}
+
+
+class _Tx:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, *exc):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+_warehouse = None
+
+
+def get_warehouse():
+    # 첫 사용 시 파일 생성 (import 만으로는 stats.db 를 만들지 않음)
+    global _warehouse
+    if _warehouse is None: _warehouse = StatsWarehouse()
+    return _warehouse
+
+
+# ==========================================
+# 수집 (네이버 API -> 저장소)
+# ==========================================
+def collect_dims(call_api, auth):
+    # 캠페인 -> 그룹 -> 키워드 (keywordId, keyword, adgroupId, campaignId, 실제 입찰가 - 그룹가 사용이면 그룹 입찰가)
+    camps = call_api(("GET", "/ncc/campaigns", None, None, auth)) or []
+    groups = []
+    for c in camps:
+        groups += call_api(("GET", "/ncc/adgroups", {"nccCampaignId": c["nccCampaignId"]}, None, auth)) or []
+    out = []
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        fs = [(g, tracing.submit(ex, call_api, ("GET", "/ncc/keywords", {"nccAdgroupId": g["nccAdgroupId"]}, None, auth))) for g in groups]
+        for g, f in fs:
+            for k in f.result() or []:
+                bid = g.get("bidAmt") if k.get("useGroupBidAmt") else k.get("bidAmt")
+                out.append((k["nccKeywordId"], k.get("keyword"), g["nccAdgroupId"], g.get("nccCampaignId"), bid))
+    return out
+
+
+def fetch_day(call_api, auth, ids, day, chunk=50):
+    # /stats 를 50개씩 하루 단위로 -> (id, imp, clk, cost, conv, conv_amt, rnk)
+    import json
+    tr = json.dumps({"since": day, "until": day})
+    for i in range(0, len(ids), chunk):
+        res = call_api(("GET", "/stats", {"ids": ",".join(ids[i:i + chunk]), "fields": STATS_FIELDS, "timeRange": tr}, None, auth))
+        for s in (res or {}).get("data", []) if isinstance(res, dict) else []:
+            yield (s["id"], int(s.get("impCnt", 0)), int(s.get("clkCnt", 0)), int(s.get("salesAmt", 0)),
+                   int(s.get("ccnt", 0)), int(s.get("convAmt", 0)), float(s.get("avgRnk") or 0))
+
+
+def ingest(call_api, auth, days=WAREHOUSE_DAYS, wh=None, include_today=True, progress=None, download=None):
+    # 증분 수집: 아직 없는(또는 partial) 날짜만 -> {"days": [...], "rows": n}
+    # download 가 있으면 지난 날짜는 대용량 보고서(stat_reports), 오늘(partial)과 보고서 실패한 날짜만 /stats
+    wh = wh or get_warehouse()
+    customer = str(auth["customer_id"])
+    with tracing.span("warehouse.ingest", customer=customer):
+        dims = collect_dims(call_api, auth)
+        wh.upsert_dims(customer, dims)
+        ids = [d[0] for d in dims]
+        today = datetime.now()
+        since = (today - timedelta(days=days)).strftime("%Y-%m-%d")
+        yesterday = (today - timedelta(days=1)).strftime("%Y-%m-%d")
+        past = wh.missing_days(customer, since, yesterday) if days > 0 else []
+        todo = past + ([today.strftime("%Y-%m-%d")] if include_today else [])
+        total, n = 0, 0
+        if download and past:
+            import stat_reports
+            for day, ad, conv in stat_reports.iter_days(call_api, auth, past):
+                if isinstance(ad, Exception):
+                    print(f"[Warehouse] {customer} {day} 보고서 실패 -> /stats 대체: {ad}")
+                    rows, source = fetch_day(call_api, auth, ids, day), "stats"
+                else:
+                    rows, source = stat_reports.read_day(call_api, download, auth, ad, conv), "report"
+                total += wh.write_day(customer, day, rows, source=source)
+                n += 1
+                if progress: progress(n, len(todo), day)
+            todo_stats = todo[len(past):]
+        else:
+            todo_stats = todo
+        for day in todo_stats:
+            partial = day == today.strftime("%Y-%m-%d")
+            total += wh.write_day(customer, day, fetch_day(call_api, auth, ids, day), source="stats", partial=partial)
+            n += 1
+            if progress: progress(n, len(todo), day)
+    return {"keywords": len(ids), "days": todo, "rows": total}
@@ -0,0 +1,231 @@
+# ==========================================
+# 경량 분산 트레이싱 (route -> 네이버 호출 -> DB)
+# ==========================================
+# - contextvars 로 trace/span 전파 (ThreadPoolExecutor 는 submit() 헬퍼 사용)
+# - 샘플링 안 된 요청은 span() 이 아무것도 하지 않음 (핫패스 비용 ~0)
+# - 설정: TRACE_SAMPLE_RATE (0.0~1.0), TRACE_EXPORTER ("stdout" | "file:경로")
+# - 요청의 X-Trace-Id 는 연결(correlation)용으로만 씀: 샘플링되면 그 ID 로 기록, 아니면 응답 헤더로만 돌려줌
+# - 내보내기는 백그라운드: 요청 경로에서는 span -> dict 만 큐에 넣고, 직렬화/쓰기는 TRACE_FLUSH_SEC 마다 모아서
+#   (큐가 TRACE_QUEUE_MAX 를 넘으면 버리고 dropped 로 셈)
+import os
+import re
+import json
+import time
+import atexit
+import random
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0") or 0)
+EXPORTER = os.environ.get("TRACE_EXPORTER", "stdout")
+TRACE_FLUSH_SEC = float(os.environ.get("TRACE_FLUSH_SEC", "1.0"))
+TRACE_QUEUE_MAX = int(os.environ.get("TRACE_QUEUE_MAX", "10000"))
+FLUSH_SPANS = 500  # 이만큼 쌓이면 주기를 기다리지 않고 씀
+
+_TRACE_ID = re.compile(r"^[0-9A-Za-z-]{1,64}$")  # 외부에서 받은 ID (헤더에 그대로 돌려주므로 형식 제한)
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(bits=64):
+    return "%0*x" % (bits // 4, random.getrandbits(bits))
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attrs", "start", "end")
+
+    def __init__(self, trace_id, parent_id, name, attrs):
+        self.trace_id, self.parent_id, self.name = trace_id, parent_id, name
+        self.span_id = _new_id()
+        self.attrs = attrs
+        self.start = time.time()
+        self.end = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "start": round(self.start, 6),
+            "duration_ms": round((self.end - self.start) * 1000, 3),
+            "thread": threading.current_thread().name, "attrs": self.attrs,
+        }
+
+
+# --- Exporter (백그라운드 스레드 1개만 write 를 부름) ---
+class StdoutExporter:
+    def write(self, lines):
+        print("\n".join("[trace] " + line for line in lines))
+
+
+class FileExporter:
+    # JSON Lines (span 1개 = 1줄) -> jq / pandas 로 사후 분석. 파일은 한 번 열어 두고 묶음마다 flush
+    def __init__(self, path):
+        self.path = path
+        self._f = None
+
+    def write(self, lines):
+        if self._f is None: self._f = open(self.path, "a", encoding="utf-8")
+        self._f.write("".join(line + "\n" for line in lines))
+        self._f.flush()
+
+
+class BufferedExporter:
+    def __init__(self, sink, max_queue=TRACE_QUEUE_MAX, interval=TRACE_FLUSH_SEC):
+        self.sink, self.max_queue, self.interval = sink, max_queue, interval
+        self.dropped = 0
+        self._q = deque()
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def export(self, span):
+        if len(self._q) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._q.append(span.to_dict())  # 스레드 이름은 여기서 (끝낸 스레드 기준)
+        if self._thread is None: self._start()
+        if len(self._q) >= FLUSH_SPANS: self._wake.set()
+
+    def _start(self):
+        with self._flush_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        with self._flush_lock:
+            items = []
+            while self._q:
+                try: items.append(self._q.popleft())
+                except IndexError: break
+            if items: self.sink.write([json.dumps(d, ensure_ascii=False, default=str) for d in items])
+            return len(items)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try: self.flush()
+            except Exception as e: print(f"[Tracing] 내보내기 실패: {e}")
+
+
+def make_exporter(spec):
+    return BufferedExporter(FileExporter(spec[5:]) if spec.startswith("file:") else StdoutExporter())
+
+
+exporter = make_exporter(EXPORTER)
+atexit.register(exporter.flush)  # 종료 직전 남은 span
+
+
+def current_trace_id():
+    s = _current.get()
+    return s.trace_id if s else None
+
+
+@contextmanager
+def span(name, **attrs):
+    parent = _current.get()
+    if parent is None:
+        # 샘플링 안 된 트레이스 -> no-op
+        yield None
+        return
+    s = Span(parent.trace_id, parent.span_id, name, attrs)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.attrs["error"] = repr(e)
+        raise
+    finally:
+        s.end = time.time()
+        _current.reset(token)
+        exporter.export(s)
+
+
+@contextmanager
+def start_trace(name, trace_id=None, sample_rate=None, **attrs):
+    # 샘플링은 항상 sampler 가 정함. 외부 trace_id (X-Trace-Id) 는 샘플링됐을 때 그 ID 를 쓰는 것뿐
+    rate = SAMPLE_RATE if sample_rate is None else sample_rate
+    if rate <= 0 or random.random() >= rate:
+        yield None
+        return
+    s = Span(trace_id or _new_id(128), None, name, attrs)
+    token = _current.set(s)
+    try:
+        yield s
+    finally:
+        s.end = time.time()
+        _current.reset(token)
+        exporter.export(s)
+
+
+def submit(executor, fn, *args, **kwargs):
+    # 현재 span 컨텍스트를 워커 스레드로 복사
+    ctx = contextvars.copy_context()
+    return executor.submit(ctx.run, fn, *args, **kwargs)
+
+
+# --- DB 쿼리 span (SQLAlchemy 이벤트 훅) ---
+def instrument_engine(engine):
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        parent = _current.get()
+        if parent is None: return
+        s = Span(parent.trace_id, parent.span_id, "db", {"sql": statement[:120]})
+        conn.info.setdefault("_trace_spans", []).append(s)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("_trace_spans")
+        if not stack: return
+        s = stack.pop()
+        s.end = time.time()
+        exporter.export(s)
+
+
+# --- ASGI 미들웨어: 요청 단위 root span + X-Trace-Id 응답 헤더 ---
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        incoming = None
+        for k, v in scope.get("headers", []):
+            if k == b"x-trace-id":
+                incoming = v.decode("latin-1")
+                if not _TRACE_ID.match(incoming): incoming = None
+                break
+        with start_trace("route", trace_id=incoming, method=scope["method"], path=scope["path"]) as root:
+            if root is None:
+                if incoming is None: return await self.app(scope, receive, send)
+
+                async def _echo(message):
+                    # 샘플링 안 됨 -> 기록은 없지만 호출한 쪽 로그와 맞출 수 있게 ID 만 돌려줌
+                    if message["type"] == "http.response.start":
+                        message = dict(message)
+                        message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", incoming.encode())]
+                    await send(message)
+                return await self.app(scope, receive, _echo)
+
+            async def _send(message):
+                if message["type"] == "http.response.start":
+                    # 요청 시작 ~ 응답 헤더 전송 (핸들러 + 직렬화). 전체 duration 과의 차이 = 본문 전송 시간
+                    root.attrs["status"] = message["status"]
+                    root.attrs["response_start_ms"] = round((time.time() - root.start) * 1000, 3)
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", root.trace_id.encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, _send)
+            finally:
+                route = scope.get("route")
+                if route is not None: root.attrs["route"] = getattr(route, "path", "")